@@ -50,6 +50,7 @@ import neo
 import itertools
 import elephant.conversion as conv
 import elephant.spike_train_surrogates as spike_train_surrogates
+from elephant.utils import surrogate_random_states
 from sklearn.cluster import dbscan as dbscan
 
 # =============================================================================
@@ -788,7 +789,8 @@ def cluster_matrix_entries(mat, eps=10, min=2, stretch=5):
 
 def probability_matrix_montecarlo(
         spiketrains, binsize, dt, t_start_x=None, t_start_y=None,
-        surr_method='dither_spike_train', j=None, n_surr=100, verbose=False):
+        surr_method='dither_spike_train', j=None, n_surr=100, verbose=False,
+        random_state=None):
     '''
     Given a list of parallel spike trains, estimate the cumulative probability
      of each entry in their intersection matrix (see: intersection_matrix())
@@ -841,6 +843,12 @@ def probability_matrix_montecarlo(
     n_surr : int, optional
         number of spike_train_surrogates to generate for the bootstrap
         procedure. Default: 100
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        the source of randomness of the surrogates. If None, all surrogates
+        of each spike train are drawn at once from the global state of
+        np.random. Otherwise each surrogate is drawn from its own stream, see
+        elephant.utils.surrogate_random_states().
+        Default: None
 
     Returns
     -------
@@ -860,12 +868,15 @@ def probability_matrix_montecarlo(
         spiketrains, binsize=binsize, dt=dt, t_start_x=t_start_x,
         t_start_y=t_start_y)
 
-    # Generate surrogate spike trains as a list surrs; for each spike train
-    # i, surrs[i] is a list of length n_surr, containing the
-    # spike_train_surrogates of i
-    surrs = [spike_train_surrogates.surrogates(
-        st, n=n_surr, surr_method=surr_method, dt=j, decimals=None, edges=True)
-        for st in spiketrains]
+    if random_state is None:
+        # Generate surrogate spike trains as a list surrs; for each spike
+        # train i, surrs[i] is a list of length n_surr, containing the
+        # spike_train_surrogates of i
+        surrs = [spike_train_surrogates.surrogates(
+            st, n=n_surr, surr_method=surr_method, dt=j, decimals=None,
+            edges=True) for st in spiketrains]
+    else:
+        random_states = surrogate_random_states(random_state, n_surr)
 
     # Compute the p-value matrix pmat; pmat[i, j] counts the fraction of
     # surrogate data whose intersection value at (i, j) whose lower than or
@@ -876,7 +887,14 @@ def probability_matrix_montecarlo(
     for i in _xrange(n_surr):                      # For each surrogate id i
         if verbose:
             print('    surr %d' % i)
-        surrs_i = [st[i] for st in surrs]         # Take each i-th surrogate
+        if random_state is None:
+            surrs_i = [st[i] for st in surrs]     # Take each i-th surrogate
+        else:
+            # Generate the i-th surrogate of each spike train from its stream
+            surrs_i = [spike_train_surrogates.surrogates(
+                st, n=1, surr_method=surr_method, dt=j, decimals=None,
+                edges=True, random_state=random_states[i])[0]
+                for st in spiketrains]
         imat_surr, xx, yy = intersection_matrix(  # compute the related imat
             surrs_i, binsize=binsize, dt=dt,
             t_start_x=t_start_x, t_start_y=t_start_y)
@@ -52,10 +52,12 @@ DOI: 10.1214/14-AOAS782SUPP;.r
 
 import numpy as np
 import quantities as pq
+from elephant.utils import get_random_state, surrogate_random_states
 
 
 def multiple_filter_test(window_sizes, spiketrain, t_final, alpha, n_surrogates,
-                         test_quantile=None, test_param=None, dt=None):
+                         test_quantile=None, test_param=None, dt=None,
+                         random_state=None):
     """
     Detects change points.
 
@@ -88,6 +90,9 @@ def multiple_filter_test(window_sizes, spiketrain, t_final, alpha, n_surrogates,
             variances of the limit process correspodning to `h`. This will be 
             used to normalize the `filter_process` in order to give to the every
             maximum the same impact on the global statistic.
+        random_state : None, int, np.random.RandomState or np.random.Generator
+            source of randomness of the limit processes, see
+            `empirical_parameters`
            
 
     Returns:
@@ -102,13 +107,14 @@ def multiple_filter_test(window_sizes, spiketrain, t_final, alpha, n_surrogates,
     if (test_quantile is None) and (test_param is None):
         test_quantile, test_param = empirical_parameters(window_sizes, t_final,
                                                          alpha, n_surrogates,
-                                                         dt)
+                                                         dt, random_state)
     elif test_quantile is None:
         test_quantile = empirical_parameters(window_sizes, t_final, alpha,
-                                             n_surrogates, dt)[0]
+                                             n_surrogates, dt,
+                                             random_state)[0]
     elif test_param is None:
         test_param = empirical_parameters(window_sizes, t_final, alpha,
-                                          n_surrogates, dt)[1]
+                                          n_surrogates, dt, random_state)[1]
                                           
     spk = spiketrain
     
@@ -154,7 +160,7 @@ def multiple_filter_test(window_sizes, spiketrain, t_final, alpha, n_surrogates,
     return cps
 
 
-def _brownian_motion(t_in, t_fin, x_in, dt):
+def _brownian_motion(t_in, t_fin, x_in, dt, random_state=None):
     """
     Generate a Brownian Motion.
 
@@ -168,6 +174,8 @@ def _brownian_motion(t_in, t_fin, x_in, dt):
             initial point of the process: _brownian_motio(0) = x_in
         dt : quantities,
           resolution, time step at which brownian increments are summed
+        random_state : None, int, np.random.RandomState or np.random.Generator
+            source of randomness, see `elephant.utils.get_random_state`
     Returns
     -------
     Brownian motion on [t_in, t_fin], with resolution dt and initial state x_in
@@ -187,13 +195,13 @@ def _brownian_motion(t_in, t_fin, x_in, dt):
     except ValueError:
         raise ValueError("dt must be a time quantity")
 
-    x = np.random.normal(0, np.sqrt(dt_sec), size=int((t_fin_sec - t_in_sec) 
-                                                                     / dt_sec))
+    x = get_random_state(random_state).normal(
+        0, np.sqrt(dt_sec), size=int((t_fin_sec - t_in_sec) / dt_sec))
     s = np.cumsum(x)
     return s + x_in
 
 
-def _limit_processes(window_sizes, t_final, dt):
+def _limit_processes(window_sizes, t_final, dt, random_state=None):
     """
     Generate the limit processes (depending only on t_final and h), one for
     each window size `h` in H. The distribution of maxima of these processes
@@ -207,6 +215,8 @@ def _limit_processes(window_sizes, t_final, dt):
             end of limit process
         dt : quantity object
             resolution, time step at which the windows are slided
+        random_state : None, int, np.random.RandomState or np.random.Generator
+            source of randomness, see `elephant.utils.get_random_state`
 
     Returns
     -------
@@ -227,7 +237,7 @@ def _limit_processes(window_sizes, t_final, dt):
     except ValueError:
         raise ValueError("dt must be a time quantity")
     
-    w = _brownian_motion(0 * u, t_final, 0, dt)
+    w = _brownian_motion(0 * u, t_final, 0, dt, random_state)
     
     for h in window_sizes_sec:
         # BM on [h,T-h], shifted in time t-->t+h
@@ -244,7 +254,8 @@ def _limit_processes(window_sizes, t_final, dt):
     return limit_processes
 
 
-def empirical_parameters(window_sizes, t_final, alpha, n_surrogates, dt = None):
+def empirical_parameters(window_sizes, t_final, alpha, n_surrogates, dt = None,
+                         random_state=None):
     """
     This function generates the threshold and the null parameters.
     The`_filter_process_h` has been proved to converge (for t_fin, h-->infinity)
@@ -269,6 +280,10 @@ def empirical_parameters(window_sizes, t_final, alpha, n_surrogates, dt = None):
             numbers of simulated limit processes
         dt : quantity object
             resolution, time step at which the windows are slided
+        random_state : None, int, np.random.RandomState or np.random.Generator
+            source of randomness. If not None, each limit process is drawn
+            from its own stream (see `elephant.utils.surrogate_random_states`),
+            so that the surrogates can be simulated in parallel
 
     Returns
     -------
@@ -323,10 +338,11 @@ def empirical_parameters(window_sizes, t_final, alpha, n_surrogates, dt = None):
     # Elements are: M*(i,h) = max(t in T)[`limit_process_h`(t)],
     # for each h in H and surrogate i
     maxima_matrix = []
+    random_states = surrogate_random_states(random_state, n_surrogates)
 
     for i in range(n_surrogates):
         # mh_star = []
-        simu = _limit_processes(window_sizes, t_final, dt)
+        simu = _limit_processes(window_sizes, t_final, dt, random_states[i])
         # for i, h in enumerate(window_sizes_mag):
         #     # max over time of the limit process generated with window h
         #     m_h = np.max(simu[i])
@@ -12,8 +12,12 @@ An example is the representation of a spike train as a sequence of 0-1 values
 
 from __future__ import division, print_function
 
+import json
+import os
+import struct
+import zipfile
+
 import neo
-import scipy
 import scipy.sparse as sps
 import numpy as np
 import quantities as pq
@@ -160,6 +164,80 @@ def binarize(spiketrain, sampling_rate=None, t_start=None, t_stop=None,
         return res, pq.Quantity(np.arange(t_start, t_stop + sampling_period,
                                           sampling_period), units=units)
 
+
+def ragged_spike_times(spiketrains, units=None):
+    """
+    Converts a list of spike trains into one flat array of spike times and
+    the offsets of the spike trains in it (a ragged array).
+
+    The spikes of the `i`-th spike train are `times[offsets[i]:offsets[i +
+    1]]`, sorted ascendingly. Functions such as
+    `elephant.statistics.isi_batch` process all spike trains in this
+    representation in a few vectorized passes.
+
+    Parameters
+    ----------
+    spiketrains : list of neo.SpikeTrain, quantity arrays, numpy arrays or
+                  lists
+        The spike trains.
+    units : quantities.Quantity or None
+        Units of the returned spike times. If None, the units of the first
+        spike train with units are used; plain numbers are taken as they
+        are.
+        Default is `None`
+
+    Returns
+    -------
+    times : quantities.Quantity or np.ndarray
+        The spike times of all spike trains. A quantity array if `units` is
+        given or the spike trains have units, otherwise a numpy array.
+    offsets : np.ndarray
+        Array of length `len(spiketrains) + 1` delimiting the spike trains
+        in `times`.
+
+    Examples
+    --------
+    >>> import elephant.conversion as conv
+    >>> import quantities as pq
+    >>> times, offsets = conv.ragged_spike_times(
+    ...     [[0.3, 0.1] * pq.s, [] * pq.s, [200] * pq.ms])
+    >>> print(times)
+    [0.1 0.3 0.2] s
+    >>> print(offsets)
+    [0 2 2 3]
+
+    """
+    if units is None:
+        for st in spiketrains:
+            if isinstance(st, pq.Quantity):
+                units = st.units
+                break
+    elif isinstance(units, pq.Quantity):
+        units = units.units
+    arrays = []
+    # conversion factor of each unit of the spike trains
+    factors = {}
+    for st in spiketrains:
+        if isinstance(st, pq.Quantity):
+            factor = 1.
+            if units is not None:
+                key = st.dimensionality.string
+                if key not in factors:
+                    factors[key] = st.units.rescale(units).magnitude.item()
+                factor = factors[key]
+            st = st.magnitude if factor == 1. else st.magnitude * factor
+        arrays.append(np.asarray(st, dtype=float).ravel())
+    offsets = np.r_[0, np.cumsum([len(st) for st in arrays])].astype(int)
+    times = np.concatenate(arrays) if arrays else np.array([])
+    # sort within each spike train at once, by spike train and time, unless
+    # the spike trains are sorted already
+    rows = np.repeat(np.arange(len(arrays)), np.diff(offsets))
+    if np.any((np.diff(times) < 0) & (np.diff(rows) == 0)):
+        times = times[np.lexsort((times, rows))]
+    if units is not None:
+        times = pq.Quantity(times, units=units)
+    return times, offsets
+
 ###########################################################################
 #
 # Methods to calculate parameters, t_start, t_stop, bin size,
@@ -319,6 +397,197 @@ def _get_start_stop_from_input(spiketrains):
     return start, stop
 
 
+def _bin_spike_times(times, offsets, t_start, t_stop, binsize, num_bins,
+                     scale=1.):
+    """
+    Computes the bin index of every spike of several spike trains in a single
+    vectorized pass.
+
+    All spike trains are given as one flat array of spike times, where the
+    spikes of the `i`-th spike train are `times[offsets[i]:offsets[i + 1]]`.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Concatenated spike times of all spike trains (plain floats).
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the `n` spike trains in `times`.
+    t_start : float
+        Start time of the first bin, in the units of `times`.
+    t_stop : float
+        Stop time of the last bin, in the units of `times`.
+    binsize : float
+        Width of each bin, in units such that `times * scale` is expressed in
+        the same units.
+    num_bins : int
+        Number of bins.
+    scale : float
+        Factor converting the units of `times` into the units of `binsize`.
+        Default: 1.
+
+    Returns
+    -------
+    rows : np.ndarray
+        Index of the spike train each binned spike belongs to.
+    bins : np.ndarray
+        Bin index of each binned spike. Spikes outside of
+        `[t_start, t_stop]` or beyond `num_bins` are dropped.
+    """
+    times = np.asarray(times)
+    offsets = np.asarray(offsets)
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    mask = np.logical_and(times >= t_start, times <= t_stop)
+    bins = np.array((times[mask] - t_start) * scale / binsize, dtype=int)
+    rows = rows[mask]
+    mask = bins < num_bins
+    return rows[mask], bins[mask]
+
+
+def _bins_to_csr(rows, bins, shape, compact=False):
+    """
+    Builds the CSR matrix of spike counts from the row and bin index of each
+    spike, without going through an intermediate COO matrix.
+
+    Parameters
+    ----------
+    rows : np.ndarray
+        Row (spike train) index of each spike.
+    bins : np.ndarray
+        Column (bin) index of each spike.
+    shape : tuple of int
+        Shape `(number of spike trains, number of bins)` of the matrix.
+    compact : bool
+        If True, the spike counts are stored with the smallest unsigned
+        integer type that holds the largest count. Otherwise, `int` is used.
+        Default: False
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Sparse matrix with the number of spikes per bin.
+    """
+    n_rows, n_cols = shape
+    keys = np.asarray(rows, dtype=np.int64) * n_cols + bins
+    # spike trains are usually sorted, in which case no sorting is needed
+    if np.any(keys[1:] < keys[:-1]):
+        keys = np.sort(keys)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) \
+        if len(keys) else np.array([], dtype=int)
+    counts = np.diff(np.r_[starts, len(keys)])
+    keys = keys[starts]
+    filled_rows = keys // n_cols if n_cols else keys
+    indices = keys - filled_rows * n_cols
+    indptr = np.r_[0, np.cumsum(np.bincount(filled_rows, minlength=n_rows))]
+    if compact:
+        dtype = np.min_scalar_type(counts.max() if len(counts) else 0)
+    else:
+        dtype = int
+    return sps.csr_matrix((counts.astype(dtype), indices, indptr),
+                          shape=shape, dtype=dtype)
+
+
+# number of set bits of each possible byte value
+_POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)],
+                           dtype=np.uint8)
+
+
+def _popcount(packed, axis=-1):
+    """
+    Counts the set bits of a bit-packed binary array along `axis`.
+
+    Parameters
+    ----------
+    packed : np.ndarray of np.uint8
+        Bit-packed binary array, as returned by `np.packbits`.
+    axis : int or None
+        Axis along which the set bits are summed. If None, the total number
+        of set bits is returned.
+        Default: -1
+
+    Returns
+    -------
+    np.ndarray or int
+        Number of set bits.
+    """
+    return _POPCOUNT_TABLE[packed].sum(axis=axis, dtype=np.int64)
+
+
+def _packed_coincidences(packed_x, packed_y=None):
+    """
+    Computes the number of coincidences, i.e. bins in which both binary
+    spike trains contain a spike, for all pairs of rows of two bit-packed
+    binned spike trains.
+
+    The coincidences are obtained by a bitwise AND of the packed rows
+    followed by a popcount, which is equivalent to the matrix product of the
+    unpacked binary matrices.
+
+    Parameters
+    ----------
+    packed_x : np.ndarray of np.uint8
+        Bit-packed binary matrix of shape `(n_x, n_bytes)`, e.g. from
+        `BinnedSpikeTrain.to_packed_bool_array()`.
+    packed_y : np.ndarray of np.uint8 or None
+        Bit-packed binary matrix of shape `(n_y, n_bytes)`. If None,
+        `packed_x` is used.
+        Default: None
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape `(n_x, n_y)` with the number of coincidences.
+    """
+    if packed_y is None:
+        packed_y = packed_x
+    coincidences = np.empty((len(packed_x), len(packed_y)), dtype=np.int64)
+    for idx, row in enumerate(packed_x):
+        coincidences[idx] = _popcount(np.bitwise_and(row, packed_y))
+    return coincidences
+
+
+def _memmap_npz_member(filename, name, mmap_mode):
+    """
+    Memory-maps an array stored uncompressed in an `.npz` file, which
+    `numpy.load` would read into memory.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the `.npz` file.
+    name : str
+        Name of the array in the file.
+    mmap_mode : {'r', 'r+', 'c'}
+        Memory-map mode, see `numpy.memmap`.
+
+    Returns
+    -------
+    np.memmap
+        The array.
+    """
+    with zipfile.ZipFile(filename) as archive:
+        info = archive.getinfo(name + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError("compressed arrays cannot be memory-mapped")
+    with open(filename, 'rb') as f:
+        # skip the local file header, whose extra field may differ from the
+        # one in the central directory
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack('<HH', f.read(4))
+        f.seek(name_length + extra_length, 1)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(f)
+        else:
+            header = np.lib.format.read_array_header_2_0(f)
+        shape, fortran_order, dtype = header
+        offset = f.tell()
+    if not shape or not np.prod(shape):
+        # empty arrays cannot be memory-mapped
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode=mmap_mode, offset=offset,
+                     shape=shape, order='F' if fortran_order else 'C')
+
+
 class BinnedSpikeTrain(object):
     """
     Class which calculates a binned spike train and provides methods to
@@ -360,6 +629,13 @@ class BinnedSpikeTrain(object):
     t_stop : quantities.Quantity
         Stopping time of the last bin (right extreme; excluded).
         Default is `None`
+    compact : bool
+        If True, the spike counts are stored with the smallest unsigned
+        integer type that can hold the largest count (e.g. `np.uint8`)
+        instead of `int`, which reduces the memory of long recordings binned
+        at a fine resolution. Note that arithmetic on the returned matrices
+        then follows the rules of this small data type.
+        Default is `False`
 
     See also
     --------
@@ -389,10 +665,31 @@ class BinnedSpikeTrain(object):
     """
 
     def __init__(self, spiketrains, binsize=None, num_bins=None, t_start=None,
-                 t_stop=None):
+                 t_stop=None, compact=False):
         """
         Defines a binned spike train class
 
+        """
+        spiketrains = self._init_binning(spiketrains, binsize, num_bins,
+                                         t_start, t_stop)
+        self.compact = compact
+        # Cache of views derived from the sparse matrix
+        self._cache = {}
+        # Variables to store the sparse matrix
+        self._sparse_mat_u = None
+        # Now create sparse matrix
+        self._convert_to_binned(spiketrains)
+
+    def _init_binning(self, spiketrains, binsize, num_bins, t_start, t_stop):
+        """
+        Checks the input spike trains, and sets and checks the binning
+        parameters, calculating the missing ones.
+
+        Returns
+        -------
+        spiketrains : list of neo.SpikeTrain
+            The input spike trains as a list.
+
         """
         # Converting spiketrains to a list, if spiketrains is one
         # SpikeTrain object
@@ -420,10 +717,151 @@ class BinnedSpikeTrain(object):
         self._check_init_params(binsize, num_bins, self.t_start, self.t_stop)
         self._check_consistency(spiketrains, self.binsize, self.num_bins,
                                 self.t_start, self.t_stop)
-        # Variables to store the sparse matrix
-        self._sparse_mat_u = None
-        # Now create sparse matrix
-        self._convert_to_binned(spiketrains)
+        return spiketrains
+
+    @classmethod
+    def from_arrays(cls, times, units, binsize=None, num_bins=None,
+                    t_start=None, t_stop=None, offsets=None, compact=False):
+        """
+        Creates a binned spike train directly from plain arrays of spike
+        times, without creating a `neo.SpikeTrain` or a `quantities.Quantity`
+        object per spike train.
+
+        The spike times are either given as a list of arrays, one per spike
+        train, or as one flat array together with `offsets`, such that the
+        spikes of the `i`-th spike train are `times[offsets[i]:offsets[i+1]]`.
+
+        Parameters
+        ----------
+        times : list of np.ndarray or np.ndarray
+            Spike times of each spike train, or the concatenated spike times
+            of all spike trains if `offsets` is given.
+        units : str or quantities.Quantity
+            Units of the spike times, e.g. `'s'` or `pq.ms`. Parameters which
+            are given as plain numbers are assumed to be in these units, too.
+        binsize : float or quantities.Quantity
+            Width of each time bin.
+            Default is `None`
+        num_bins : int
+            Number of bins of the binned spike train.
+            Default is `None`
+        t_start : float or quantities.Quantity
+            Time of the first bin (left extreme; included).
+            Default is `None`
+        t_stop : float or quantities.Quantity
+            Stopping time of the last bin (right extreme; excluded).
+            Default is `None`
+        offsets : np.ndarray
+            Array of length `n + 1` delimiting the `n` spike trains in the
+            flat array `times`. If `None`, `times` is a list of arrays.
+            Default is `None`
+        compact : bool
+            See :class:`BinnedSpikeTrain`.
+            Default is `False`
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            The binned spike trains. Since no `neo.SpikeTrain` objects are
+            involved, :attr:`lst_input` is `None`.
+
+        Raises
+        ------
+        AttributeError :
+            If less than three of `binsize`, `num_bins`, `t_start` and
+            `t_stop` are given, since they cannot be inferred from plain
+            arrays.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> import elephant.conversion as conv
+        >>> times = np.array([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7, 0.1, 8.0])
+        >>> x = conv.BinnedSpikeTrain.from_arrays(
+        ...     times, 's', binsize=1, t_start=0, t_stop=10,
+        ...     offsets=[0, 7, 9])
+        >>> print(x.to_array())
+        [[2 1 0 1 1 1 1 0 0 0]
+         [1 0 0 0 0 0 0 0 1 0]]
+
+        """
+        units = pq.Quantity(1, units).units
+        if offsets is None:
+            times = [np.asarray(st, dtype=float) for st in times]
+            offsets = np.r_[0, np.cumsum([len(st) for st in times])]
+            times = np.concatenate(times) if times else np.array([])
+        else:
+            times = np.asarray(times, dtype=float)
+            offsets = np.asarray(offsets, dtype=int)
+
+        def _as_quantity(value):
+            if value is None or isinstance(value, pq.Quantity):
+                return value
+            return pq.Quantity(value, units)
+
+        binsize = _as_quantity(binsize)
+        t_start = _as_quantity(t_start)
+        t_stop = _as_quantity(t_stop)
+
+        self = cls.__new__(cls)
+        self.lst_input = None
+        self.compact = compact
+        self.t_start = t_start
+        self.t_stop = t_stop
+        self.num_bins = num_bins
+        self.binsize = binsize
+        self.matrix_columns = num_bins
+        self.matrix_rows = len(offsets) - 1
+        self._mat_u = None
+        self._cache = {}
+        self._check_init_params(binsize, num_bins, self.t_start, self.t_stop)
+        self._check_consistency(None, self.binsize, self.num_bins,
+                                self.t_start, self.t_stop)
+        rows, bins = self._bin_times(times, offsets, units)
+        self._sparse_mat_u = _bins_to_csr(
+            rows, bins, shape=(self.matrix_rows, self.matrix_columns),
+            compact=compact)
+        return self
+
+    @classmethod
+    def _from_sparse_array(cls, sparse_mat, binsize, t_start, lst_input=None,
+                           compact=False):
+        """
+        Creates a binned spike train from an already binned sparse matrix,
+        whose columns are the bins of width `binsize` starting at `t_start`.
+
+        Parameters
+        ----------
+        sparse_mat : scipy.sparse.csr_matrix
+            Sparse matrix with the spike counts.
+        binsize : quantities.Quantity
+            Width of each time bin.
+        t_start : quantities.Quantity
+            Time of the first bin.
+        lst_input : list of neo.SpikeTrain or None
+            The spike trains the matrix was binned from, if any.
+            Default is `None`
+        compact : bool
+            Whether the counts are stored with a compact data type.
+            Default is `False`
+
+        Returns
+        -------
+        BinnedSpikeTrain
+
+        """
+        self = cls.__new__(cls)
+        self.lst_input = lst_input
+        self.compact = compact
+        self.binsize = binsize
+        self.t_start = t_start
+        self.matrix_rows, self.matrix_columns = sparse_mat.shape
+        self.num_bins = self.matrix_columns
+        self.t_stop = _calc_tstop(self.num_bins, binsize, t_start)
+        self._mat_u = None
+        self._cache = {}
+        self._sparse_mat_u = sparse_mat
+        return self
 
     # =========================================================================
     # There are four cases the given parameters must fulfill
@@ -538,10 +976,12 @@ class BinnedSpikeTrain(object):
                                      self.t_stop,
                                      self.binsize,
                                      self.num_bins))
-        t_starts = [elem.t_start for elem in spiketrains]
-        t_stops = [elem.t_stop for elem in spiketrains]
-        max_tstart = max(t_starts)
-        min_tstop = min(t_stops)
+        if spiketrains is None:
+            # plain spike time arrays do not define their own time span
+            max_tstart, min_tstop = t_start, t_stop
+        else:
+            max_tstart = max([elem.t_start for elem in spiketrains])
+            min_tstop = min([elem.t_stop for elem in spiketrains])
         if max_tstart >= min_tstop:
             raise ValueError(
                 "Starting time of each spike train must be smaller than each "
@@ -581,10 +1021,11 @@ class BinnedSpikeTrain(object):
             are returned as a quantity array.
 
         """
-        return pq.Quantity(np.linspace(self.t_start.magnitude,
-                                       self.t_stop.magnitude,
+        units = self.binsize.units
+        return pq.Quantity(np.linspace(self.t_start.rescale(units).magnitude,
+                                       self.t_stop.rescale(units).magnitude,
                                        self.num_bins + 1, endpoint=True),
-                           units=self.binsize.units)
+                           units=units)
 
     @property
     def bin_centers(self):
@@ -629,18 +1070,20 @@ class BinnedSpikeTrain(object):
         Returns
         -------
         matrix: scipy.sparse.csr_matrix
-            Sparse matrix, binary, boolean version.
+            Sparse matrix, binary, boolean version. The matrix is cached,
+            i.e., repeated calls return the same object, which must not be
+            modified in place.
 
         See also
         --------
         scipy.sparse.csr_matrix
         to_bool_array
+        clear_cache
 
         """
-        # Return sparse Matrix as a copy
-        tmp_mat = self._sparse_mat_u.copy()
-        tmp_mat[tmp_mat.nonzero()] = 1
-        return tmp_mat.astype(bool)
+        if 'sparse_bool' not in self._cache:
+            self._cache['sparse_bool'] = self._sparse_mat_u.astype(bool)
+        return self._cache['sparse_bool']
 
     @property
     def spike_indices(self):
@@ -665,24 +1108,62 @@ class BinnedSpikeTrain(object):
         [0 1 3 4 5 6]
 
         """
-        spike_idx = []
-        for row in self._sparse_mat_u:
-            l = []
-            # Extract each non-zeros column index and how often it exists,
-            # i.e., how many spikes fall in this column
-            for col, count in zip(row.nonzero()[1], row.data):
-                # Append the column index for each spike
-                l.extend([col] * count)
-            spike_idx.append(l)
-        return spike_idx
+        spike_idx, offsets = self.spike_indices_flat
+        return [row.tolist() for row in np.split(spike_idx, offsets[1:-1])]
+
+    @property
+    def spike_indices_flat(self):
+        """
+        The indices of :attr:`spike_indices` of all spike trains as one flat
+        array, together with the offsets of each spike train.
+
+        The spike indices of the `i`-th spike train (i.e., row of the binned
+        matrix) are `spike_idx[offsets[i]:offsets[i + 1]]`. Both arrays are
+        computed directly from the sparse matrix and cached, so they must not
+        be modified in place.
+
+        Returns
+        -------
+        spike_idx : np.ndarray
+            Index into the binned matrix of each spike, sorted by spike train
+            and bin.
+        offsets : np.ndarray
+            Array of length :attr:`matrix_rows` + 1 delimiting the spike
+            trains in `spike_idx`.
+
+        Examples
+        --------
+        >>> import elephant.conversion as conv
+        >>> import neo as n
+        >>> import quantities as pq
+        >>> st = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+        >>> x = conv.BinnedSpikeTrain([st, st], num_bins=10, binsize=1 * pq.s, t_start=0 * pq.s)
+        >>> spike_idx, offsets = x.spike_indices_flat
+        >>> print(spike_idx)
+        [0 0 1 3 4 5 6 0 0 1 3 4 5 6]
+        >>> print(offsets)
+        [ 0  7 14]
 
-    def to_bool_array(self):
+        """
+        if 'spike_indices' not in self._cache:
+            spmat = self._sparse_mat_u
+            if not spmat.has_sorted_indices:
+                spmat = spmat.sorted_indices()
+            # repeat each filled bin as often as spikes fall into it
+            spike_idx = np.repeat(spmat.indices, spmat.data)
+            offsets = np.r_[0, np.cumsum(spmat.data)][spmat.indptr]
+            self._cache['spike_indices'] = spike_idx, offsets
+        return self._cache['spike_indices']
+
+    def to_bool_array(self, store_array=False):
         """
         Returns a dense matrix (`scipy.sparse.csr_matrix`), which rows
         represent the number of spike trains and the columns represent the
         binned index position of a spike in a spike train.
         The matrix columns contain **True**, which indicate a spike and
         **False** for non spike.
+        If the **boolean** :attr:`store_array` is set to **True** the matrix
+        will be cached in memory and returned by subsequent calls.
 
         Returns
         -------
@@ -708,8 +1189,79 @@ class BinnedSpikeTrain(object):
         --------
         scipy.sparse.csr_matrix
         scipy.sparse.csr_matrix.toarray
+        clear_cache
+        """
+        if 'bool_array' in self._cache:
+            return self._cache['bool_array']
+        # fill the filled bins directly instead of densifying the counts
+        spmat = self._sparse_mat_u
+        bool_mat = np.zeros(spmat.shape, dtype=bool)
+        rows = np.repeat(np.arange(spmat.shape[0]), np.diff(spmat.indptr))
+        bool_mat[rows, spmat.indices] = spmat.data != 0
+        if store_array:
+            self._cache['bool_array'] = bool_mat
+        return bool_mat
+
+    def to_packed_bool_array(self):
+        """
+        Returns the **boolean** matrix in a bit-packed representation, where
+        each byte holds 8 consecutive bins of a spike train.
+
+        The layout is the same as `np.packbits(self.to_bool_array(), axis=1)`,
+        but the packed matrix is built directly from the sparse matrix, so it
+        takes 8 times less memory than the boolean matrix and no dense
+        intermediate matrix is created. The last byte of each row is padded
+        with zeros.
+
+        Returns
+        -------
+        packed matrix : numpy.ndarray of numpy.uint8
+            Matrix of shape `(matrix_rows, ceil(num_bins / 8))`. The matrix
+            is cached, so it must not be modified in place.
+
+        Examples
+        --------
+        >>> import elephant.conversion as conv
+        >>> import neo as n
+        >>> import quantities as pq
+        >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+        >>> x = conv.BinnedSpikeTrain(a, num_bins=10, binsize=1 * pq.s, t_start=0 * pq.s)
+        >>> print(x.to_packed_bool_array())
+        [[222   0]]
+
+        See also
+        --------
+        numpy.packbits
+        to_bool_array
+
+        """
+        if 'packed_bool' not in self._cache:
+            self._cache['packed_bool'] = self._pack_bool_array()
+        return self._cache['packed_bool']
+
+    def _pack_bool_array(self):
+        """
+        Builds the bit-packed boolean matrix from the sparse matrix, see
+        `to_packed_bool_array()`.
+
         """
-        return abs(scipy.sign(self.to_array())).astype(bool)
+        spmat = self._sparse_mat_u
+        if not spmat.has_sorted_indices:
+            spmat = spmat.sorted_indices()
+        num_bytes = (spmat.shape[1] + 7) // 8
+        packed = np.zeros((spmat.shape[0], num_bytes), dtype=np.uint8)
+        rows = np.repeat(np.arange(spmat.shape[0]), np.diff(spmat.indptr))
+        mask = spmat.data != 0
+        rows, cols = rows[mask], spmat.indices[mask]
+        if len(cols) == 0:
+            return packed
+        bits = np.left_shift(1, 7 - cols % 8)
+        # the entries of a CSR matrix are sorted by row and column, therefore
+        # all bits belonging to the same byte are consecutive
+        byte_idx = rows * num_bytes + cols // 8
+        starts = np.flatnonzero(np.r_[True, byte_idx[1:] != byte_idx[:-1]])
+        packed.flat[byte_idx[starts]] = np.add.reduceat(bits, starts)
+        return packed
 
     def to_array(self, store_array=False):
         """
@@ -769,46 +1321,1092 @@ class BinnedSpikeTrain(object):
             del self._mat_u
             self._mat_u = None
 
-    def _convert_to_binned(self, spiketrains):
+    def clear_cache(self):
         """
-        Converts neo.core.SpikeTrain objects to a sparse matrix
-        (`scipy.sparse.csr_matrix`), which contains the binned times.
+        Removes all cached views of the binned spike trains from memory, i.e.
+        the boolean, bit-packed and stored dense matrices and the spike
+        indices. They are recomputed on the next access.
+
+        """
+        self._cache.clear()
+        self.remove_stored_array()
+
+    def _sparse_csc_array(self):
+        """
+        Returns the sparse matrix in the compressed sparse column format, in
+        which the data of consecutive bins is contiguous. The matrix is
+        cached.
+
+        """
+        if 'csc' not in self._cache:
+            self._cache['csc'] = self._sparse_mat_u.tocsc()
+        return self._cache['csc']
+
+    def time_slice(self, t_start=None, t_stop=None):
+        """
+        Returns a view of the bins between `t_start` and `t_stop`, which
+        shares the sparse data of this binned spike train.
+
+        Only bins lying completely within `[t_start, t_stop]` are part of the
+        view. No spike train is binned again and no spike data is copied, so
+        creating many windows, e.g. in sliding window analyses, is cheap.
 
         Parameters
         ----------
-        spiketrains : neo.SpikeTrain object or list of SpikeTrain objects
-           The binned time array :attr:`spike_indices` is calculated from a
-           SpikeTrain object or from a list of SpikeTrain objects.
+        t_start : quantities.Quantity or None
+            Start time of the window. If None, :attr:`t_start` is used.
+            Default is `None`
+        t_stop : quantities.Quantity or None
+            Stop time of the window. If None, :attr:`t_stop` is used.
+            Default is `None`
+
+        Returns
+        -------
+        BinnedSpikeTrainView
+            The bins of the window.
+
+        Examples
+        --------
+        >>> import elephant.conversion as conv
+        >>> import neo as n
+        >>> import quantities as pq
+        >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+        >>> x = conv.BinnedSpikeTrain(a, num_bins=10, binsize=1 * pq.s, t_start=0 * pq.s)
+        >>> window = x.time_slice(2 * pq.s, 6.5 * pq.s)
+        >>> print(window.bin_edges)
+        [2. 3. 4. 5. 6.] s
+        >>> print(window.to_array())
+        [[0 1 1 1]]
+
+        See also
+        --------
+        BinnedSpikeTrainView
 
         """
-        from distutils.version import StrictVersion
-        # column
-        filled = []
-        # row
-        indices = []
-        # data
-        counts = []
-        # to be downwards compatible compare numpy versions, if the used
-        # version is smaller than v1.9 use different functions
-        smaller_version = StrictVersion(np.__version__) < '1.9.0'
-        for idx, elem in enumerate(spiketrains):
-            ev = elem.view(pq.Quantity)
-            scale = np.array(((ev - self.t_start).rescale(
-                self.binsize.units) / self.binsize).magnitude, dtype=int)
-            l = np.logical_and(ev >= self.t_start.rescale(self.binsize.units),
-                               ev <= self.t_stop.rescale(self.binsize.units))
-            filled_tmp = scale[l]
-            filled_tmp = filled_tmp[filled_tmp < self.num_bins]
-            if smaller_version:
-                f = np.unique(filled_tmp)
-                c = np.bincount(f.searchsorted(filled_tmp))
-            else:
-                f, c = np.unique(filled_tmp, return_counts=True)
-            filled.extend(f)
-            counts.extend(c)
-            indices.extend([idx] * len(f))
-        csr_matrix = sps.csr_matrix((counts, (indices, filled)),
-                                    shape=(self.matrix_rows,
-                                           self.matrix_columns),
-                                    dtype=int)
-        self._sparse_mat_u = csr_matrix
+        start = 0 if t_start is None else self._time_to_bin(t_start, np.ceil)
+        stop = self.num_bins if t_stop is None else \
+            self._time_to_bin(t_stop, np.floor)
+        start = min(max(start, 0), self.num_bins)
+        stop = min(max(stop, start), self.num_bins)
+        return BinnedSpikeTrainView(self, start, stop)
+
+    def _time_to_bin(self, time, rounding):
+        """
+        Converts a time to a bin edge index, rounding with `rounding` unless
+        the time is (almost) exactly a bin edge.
+
+        """
+        position = ((time - self.t_start) / self.binsize).simplified.magnitude
+        if np.isclose(position, np.round(position)):
+            return int(np.round(position))
+        return int(rounding(position))
+
+    def __getitem__(self, key):
+        """
+        Returns a view of a range of bins as :class:`BinnedSpikeTrainView`,
+        e.g. `x[:, 10:20]` for the bins 10 to 19 of all spike trains.
+
+        Raises
+        ------
+        IndexError :
+            If not all spike trains or not a contiguous range of bins is
+            selected.
+
+        """
+        if not isinstance(key, tuple) or len(key) != 2 or \
+                not isinstance(key[0], slice) or key[0] != slice(None) or \
+                not isinstance(key[1], slice):
+            raise IndexError("Only views of a range of bins of all spike "
+                             "trains are supported, e.g. x[:, 10:20]")
+        start, stop, step = key[1].indices(self.num_bins)
+        if step != 1:
+            raise IndexError("The range of bins must be contiguous")
+        return BinnedSpikeTrainView(self, start, max(stop, start))
+
+    def rebin(self, factor):
+        """
+        Derives a coarser binned spike train by summing each `factor`
+        adjacent bins of the sparse matrix, without binning the spike trains
+        again.
+
+        The result has a bin size of `factor * binsize` and the same
+        `t_start`. Trailing bins which do not fill a complete coarse bin are
+        dropped, as when binning the spike trains with the coarse bin size.
+
+        Parameters
+        ----------
+        factor : int
+            Number of bins summed into one coarse bin.
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            The coarser binned spike train.
+
+        Raises
+        ------
+        TypeError :
+            If `factor` is not an integer.
+        ValueError :
+            If `factor` is smaller than 1.
+
+        Examples
+        --------
+        >>> import elephant.conversion as conv
+        >>> import neo as n
+        >>> import quantities as pq
+        >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+        >>> x = conv.BinnedSpikeTrain(a, num_bins=10, binsize=1 * pq.s, t_start=0 * pq.s)
+        >>> print(x.rebin(3).to_array())
+        [[3 3 1]]
+
+        See also
+        --------
+        BinnedSpikeTrainPyramid
+
+        """
+        if not isinstance(factor, (int, np.integer)):
+            raise TypeError("factor is not an integer!")
+        if factor < 1:
+            raise ValueError("factor (%d) must be at least 1" % factor)
+        spmat = self._sparse_mat_u
+        num_bins = self.num_bins // factor
+        rows = np.repeat(np.arange(spmat.shape[0]), np.diff(spmat.indptr))
+        cols = spmat.indices // factor
+        mask = cols < num_bins
+        counts = spmat.data[mask].astype(np.int64)
+        # duplicate entries of the same coarse bin are summed up
+        coarse_mat = sps.csr_matrix(
+            (counts, (rows[mask], cols[mask])),
+            shape=(self.matrix_rows, num_bins))
+        coarse_mat.sum_duplicates()
+        if self.compact:
+            dtype = np.min_scalar_type(
+                coarse_mat.data.max() if coarse_mat.nnz else 0)
+        else:
+            dtype = spmat.dtype
+        return BinnedSpikeTrain._from_sparse_array(
+            coarse_mat.astype(dtype), binsize=self.binsize * factor,
+            t_start=self.t_start, lst_input=self.lst_input,
+            compact=self.compact)
+
+    def save(self, filename):
+        """
+        Stores the binned spike trains, i.e. the sparse matrix and the
+        binning parameters, in an uncompressed `.npz` file.
+
+        The input spike trains (:attr:`lst_input`) are not stored. The file
+        can be opened with :meth:`load`, also memory-mapped by several
+        processes at once.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file. The extension `.npz` is appended if missing.
+
+        See also
+        --------
+        load
+
+        """
+        spmat = self._sparse_mat_u
+        units = self.binsize.units
+        np.savez(filename, data=spmat.data, indices=spmat.indices,
+                 indptr=spmat.indptr, shape=np.array(spmat.shape),
+                 units=np.array(units.dimensionality.string),
+                 binsize=float(self.binsize.magnitude),
+                 t_start=float(self.t_start.rescale(units).magnitude),
+                 t_stop=float(self.t_stop.rescale(units).magnitude),
+                 compact=bool(self.compact))
+
+    @classmethod
+    def load(cls, filename, mmap_mode=None):
+        """
+        Loads binned spike trains stored with :meth:`save`.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the `.npz` file.
+        mmap_mode : {None, 'r', 'r+', 'c'}
+            If not None, the arrays of the sparse matrix are memory-mapped
+            with this mode instead of read into memory, so that several
+            processes share the loaded data, see `numpy.memmap`.
+            Default is `None`
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            The binned spike trains, without :attr:`lst_input`.
+
+        Examples
+        --------
+        >>> import elephant.conversion as conv
+        >>> import neo as n
+        >>> import quantities as pq
+        >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+        >>> conv.BinnedSpikeTrain(a, binsize=1 * pq.s).save('binned.npz')
+        >>> x = conv.BinnedSpikeTrain.load('binned.npz', mmap_mode='r')
+        >>> print(x.to_array())
+        [[2 1 0 1 1 1 1 0 0 0]]
+
+        """
+        with np.load(filename) as f:
+            metadata = dict((key, f[key]) for key in f.files
+                            if key not in ('data', 'indices', 'indptr'))
+            if mmap_mode is None:
+                arrays = [f[key] for key in ('data', 'indices', 'indptr')]
+        if mmap_mode is not None:
+            arrays = [_memmap_npz_member(filename, key, mmap_mode)
+                      for key in ('data', 'indices', 'indptr')]
+        units = pq.Quantity(1, str(metadata['units'])).units
+        sparse_mat = sps.csr_matrix(tuple(arrays),
+                                    shape=tuple(metadata['shape']),
+                                    copy=False)
+        self = cls._from_sparse_array(
+            sparse_mat, binsize=float(metadata['binsize']) * units,
+            t_start=float(metadata['t_start']) * units,
+            compact=bool(metadata['compact']))
+        self.t_stop = float(metadata['t_stop']) * units
+        return self
+
+    def _convert_to_binned(self, spiketrains):
+        """
+        Converts neo.core.SpikeTrain objects to a sparse matrix
+        (`scipy.sparse.csr_matrix`), which contains the binned times.
+
+        The CSR arrays are built directly from the bin indices of all spikes,
+        which are computed in a single vectorized pass.
+
+        Parameters
+        ----------
+        spiketrains : neo.SpikeTrain object or list of SpikeTrain objects
+           The binned time array :attr:`spike_indices` is calculated from a
+           SpikeTrain object or from a list of SpikeTrain objects.
+
+        """
+        rows, bins = self._bin_spiketrains(spiketrains)
+        self._sparse_mat_u = _bins_to_csr(
+            rows, bins, shape=(self.matrix_rows, self.matrix_columns),
+            compact=self.compact)
+
+    def _bin_spiketrains(self, spiketrains):
+        """
+        Computes the row and bin index of each spike of a list of
+        neo.core.SpikeTrain objects.
+
+        The spike times of all spike trains sharing the same units are
+        concatenated and binned in a single vectorized pass.
+
+        Returns
+        -------
+        rows : np.ndarray
+            Index of the spike train each binned spike belongs to.
+        bins : np.ndarray
+            Bin index of each binned spike.
+
+        """
+        # group the spike trains by units, so that each group is binned at
+        # once with the same conversion of t_start, t_stop and binsize
+        groups = {}
+        for idx, elem in enumerate(spiketrains):
+            groups.setdefault(elem.units.dimensionality.string,
+                              []).append(idx)
+        rows, bins = [], []
+        for group in groups.values():
+            times = [spiketrains[idx].magnitude for idx in group]
+            offsets = np.r_[0, np.cumsum([len(st) for st in times])]
+            group_rows, group_bins = self._bin_times(
+                np.concatenate(times) if times else np.array([]), offsets,
+                spiketrains[group[0]].units)
+            rows.append(np.asarray(group, dtype=int)[group_rows])
+            bins.append(group_bins)
+        rows = np.concatenate(rows) if rows else np.array([], dtype=int)
+        bins = np.concatenate(bins) if bins else np.array([], dtype=int)
+        return rows, bins
+
+    def _bin_times(self, times, offsets, units):
+        """
+        Computes the row and bin index of each spike of several spike trains
+        given as a flat array of spike times in common `units`.
+
+        See also
+        --------
+        _bin_spike_times
+
+        """
+        return _bin_spike_times(
+            times, offsets,
+            t_start=self.t_start.rescale(units).magnitude,
+            t_stop=self.t_stop.rescale(units).magnitude,
+            binsize=self.binsize.magnitude,
+            num_bins=self.num_bins,
+            scale=units.rescale(self.binsize.units).magnitude)
+
+
+class BinnedSpikeTrainView(BinnedSpikeTrain):
+    """
+    Window of consecutive bins of a binned spike train, which shares the
+    sparse data of the binned spike train it is taken from.
+
+    The view holds slices of the `data` and `indices` arrays of the
+    compressed sparse column matrix of its parent, so creating it copies no
+    spike data. Its :attr:`t_start`, :attr:`t_stop`, :attr:`num_bins` and
+    :attr:`bin_edges` describe the window. All methods of
+    :class:`BinnedSpikeTrain` are available; methods that need the row
+    format convert the window of the matrix on first use.
+
+    Views are created with :meth:`BinnedSpikeTrain.time_slice` or by slicing
+    the bins, e.g. `x[:, 10:20]`.
+
+    Parameters
+    ----------
+    parent : BinnedSpikeTrain
+        The binned spike train to take the window from.
+    start : int
+        Index of the first bin of the window.
+    stop : int
+        Index after the last bin of the window.
+
+    """
+
+    def __init__(self, parent, start, stop):
+        if isinstance(parent, BinnedSpikeTrainView):
+            # views of views refer directly to the original data
+            start += parent.bin_offset
+            stop += parent.bin_offset
+            parent = parent.parent
+        self.parent = parent
+        self.bin_offset = start
+        self.lst_input = None
+        self.compact = parent.compact
+        self.binsize = parent.binsize
+        self.t_start = _calc_tstop(start, parent.binsize, parent.t_start)
+        self.t_stop = _calc_tstop(stop, parent.binsize, parent.t_start)
+        self.num_bins = stop - start
+        self.matrix_columns = self.num_bins
+        self.matrix_rows = parent.matrix_rows
+        self._mat_u = None
+        self._cache = {}
+        csc = parent._sparse_csc_array()
+        first, last = csc.indptr[start], csc.indptr[stop]
+        # the arrays are set directly, since the constructor of csc_matrix
+        # copies slices that are less than half of their base array
+        self._window = sps.csc_matrix((self.matrix_rows, self.num_bins),
+                                      dtype=csc.dtype)
+        self._window.data = csc.data[first:last]
+        self._window.indices = csc.indices[first:last]
+        self._window.indptr = csc.indptr[start:stop + 1] - first
+
+    def _sparse_csc_array(self):
+        return self._window
+
+    @property
+    def _sparse_mat_u(self):
+        """
+        The window of the sparse matrix in the row format, converted on
+        first use.
+
+        """
+        if 'csr' not in self._cache:
+            self._cache['csr'] = self._window.tocsr()
+        return self._cache['csr']
+
+
+class BinnedSpikeTrainPyramid(object):
+    """
+    Multi-resolution set of binned spike trains, which are derived from one
+    finely binned spike train by :meth:`BinnedSpikeTrain.rebin` and cached.
+
+    Parameter sweeps over bin sizes that are integer multiples of the bin
+    size of the base binned spike train reuse the cached resolutions instead
+    of binning the spike trains again. Each requested resolution is derived
+    from the coarsest cached resolution whose bin size divides it.
+
+    Parameters
+    ----------
+    binned_st : BinnedSpikeTrain
+        The binned spike train at the finest resolution.
+
+    Examples
+    --------
+    >>> import elephant.conversion as conv
+    >>> import neo as n
+    >>> import quantities as pq
+    >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+    >>> pyramid = conv.BinnedSpikeTrainPyramid(
+    ...     conv.BinnedSpikeTrain(a, binsize=500 * pq.ms))
+    >>> for binsize in [1, 2, 5] * pq.s:
+    ...     print(pyramid.get(binsize).to_array())
+    [[2 1 0 1 1 1 1 0 0 0]]
+    [[3 1 2 1 0]]
+    [[5 2]]
+    >>> print(pyramid.factors)
+    [1, 2, 4, 10]
+
+    """
+
+    def __init__(self, binned_st):
+        self.base = binned_st
+        self._levels = {1: binned_st}
+
+    @property
+    def factors(self):
+        """
+        The sorted factors of all cached resolutions relative to the bin size
+        of the base binned spike train.
+
+        """
+        return sorted(self._levels)
+
+    def rebin(self, factor):
+        """
+        Returns the binned spike train with `factor` times the bin size of the
+        base binned spike train, computing and caching it if necessary.
+
+        Parameters
+        ----------
+        factor : int
+            Bin size relative to the bin size of the base binned spike train.
+
+        Returns
+        -------
+        BinnedSpikeTrain
+
+        """
+        if factor not in self._levels:
+            # start from the coarsest cached resolution dividing factor
+            source = max(level for level in self._levels
+                         if factor % level == 0)
+            self._levels[factor] = self._levels[source].rebin(
+                factor // source)
+        return self._levels[factor]
+
+    def get(self, binsize):
+        """
+        Returns the binned spike train with the given bin size, see
+        :meth:`rebin`.
+
+        Parameters
+        ----------
+        binsize : quantities.Quantity
+            Bin size, which must be an integer multiple of the bin size of
+            the base binned spike train.
+
+        Returns
+        -------
+        BinnedSpikeTrain
+
+        Raises
+        ------
+        ValueError :
+            If `binsize` is not an integer multiple of the base bin size.
+
+        """
+        ratio = (binsize / self.base.binsize).simplified.magnitude
+        factor = int(np.round(ratio))
+        if factor < 1 or not np.isclose(ratio, factor):
+            raise ValueError(
+                "binsize (%s) is not an integer multiple of the bin size of "
+                "the base binned spike train (%s)" % (
+                    binsize, self.base.binsize))
+        return self.rebin(factor)
+
+    def clear(self):
+        """
+        Removes all cached resolutions except the base binned spike train.
+
+        """
+        self._levels = {1: self.base}
+
+
+class TrialBinnedSpikeTrain(object):
+    """
+    Binned spike trains of several trials, i.e. a stack of binned matrices
+    with the axes trials x spike trains x bins.
+
+    The spike trains of all trials are binned in a single vectorized pass
+    into one sparse matrix, whose rows are ordered trial by trial. Per-trial
+    and trial-summed binned spike trains as well as dense and bit-packed 3D
+    arrays are derived from it, so trial-based analyses can share one
+    binning of the data.
+
+    Parameters
+    ----------
+    trials : list of lists of neo.SpikeTrain
+        Spike trains of each trial. All trials must contain the same number
+        of spike trains (e.g. units), in the same order.
+    binsize, num_bins, t_start, t_stop, compact
+        Binning parameters common to all trials, see
+        :class:`BinnedSpikeTrain`.
+
+    Attributes
+    ----------
+    n_trials : int
+        Number of trials.
+    n_units : int
+        Number of spike trains per trial.
+    binned : BinnedSpikeTrain
+        The binned spike trains of all trials, with row
+        `trial * n_units + unit`.
+
+    Raises
+    ------
+    ValueError :
+        If no trial is given or the trials contain different numbers of
+        spike trains.
+
+    Examples
+    --------
+    >>> import elephant.conversion as conv
+    >>> import neo as n
+    >>> import quantities as pq
+    >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1] * pq.s, t_stop=5.0 * pq.s)
+    >>> b = n.SpikeTrain([0.1, 2.2, 4.3] * pq.s, t_stop=5.0 * pq.s)
+    >>> x = conv.TrialBinnedSpikeTrain([[a, b], [b, b]], binsize=1 * pq.s)
+    >>> print(x.to_array().shape)
+    (2, 2, 5)
+    >>> print(x.trial_sum().to_array())
+    [[3 1 1 1 1]
+     [2 0 2 0 2]]
+
+    """
+
+    def __init__(self, trials, binsize=None, num_bins=None, t_start=None,
+                 t_stop=None, compact=False):
+        if len(trials) == 0:
+            raise ValueError("At least one trial must be given")
+        self.n_trials = len(trials)
+        self.n_units = len(trials[0])
+        if not all([len(trial) == self.n_units for trial in trials]):
+            raise ValueError("All trials must contain the same number of "
+                             "spike trains")
+        self.binned = BinnedSpikeTrain(
+            [st for trial in trials for st in trial], binsize=binsize,
+            num_bins=num_bins, t_start=t_start, t_stop=t_stop,
+            compact=compact)
+
+    @property
+    def t_start(self):
+        return self.binned.t_start
+
+    @property
+    def t_stop(self):
+        return self.binned.t_stop
+
+    @property
+    def binsize(self):
+        return self.binned.binsize
+
+    @property
+    def num_bins(self):
+        return self.binned.num_bins
+
+    @property
+    def bin_edges(self):
+        return self.binned.bin_edges
+
+    @property
+    def shape(self):
+        """
+        The shape `(n_trials, n_units, num_bins)` of the stacked matrices.
+
+        """
+        return self.n_trials, self.n_units, self.num_bins
+
+    def trial(self, index):
+        """
+        Returns the binned spike trains of one trial.
+
+        Parameters
+        ----------
+        index : int
+            Index of the trial.
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            The binned spike trains of the trial.
+
+        """
+        if not -self.n_trials <= index < self.n_trials:
+            raise IndexError("trial index %d out of range" % index)
+        index %= self.n_trials
+        rows = slice(index * self.n_units, (index + 1) * self.n_units)
+        return BinnedSpikeTrain._from_sparse_array(
+            self.binned.to_sparse_array()[rows], binsize=self.binsize,
+            t_start=self.t_start, compact=self.binned.compact)
+
+    def time_slice(self, t_start=None, t_stop=None):
+        """
+        Returns the bins of all trials within `[t_start, t_stop]`, sharing
+        the underlying sparse matrix, see :meth:`BinnedSpikeTrain.time_slice`.
+
+        Parameters
+        ----------
+        t_start, t_stop : pq.Quantity, optional
+            Start and stop time of the window. Default is the start and stop
+            of the binned data.
+
+        Returns
+        -------
+        TrialBinnedSpikeTrain
+            The trial-stacked binned spike trains of the window.
+
+        """
+        window = TrialBinnedSpikeTrain.__new__(TrialBinnedSpikeTrain)
+        window.n_trials = self.n_trials
+        window.n_units = self.n_units
+        window.binned = self.binned.time_slice(t_start, t_stop)
+        return window
+
+    def trial_sum(self, binary=False):
+        """
+        Returns the binned spike trains summed over all trials, e.g. to
+        compute a PSTH per spike train.
+
+        Parameters
+        ----------
+        binary : bool
+            If True, the binary spike trains are summed, i.e., the number of
+            trials with at least one spike in a bin is counted.
+            Default is `False`
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            Binned spike trains with one row per unit.
+
+        """
+        if binary:
+            spmat = self.binned.to_sparse_bool_array().astype(np.int64)
+        else:
+            spmat = self.binned.to_sparse_array().astype(np.int64)
+        # the sum over trials is a product with stacked identity matrices
+        selector = sps.hstack([sps.identity(self.n_units, dtype=np.int64,
+                                            format='csr')] * self.n_trials,
+                              format='csr')
+        return BinnedSpikeTrain._from_sparse_array(
+            selector.dot(spmat).tocsr(), binsize=self.binsize,
+            t_start=self.t_start)
+
+    def to_array(self):
+        """
+        Returns the dense spike counts with shape `(n_trials, n_units,
+        num_bins)`.
+
+        """
+        return self.binned.to_array().reshape(self.shape)
+
+    def to_bool_array(self):
+        """
+        Returns the dense boolean matrices with shape `(n_trials, n_units,
+        num_bins)`, **True** indicating at least one spike in a bin.
+
+        """
+        return self.binned.to_bool_array().reshape(self.shape)
+
+    def to_packed_bool_array(self):
+        """
+        Returns the bit-packed boolean matrices with shape `(n_trials,
+        n_units, ceil(num_bins / 8))`, see
+        :meth:`BinnedSpikeTrain.to_packed_bool_array`.
+
+        """
+        packed = self.binned.to_packed_bool_array()
+        return packed.reshape(self.n_trials, self.n_units, -1)
+
+
+def _chunk_filename(directory, chunk, name):
+    """
+    Returns the path of the `.npy` file storing the array `name` of a chunk
+    of a :class:`MemmapBinnedSpikeTrain`.
+    """
+    return os.path.join(directory, 'chunk%05d_%s.npy' % (chunk, name))
+
+
+class MemmapBinnedSpikeTrain(BinnedSpikeTrain):
+    """
+    Binned spike train whose sparse matrix is stored on disk in
+    memory-mapped `.npy` files, for recordings which are too long to be
+    analyzed with a binned matrix held in memory.
+
+    The matrix is split into chunks of :attr:`chunk_size` consecutive bins
+    (columns). Each chunk is stored in the compressed sparse column (CSC)
+    format, i.e., as three `.npy` files with the `data`, `indices` and
+    `indptr` arrays, which are memory-mapped when the binned spike train is
+    opened. :meth:`iter_chunks` iterates over the chunks, such that only one
+    chunk is loaded into memory at a time.
+    `elephant.statistics.time_histogram`,
+    `elephant.statistics.complexity_pdf` and
+    `elephant.spike_train_correlation.covariance` (and `corrcoef`) process
+    a `MemmapBinnedSpikeTrain` chunk by chunk.
+
+    All other methods of :class:`BinnedSpikeTrain` are available, too, but
+    they assemble the complete sparse matrix in memory.
+
+    Use :meth:`create` to bin spike trains into a new directory, and the
+    constructor to open an existing one.
+
+    Parameters
+    ----------
+    directory : str
+        Directory containing a binned spike train written by :meth:`create`.
+    mmap_mode : str
+        Memory-map mode used to open the `.npy` files, see `numpy.load`.
+        Default is `'r'`
+
+    Examples
+    --------
+    >>> import elephant.conversion as conv
+    >>> import neo as n
+    >>> import quantities as pq
+    >>> a = n.SpikeTrain([0.5, 0.7, 1.2, 3.1, 4.3, 5.5, 6.7] * pq.s, t_stop=10.0 * pq.s)
+    >>> x = conv.MemmapBinnedSpikeTrain.create('binned', a, binsize=1 * pq.s, chunk_size=4)
+    >>> for start, chunk in x.iter_chunks():
+    ...     print(start, chunk.toarray())
+    0 [[2 1 0 1]]
+    4 [[1 1 1 0]]
+    8 [[0 0]]
+
+    """
+    _metadata_file = 'metadata.json'
+
+    def __init__(self, directory, mmap_mode='r'):
+        """
+        Opens a binned spike train stored on disk.
+
+        """
+        with open(os.path.join(directory, self._metadata_file)) as f:
+            metadata = json.load(f)
+        units = pq.Quantity(1, metadata['units']).units
+        self.directory = directory
+        self.lst_input = None
+        self.compact = metadata['compact']
+        self.binsize = metadata['binsize'] * units
+        self.t_start = metadata['t_start'] * units
+        self.t_stop = metadata['t_stop'] * units
+        self.num_bins = metadata['num_bins']
+        self.matrix_columns = self.num_bins
+        self.matrix_rows = metadata['num_rows']
+        self.chunk_size = metadata['chunk_size']
+        self._mat_u = None
+        self._cache = {}
+        num_chunks = -(-self.num_bins // self.chunk_size)
+        self._chunks = [
+            tuple(np.load(_chunk_filename(directory, chunk, name),
+                          mmap_mode=mmap_mode)
+                  for name in ('data', 'indices', 'indptr'))
+            for chunk in range(num_chunks)]
+
+    @classmethod
+    def create(cls, directory, spiketrains, binsize=None, num_bins=None,
+               t_start=None, t_stop=None, chunk_size=100000, compact=False):
+        """
+        Bins spike trains and stores the binned spike trains on disk.
+
+        The binning parameters are handled as in :class:`BinnedSpikeTrain`.
+        The spikes are binned in a single pass and written chunk by chunk,
+        without building the complete sparse matrix.
+
+        Parameters
+        ----------
+        directory : str
+            Directory to store the binned spike train in. It is created if
+            it does not exist.
+        spiketrains : List of `neo.SpikeTrain` or a `neo.SpikeTrain` object
+            Spiketrain(s) to be binned.
+        binsize, num_bins, t_start, t_stop, compact
+            See :class:`BinnedSpikeTrain`.
+        chunk_size : int
+            Number of bins per chunk.
+            Default is `100000`
+
+        Returns
+        -------
+        MemmapBinnedSpikeTrain
+            The binned spike train, opened from `directory`.
+
+        """
+        self = cls.__new__(cls)
+        spiketrains = self._init_binning(spiketrains, binsize, num_bins,
+                                         t_start, t_stop)
+        rows, bins = self._bin_spiketrains(spiketrains)
+        # group the spikes by chunk, keeping their order within each chunk
+        chunks = bins // chunk_size
+        order = np.argsort(chunks, kind='mergesort')
+        rows, bins, chunks = rows[order], bins[order], chunks[order]
+        num_chunks = -(-self.num_bins // chunk_size)
+        borders = np.searchsorted(chunks, np.arange(num_chunks + 1))
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for chunk in range(num_chunks):
+            start = chunk * chunk_size
+            stop = min(start + chunk_size, self.num_bins)
+            sl = slice(borders[chunk], borders[chunk + 1])
+            # the CSR matrix of the transposed chunk holds the CSC arrays of
+            # the chunk
+            chunk_mat = _bins_to_csr(bins[sl] - start, rows[sl],
+                                     shape=(stop - start, self.matrix_rows),
+                                     compact=compact)
+            for name in ('data', 'indices', 'indptr'):
+                np.save(_chunk_filename(directory, chunk, name),
+                        getattr(chunk_mat, name))
+        units = self.binsize.units
+        metadata = {
+            'units': units.dimensionality.string,
+            'binsize': float(self.binsize.magnitude),
+            't_start': float(self.t_start.rescale(units).magnitude),
+            't_stop': float(self.t_stop.rescale(units).magnitude),
+            'num_bins': int(self.num_bins),
+            'num_rows': int(self.matrix_rows),
+            'chunk_size': int(chunk_size),
+            'compact': bool(compact)}
+        with open(os.path.join(directory, cls._metadata_file), 'w') as f:
+            json.dump(metadata, f)
+        return cls(directory)
+
+    @property
+    def _sparse_mat_u(self):
+        """
+        The complete sparse matrix, assembled from all chunks.
+
+        """
+        chunks = [chunk for _, chunk in self.iter_chunks()]
+        if not chunks:
+            return sps.csr_matrix((self.matrix_rows, 0), dtype=int)
+        return sps.hstack(chunks, format='csr')
+
+    def iter_chunks(self):
+        """
+        Iterates over the chunks of consecutive bins of the binned spike
+        trains, loading one chunk at a time from disk.
+
+        Yields
+        ------
+        start : int
+            Index of the first bin of the chunk.
+        chunk : scipy.sparse.csc_matrix
+            Sparse matrix of shape `(matrix_rows, number of bins of the
+            chunk)` with the spike counts of the chunk.
+
+        """
+        for idx, (data, indices, indptr) in enumerate(self._chunks):
+            start = idx * self.chunk_size
+            stop = min(start + self.chunk_size, self.num_bins)
+            yield start, sps.csc_matrix((data, indices, indptr),
+                                        shape=(self.matrix_rows,
+                                               stop - start))
+
+
+def _reserve(array, size):
+    """
+    Returns `array`, or a copy of it with at least twice its capacity if it
+    cannot hold `size` elements, so that appending is amortized linear.
+
+    """
+    if size <= len(array):
+        return array
+    grown = np.empty(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class AppendableBinnedSpikeTrain(BinnedSpikeTrain):
+    """
+    Binned spike train which grows in time, e.g. to bin spikes received in
+    blocks during a closed-loop experiment.
+
+    Each call of :meth:`append` adds the spikes of a new block of time and
+    extends :attr:`t_stop` to the end of the last complete bin. The spike
+    counts are stored in the compressed sparse column (CSC) format in
+    buffers that grow geometrically, so appending a block takes amortized
+    time proportional to the number of its spikes and bins, independent of
+    the length of the history. Spikes in the bin which is not yet complete
+    are kept back until a later block completes it.
+
+    :meth:`append` returns the newly completed bins as a
+    :class:`BinnedSpikeTrain`, from which rolling statistics can be updated.
+    `elephant.statistics.time_histogram` and
+    `elephant.statistics.complexity_pdf` process an
+    `AppendableBinnedSpikeTrain` from its column format directly. All other
+    methods of :class:`BinnedSpikeTrain` are available, too; derived
+    representations are recomputed after each append.
+
+    Parameters
+    ----------
+    num_spiketrains : int
+        Number of spike trains, i.e., rows of the binned matrix.
+    binsize : quantities.Quantity
+        Width of each time bin.
+    t_start : quantities.Quantity
+        Start time of the first bin.
+        Default is `0 s`
+
+    Raises
+    ------
+    TypeError :
+        If `binsize` or `t_start` is not a time quantity.
+    ValueError :
+        If `num_spiketrains` is smaller than 1 or `binsize` is not positive.
+
+    Examples
+    --------
+    >>> import elephant.conversion as conv
+    >>> import quantities as pq
+    >>> x = conv.AppendableBinnedSpikeTrain(1, binsize=1 * pq.s)
+    >>> print(x.append([[0.5, 0.7, 1.2] * pq.s], t_stop=2.5 * pq.s).to_array())
+    [[2 1]]
+    >>> print(x.append([[2.6, 3.1] * pq.s], t_stop=4 * pq.s).to_array())
+    [[1 1]]
+    >>> print(x.to_array(), x.t_stop)
+    [[2 1 1 1]] 4.0 s
+
+    """
+
+    def __init__(self, num_spiketrains, binsize, t_start=0 * pq.s):
+        """
+        Creates an empty binned spike train.
+
+        """
+        if not isinstance(binsize, pq.Quantity) or \
+                not isinstance(t_start, pq.Quantity):
+            raise TypeError("binsize and t_start must be quantities")
+        if num_spiketrains < 1:
+            raise ValueError("num_spiketrains must be at least 1")
+        if binsize <= 0:
+            raise ValueError("binsize must be positive")
+        self.lst_input = None
+        self.compact = False
+        self.binsize = binsize
+        self.t_start = t_start
+        self.num_bins = 0
+        self.matrix_rows = num_spiketrains
+        self.matrix_columns = 0
+        self.t_stop = _calc_tstop(0, binsize, t_start)
+        #: End time of all spikes appended so far
+        self.t_received = t_start
+        self._mat_u = None
+        self._cache = {}
+        self._nnz = 0
+        self._data = np.empty(0, dtype=int)
+        self._indices = np.empty(0, dtype=np.int32)
+        self._indptr = np.zeros(1, dtype=np.int32)
+        # row and bin index of the spikes in the bin not yet complete
+        self._pending = (np.empty(0, dtype=int), np.empty(0, dtype=int))
+
+    def append(self, spiketrains, t_stop=None):
+        """
+        Adds the spikes of a new block of time.
+
+        Parameters
+        ----------
+        spiketrains : list of neo.SpikeTrain or list of pq.Quantity
+            The spikes of each spike train received in the block, in the
+            order of the rows. Spikes after `t_stop` are ignored, as are
+            spikes at or before :attr:`t_received` once a block was appended,
+            so that blocks cut with inclusive borders (e.g. by
+            `neo.SpikeTrain.time_slice`) do not count a spike twice.
+        t_stop : quantities.Quantity or None
+            End time of the block. If None, the minimal `t_stop` of the
+            given `neo.SpikeTrain` objects is used.
+            Default is `None`
+
+        Returns
+        -------
+        BinnedSpikeTrain
+            The bins completed by the block, starting at the previous
+            :attr:`t_stop`.
+
+        Raises
+        ------
+        ValueError :
+            If the number of spike trains does not match, `t_stop` cannot be
+            determined, or `t_stop` is smaller than :attr:`t_received`.
+
+        """
+        if len(spiketrains) != self.matrix_rows:
+            raise ValueError("%d spike trains given, but %d expected"
+                             % (len(spiketrains), self.matrix_rows))
+        if t_stop is None:
+            try:
+                t_stop = min([st.t_stop for st in spiketrains])
+            except AttributeError:
+                raise ValueError("t_stop must be given for spike times "
+                                 "without t_stop")
+        if t_stop < self.t_received:
+            raise ValueError("t_stop (%s) is smaller than the end of the "
+                             "appended data (%s)" % (t_stop, self.t_received))
+        if self.t_received > self.t_start:
+            spiketrains = [st[st > self.t_received] for st in spiketrains]
+        self.t_received = t_stop
+        rows, bins = self._bin_spiketrains(spiketrains)
+        rows = np.r_[self._pending[0], rows]
+        bins = np.r_[self._pending[1], bins]
+
+        start = self.num_bins
+        stop = max(self._time_to_bin(t_stop, np.floor), start)
+        complete = bins < stop
+        self._pending = rows[~complete], bins[~complete]
+        # the CSR matrix of the transposed block holds its CSC arrays
+        block = _bins_to_csr(bins[complete] - start, rows[complete],
+                             shape=(stop - start, self.matrix_rows))
+
+        nnz = self._nnz + block.nnz
+        self._data = _reserve(self._data, nnz)
+        self._indices = _reserve(self._indices, nnz)
+        self._indptr = _reserve(self._indptr, stop + 1)
+        self._data[self._nnz:nnz] = block.data
+        self._indices[self._nnz:nnz] = block.indices
+        self._indptr[start + 1:stop + 1] = block.indptr[1:] + self._nnz
+        self._nnz = nnz
+
+        self.num_bins = self.matrix_columns = stop
+        self.t_stop = _calc_tstop(stop, self.binsize, self.t_start)
+        self.clear_cache()
+        return BinnedSpikeTrain._from_sparse_array(
+            block.T.tocsr(), binsize=self.binsize,
+            t_start=_calc_tstop(start, self.binsize, self.t_start))
+
+    def _bin_times(self, times, offsets, units):
+        """
+        Computes the row and bin index of spikes up to :attr:`t_received`,
+        including bins which are not yet complete.
+
+        """
+        return _bin_spike_times(
+            times, offsets,
+            t_start=self.t_start.rescale(units).magnitude,
+            t_stop=self.t_received.rescale(units).magnitude,
+            binsize=self.binsize.magnitude,
+            num_bins=np.inf,
+            scale=units.rescale(self.binsize.units).magnitude)
+
+    def _sparse_csc_array(self):
+        """
+        The CSC matrix of all complete bins, sharing the growable buffers.
+
+        """
+        return sps.csc_matrix(
+            (self._data[:self._nnz], self._indices[:self._nnz],
+             self._indptr[:self.num_bins + 1]),
+            shape=(self.matrix_rows, self.num_bins), copy=False)
+
+    @property
+    def _sparse_mat_u(self):
+        """
+        The sparse matrix of all complete bins in the row format.
+
+        """
+        if 'csr' not in self._cache:
+            self._cache['csr'] = self._sparse_csc_array().tocsr()
+        return self._cache['csr']
+
+    def iter_chunks(self):
+        """
+        Yields the CSC matrix of all complete bins as a single chunk, see
+        :meth:`MemmapBinnedSpikeTrain.iter_chunks`.
+
+        """
+        yield 0, self._sparse_csc_array()
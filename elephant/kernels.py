@@ -12,10 +12,16 @@ Examples of usage:
 :license: Modified BSD, see LICENSE.txt for details.
 """
 
+import collections
+
 import quantities as pq
 import numpy as np
 import scipy.special
 
+# Kernels sampled by Kernel.sample(), see _sample_key()
+_sample_cache = collections.OrderedDict()
+_sample_cache_size = 128
+
 
 def inherit_docstring(fromfunc, sep=""):
     """
@@ -84,6 +90,7 @@ class Kernel(object):
 
         self.sigma = sigma
         self.invert = invert
+        self._sigma_scaled = sigma
 
     def __call__(self, t):
         """
@@ -132,6 +139,145 @@ class Kernel(object):
             Quantity 1D
             The result of the kernel evaluation.
         """
+        return self._evaluate_magnitude(
+            t.magnitude, self._sigma_scaled.magnitude) / t.units
+
+    def _evaluate_magnitude(self, t, sigma):
+        """
+        Evaluates the kernel on plain numbers.
+
+        Parameter
+        ---------
+        t : np.ndarray
+            Points at which the kernel is evaluated.
+        sigma : float
+            Standard deviation of the kernel in the units of `t`.
+
+        Returns
+        -------
+            np.ndarray
+            The result of the kernel evaluation, in the inverse units of
+            `t`.
+        """
+        raise NotImplementedError("The Kernel class should not be used directly, "
+                                  "instead the subclasses for the single kernels.")
+
+    def evaluate_magnitude(self, t, units):
+        """
+        Evaluates the kernel at all points in the array `t` of plain numbers
+        given in `units`, without the overhead of quantity arrays.
+
+        Parameter
+        ---------
+        t : np.ndarray
+            Points at which the kernel is evaluated.
+        units : Quantity
+            Units of `t`, with the dimensionality of `sigma`.
+
+        Returns
+        -------
+            np.ndarray
+            The result of the kernel evaluations, in the inverse of `units`.
+        """
+        sigma = self.sigma.rescale(units).magnitude.item()
+        return self._evaluate_magnitude(np.asarray(t, dtype=float), sigma)
+
+    def sample(self, sampling_period, cutoff=5.0, cache=True):
+        """
+        Evaluates the kernel at the multiples of `sampling_period` within
+        `cutoff` standard deviations around zero.
+
+        The sampled kernels are kept in a cache keyed by the kernel class,
+        `sigma`, `invert`, `sampling_period` and `cutoff`, such that a
+        kernel is sampled once when it is applied repeatedly, e.g. to many
+        spike trains.
+
+        Parameter
+        ---------
+        sampling_period : Quantity scalar
+            Distance of the sampling points, with the dimensionality of
+            `sigma`.
+        cutoff : float
+            Half width of the sampled interval in standard deviations.
+            Default: 5.0
+        cache : bool
+            If False, the kernel is sampled anew and the cache is not used.
+            Default: True
+
+        Returns
+        -------
+        values : np.ndarray
+            The kernel at the sampling points, in the inverse units of
+            `sampling_period`. The array is read-only.
+        median_index : int
+            Index of the estimated median of the kernel, see
+            `median_index()`.
+        """
+        key = _sample_key(self, sampling_period, cutoff)
+        if cache and key in _sample_cache:
+            return _sample_cache[key]
+        step = sampling_period.magnitude.item()
+        half_width = cutoff * self.sigma.rescale(
+            sampling_period.units).magnitude.item() / step
+        t = np.arange(-half_width, half_width + 1, 1) * step
+        values = self.evaluate_magnitude(t, sampling_period.units)
+        values.flags.writeable = False
+        median_index = np.nonzero(values.cumsum() * step >= 0.5)[0].min()
+        if cache:
+            _sample_cache[key] = values, median_index
+            if len(_sample_cache) > _sample_cache_size:
+                _sample_cache.popitem(last=False)
+        return values, median_index
+
+    def fourier(self, freqs):
+        """
+        Evaluates the Fourier transform
+        :math:`\\hat{K}(f) = \\int K(t) \\exp(-2 \\pi i f t)\\ \\textrm{d}t`
+        of the kernel at all frequencies in the array `freqs`.
+
+        The transform is given in closed form, so that convolutions can be
+        computed by multiplying spectra, without sampling and truncating the
+        kernel.
+
+        Parameter
+        ---------
+        freqs : Quantity 1D
+            Frequencies at which the transform is evaluated, with the
+            inverse dimensionality of `sigma`.
+
+        Returns
+        -------
+            np.ndarray
+            The complex, dimensionless Fourier transform of the kernel,
+            which is one at zero frequency.
+        """
+        if not (isinstance(freqs, pq.Quantity)):
+            raise TypeError("The argument of the Fourier transform must be "
+                            "of type quantity!")
+        if (1 / freqs).dimensionality.simplified != \
+                self.sigma.dimensionality.simplified:
+            raise TypeError("The dimensionality of the frequencies must be "
+                            "the inverse of the dimensionality of sigma.")
+        sigma = self.sigma.rescale((1 / freqs).units).magnitude.item()
+        return self._fourier_magnitude(
+            np.asarray(freqs.magnitude, dtype=float), sigma)
+
+    def _fourier_magnitude(self, f, sigma):
+        """
+        Evaluates the Fourier transform of the kernel on plain numbers.
+
+        Parameter
+        ---------
+        f : np.ndarray
+            Frequencies at which the transform is evaluated.
+        sigma : float
+            Standard deviation of the kernel in the inverse units of `f`.
+
+        Returns
+        -------
+            np.ndarray
+            The complex Fourier transform of the kernel.
+        """
         raise NotImplementedError("The Kernel class should not be used directly, "
                                   "instead the subclasses for the single kernels.")
 
@@ -261,10 +407,15 @@ class RectangularKernel(SymmetricKernel):
         min_cutoff = np.sqrt(3.0)
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
-        return (0.5 / (np.sqrt(3.0) * self._sigma_scaled)) * \
-               (np.absolute(t) < np.sqrt(3.0) * self._sigma_scaled)
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
+        return (0.5 / (np.sqrt(3.0) * sigma)) * \
+               (np.absolute(t) < np.sqrt(3.0) * sigma)
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        # np.sinc(x) is sin(pi x) / (pi x)
+        return np.sinc(2.0 * np.sqrt(3.0) * sigma * f).astype(complex)
 
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
@@ -297,12 +448,15 @@ class TriangularKernel(SymmetricKernel):
         min_cutoff = np.sqrt(6.0)
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
-        return (1.0 / (np.sqrt(6.0) * self._sigma_scaled)) * np.maximum(
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
+        return (1.0 / (np.sqrt(6.0) * sigma)) * np.maximum(
             0.0,
-            (1.0 - (np.absolute(t) /
-                    (np.sqrt(6.0) * self._sigma_scaled)).magnitude))
+            (1.0 - (np.absolute(t) / (np.sqrt(6.0) * sigma))))
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        return (np.sinc(np.sqrt(6.0) * sigma * f) ** 2).astype(complex)
 
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
@@ -341,11 +495,23 @@ class EpanechnikovLikeKernel(SymmetricKernel):
         min_cutoff = np.sqrt(5.0)
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
-        return (3.0 / (4.0 * np.sqrt(5.0) * self._sigma_scaled)) * np.maximum(
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
+        return (3.0 / (4.0 * np.sqrt(5.0) * sigma)) * np.maximum(
             0.0,
-            1 - (t / (np.sqrt(5.0) * self._sigma_scaled)).magnitude ** 2)
+            1 - (t / (np.sqrt(5.0) * sigma)) ** 2)
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        x = 2.0 * np.pi * np.sqrt(5.0) * sigma * np.absolute(f)
+        # 3 (sin(x) - x cos(x)) / x^3, by its Taylor series for small x
+        small = x < 1e-2
+        x_large = np.where(small, 1.0, x)
+        transform = np.where(
+            small, 1.0 - x ** 2 / 10.0 + x ** 4 / 280.0,
+            3.0 * (np.sin(x_large) - x_large * np.cos(x_large)) /
+            x_large ** 3)
+        return transform.astype(complex)
 
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
@@ -402,10 +568,14 @@ class GaussianKernel(SymmetricKernel):
         min_cutoff = 3.0
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
-        return (1.0 / (np.sqrt(2.0 * np.pi) * self._sigma_scaled)) * np.exp(
-            -0.5 * (t / self._sigma_scaled).magnitude ** 2)
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
+        return (1.0 / (np.sqrt(2.0 * np.pi) * sigma)) * np.exp(
+            -0.5 * (t / sigma) ** 2)
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        return np.exp(-0.5 * (sigma * 2.0 * np.pi * f) ** 2).astype(complex)
 
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
@@ -435,10 +605,15 @@ class LaplacianKernel(SymmetricKernel):
         min_cutoff = 3.0
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
-        return (1 / (np.sqrt(2.0) * self._sigma_scaled)) * np.exp(
-            -(np.absolute(t) * np.sqrt(2.0) / self._sigma_scaled).magnitude)
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
+        return (1 / (np.sqrt(2.0) * sigma)) * np.exp(
+            -(np.absolute(t) * np.sqrt(2.0) / sigma))
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        tau = sigma / np.sqrt(2.0)
+        return (1.0 / (1.0 + (2.0 * np.pi * tau * f) ** 2)).astype(complex)
 
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
@@ -470,16 +645,19 @@ class ExponentialKernel(Kernel):
         min_cutoff = 3.0
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
         if not self.invert:
-            kernel = (t >= 0) * (1. / self._sigma_scaled.magnitude) *\
-                np.exp((-t / self._sigma_scaled).magnitude) / t.units
+            kernel = (t >= 0) * (1. / sigma) * np.exp(-t / sigma)
         elif self.invert:
-            kernel = (t <= 0) * (1. / self._sigma_scaled.magnitude) *\
-                np.exp((t / self._sigma_scaled).magnitude) / t.units
+            kernel = (t <= 0) * (1. / sigma) * np.exp(t / sigma)
         return kernel
 
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        sign = 1.0 if self.invert else -1.0
+        return 1.0 / (1.0 - sign * 2.0j * np.pi * sigma * f)
+
     @inherit_docstring(Kernel.boundary_enclosing_area_fraction)
     def boundary_enclosing_area_fraction(self, fraction):
         self._check_fraction(fraction)
@@ -512,14 +690,36 @@ class AlphaKernel(Kernel):
         min_cutoff = 3.0
         return min_cutoff
 
-    @inherit_docstring(Kernel._evaluate)
-    def _evaluate(self, t):
+    @inherit_docstring(Kernel._evaluate_magnitude)
+    def _evaluate_magnitude(self, t, sigma):
         if not self.invert:
-            kernel = (t >= 0) * 2. * (t / self._sigma_scaled**2).magnitude *\
-                np.exp((
-                    -t * np.sqrt(2.) / self._sigma_scaled).magnitude) / t.units
+            kernel = (t >= 0) * 2. * (t / sigma**2) * \
+                np.exp(-t * np.sqrt(2.) / sigma)
         elif self.invert:
-            kernel = (t <= 0) * -2. * (t / self._sigma_scaled**2).magnitude *\
-                np.exp((
-                    t * np.sqrt(2.) / self._sigma_scaled).magnitude) / t.units
+            kernel = (t <= 0) * -2. * (t / sigma**2) * \
+                np.exp(t * np.sqrt(2.) / sigma)
         return kernel
+
+    @inherit_docstring(Kernel._fourier_magnitude)
+    def _fourier_magnitude(self, f, sigma):
+        sign = 1.0 if self.invert else -1.0
+        tau = sigma / np.sqrt(2.0)
+        return 1.0 / (1.0 - sign * 2.0j * np.pi * tau * f) ** 2
+
+
+def _sample_key(kernel, sampling_period, cutoff):
+    """
+    Returns the key of a sampled kernel in the cache of `Kernel.sample()`.
+    """
+    return (type(kernel), kernel.invert,
+            kernel.sigma.simplified.magnitude.item(),
+            kernel.sigma.dimensionality.simplified.string,
+            sampling_period.magnitude.item(),
+            sampling_period.dimensionality.string, float(cutoff))
+
+
+def clear_sample_cache():
+    """
+    Removes all kernels sampled by `Kernel.sample()` from the cache.
+    """
+    _sample_cache.clear()
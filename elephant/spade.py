@@ -60,6 +60,7 @@ import numpy
 import neo
 import elephant.spike_train_surrogates as surr
 import elephant.conversion as conv
+from elephant.utils import surrogate_random_states
 from itertools import chain, combinations
 import numpy as np
 import time
@@ -86,7 +87,7 @@ from elephant.spade_src import fast_fca
 def spade(data, binsize, winlen, min_spikes=2, min_occ=2, min_neu=1,
           n_subsets=0, delta=0, epsilon=0, stability_thresh=None, n_surr=0,
           dither=15*pq.ms, alpha=1, stat_corr='fdr', psr_param=None,
-          output_format='concepts'):
+          output_format='concepts', random_state=None):
     """
     Perform the SPADE [1,2] analysis for the parallel spike trains given in the
     input. The data are discretized with a temporal resolution equal binsize
@@ -178,6 +179,9 @@ def spade(data, binsize, winlen, min_spikes=2, min_occ=2, min_neu=1,
     output_format: str
         distinguish the format of the output (see Returns). Can assume values
         'concepts' and 'patterns'.
+    random_state: None, int, np.random.RandomState or np.random.Generator
+        The source of randomness of the surrogates, see pvalue_spectrum().
+        Default: None
 
     Returns
     -------
@@ -310,7 +314,8 @@ def spade(data, binsize, winlen, min_spikes=2, min_occ=2, min_neu=1,
         time_pvalue_spectrum = time.time()
         pv_spec = pvalue_spectrum(data, binsize, winlen, dither=dither,
                                   n_surr=n_surr, min_spikes=min_spikes,
-                                  min_occ=min_occ, min_neu=min_neu)
+                                  min_occ=min_occ, min_neu=min_neu,
+                                  random_state=random_state)
         time_pvalue_spectrum = time.time() - time_pvalue_spectrum
         print("Time for pvalue spectrum computation: {}".format(
             time_pvalue_spectrum))
@@ -802,7 +807,7 @@ def _fca_filter(concept, winlen, min_c, min_z, max_c, max_z, min_neu):
 
 def pvalue_spectrum(
         data, binsize, winlen, dither, n_surr,
-        min_spikes=2, min_occ=2, min_neu=1):
+        min_spikes=2, min_occ=2, min_neu=1, random_state=None):
     '''
     Compute the p-value spectrum of pattern signatures extracted from
     surrogates of parallel spike trains, under the null hypothesis of
@@ -847,6 +852,12 @@ def pvalue_spectrum(
     min_neu: int (positive)
         Minimum number of neurons in a sequence to considered a pattern.
         Default: 1
+    random_state: None, int, np.random.RandomState or np.random.Generator
+        The source of randomness of the surrogates. If not None, every
+        surrogate is drawn from its own stream (see
+        elephant.utils.surrogate_random_states()), and the spectrum is the
+        same for any number of MPI tasks.
+        Default: None
 
     Output
     ------
@@ -868,59 +879,40 @@ def pvalue_spectrum(
     if n_surr <= 0:
         raise AttributeError('n_surr has to be >0')
     len_partition = n_surr // size  # length of each MPI task
-    len_remainder = n_surr if len_partition == 0 else n_surr % len_partition
+    len_remainder = n_surr - size * len_partition
 
     # For each surrogate collect the signatures (z,c) such that (z*,c*)>=(z,c)
     # exists in that surrogate. Group such signatures (with repetition)
     # list of all signatures found in surrogates, initialized to []
     surr_sgnts = []
 
+    # Each surrogate is drawn from its own stream, so that the spectrum does
+    # not depend on the number of MPI tasks
+    random_states = surrogate_random_states(random_state, n_surr)
     if rank == 0:
-        for i in range(len_partition + len_remainder):
-            surrs = [surr.dither_spikes(
-                xx, dither=dither, n=1)[0] for xx in data]
-
-            # Find all pattern signatures in the current surrogate data set
-            surr_sgnt = [
-                (a,
-                 b) for (
-                    a,
-                    b,
-                    c) in concepts_mining(
-                    surrs,
-                    binsize,
-                    winlen,
-                    min_spikes=min_spikes,
-                    min_occ=min_occ,
-                    min_neu=min_neu,
-                    report='#')[0]]
-
-            # List all signatures (z,c) <= (z*, c*), for each (z*,c*) in the
-            # current surrogate, and add it to the list of all signatures
-            filled_sgnt = []
-            for (z, c) in surr_sgnt:
-                for j in range(min_spikes, z + 1):
-                    for k in range(min_occ, c + 1):
-                        filled_sgnt.append((j, k))
-            surr_sgnts.extend(list(set(filled_sgnt)))
-    # Same procedure on different PCU
+        surr_ids = range(len_partition + len_remainder)
     else:  # pragma: no cover
-        for i in range(len_partition):
-            surrs = [surr.dither_spikes(
-                xx, dither=dither, n=1)[0] for xx in data]
-            # Find all pattern signatures in the current surrogate data set
-            surr_sgnt = [
-                (a, b) for (a, b, c) in concepts_mining(
-                    surrs, binsize, winlen, min_spikes=min_spikes,
-                    min_occ=min_occ, min_neu=min_neu, report='#')[0]]
-            # List all signatures (z,c) <= (z*, c*), for each (z*,c*) in the
-            # current surrogate, and add it to the list of all signatures
-            filled_sgnt = []
-            for (z, c) in surr_sgnt:
-                for j in range(min_spikes, z + 1):
-                    for k in range(min_occ, c + 1):
-                        filled_sgnt.append((j, k))
-            surr_sgnts.extend(list(set(filled_sgnt)))
+        first_id = len_remainder + rank * len_partition
+        surr_ids = range(first_id, first_id + len_partition)
+    for i in surr_ids:
+        surrs = [surr.dither_spikes(
+            xx, dither=dither, n=1, random_state=random_states[i])[0]
+            for xx in data]
+
+        # Find all pattern signatures in the current surrogate data set
+        surr_sgnt = [
+            (a, b) for (a, b, c) in concepts_mining(
+                surrs, binsize, winlen, min_spikes=min_spikes,
+                min_occ=min_occ, min_neu=min_neu, report='#')[0]]
+
+        # List all signatures (z,c) <= (z*, c*), for each (z*,c*) in the
+        # current surrogate, and add it to the list of all signatures
+        filled_sgnt = []
+        for (z, c) in surr_sgnt:
+            for j in range(min_spikes, z + 1):
+                for k in range(min_occ, c + 1):
+                    filled_sgnt.append((j, k))
+        surr_sgnts.extend(list(set(filled_sgnt)))
     # Collecting results on the first PCU
     if rank != 0:  # pragma: no cover
         comm.send(surr_sgnts, dest=0)
@@ -9,6 +9,9 @@ from __future__ import division
 import numpy as np
 import neo
 import quantities as pq
+import scipy.fftpack
+import elephant.conversion as conv
+import elephant.kernels as kernels
 
 
 def covariance(binned_sts, binary=False):
@@ -163,6 +166,10 @@ def __calculate_correlation_or_covariance(binned_sts, binary, corrcoef_norm):
         Use normalization factor for the correlation coefficient rather than
         for the covariance.
     '''
+    if isinstance(binned_sts, conv.MemmapBinnedSpikeTrain):
+        return __calculate_correlation_or_covariance_chunked(
+            binned_sts, binary, corrcoef_norm)
+
     num_neurons = binned_sts.matrix_rows
 
     # Pre-allocate correlation matrix
@@ -170,14 +177,21 @@ def __calculate_correlation_or_covariance(binned_sts, binary, corrcoef_norm):
 
     # Retrieve unclipped matrix
     spmat = binned_sts.to_sparse_array()
+    if not binary and spmat.dtype != int:
+        # avoid overflows of compact count types in the dot products below
+        spmat = spmat.astype(int)
 
-    # For each row, extract the nonzero column indices and the corresponding
-    # data in the matrix (for performance reasons)
-    bin_idx_unique = []
+    # For each row, extract the number of filled bins and the number of
+    # coincident filled bins with all other rows, or the corresponding data
+    # in the matrix (for performance reasons)
     bin_counts_unique = []
     if binary:
-        for s in spmat:
-            bin_idx_unique.append(s.nonzero()[1])
+        num_filled_bins = np.diff(spmat.indptr)
+        # Coincident filled bins of all pairs of spike trains, computed by
+        # a popcount of the bitwise AND of the bit-packed binary matrix
+        # (more efficient than intersecting the indices of each pair)
+        coincidences = conv._packed_coincidences(
+            binned_sts.to_packed_bool_array())
     else:
         for s in spmat:
             bin_counts_unique.append(s.data)
@@ -194,14 +208,12 @@ def __calculate_correlation_or_covariance(binned_sts, binary, corrcoef_norm):
             # $l$ is the number of bins used (i.e., length of $b_i$ or $b_j$),
             # and $M_i$ is a vector [m_i, m_i,..., m_i].
             if binary:
-                # Intersect indices to identify number of coincident spikes in
-                # i and j (more efficient than directly using the dot product)
-                ij = len(np.intersect1d(
-                    bin_idx_unique[i], bin_idx_unique[j], assume_unique=True))
+                # Number of coincident spikes in i and j
+                ij = coincidences[i, j]
 
                 # Number of spikes in i and j
-                n_i = len(bin_idx_unique[i])
-                n_j = len(bin_idx_unique[j])
+                n_i = num_filled_bins[i]
+                n_j = num_filled_bins[j]
             else:
                 # Calculate dot product b_i*b_j between unclipped matrices
                 ij = spmat[i].dot(spmat[j].transpose()).toarray()[0][0]
@@ -225,8 +237,8 @@ def __calculate_correlation_or_covariance(binned_sts, binary, corrcoef_norm):
                     # Here, b_i*b_i is just the number of filled bins (since
                     # each filled bin of a clipped spike train has value equal
                     # to 1)
-                    ii = len(bin_idx_unique[i])
-                    jj = len(bin_idx_unique[j])
+                    ii = num_filled_bins[i]
+                    jj = num_filled_bins[j]
                 else:
                     # directly calculate the dot product based on the counts of
                     # all filled entries (more efficient than using the dot
@@ -248,6 +260,46 @@ def __calculate_correlation_or_covariance(binned_sts, binary, corrcoef_norm):
     return np.squeeze(C)
 
 
+def __calculate_correlation_or_covariance_chunked(binned_sts, binary,
+                                                  corrcoef_norm):
+    '''
+    Helper function for covariance() and corrcoef() of spike trains binned on
+    disk, which accumulates the dot products <b_i, b_j> and spike counts n_i
+    over the chunks of the binned spike trains, such that only one chunk is
+    held in memory at a time. The result is then computed from the same
+    formulas as in __calculate_correlation_or_covariance().
+
+    Parameters
+    ----------
+    binned_sts : elephant.conversion.MemmapBinnedSpikeTrain
+        See covariance() or corrcoef(), respectively.
+    binary : bool
+        See covariance() or corrcoef(), respectively.
+    corrcoef_norm : bool
+        Use normalization factor for the correlation coefficient rather than
+        for the covariance.
+    '''
+    num_neurons = binned_sts.matrix_rows
+    dot_products = np.zeros((num_neurons, num_neurons), dtype=np.int64)
+    spike_counts = np.zeros(num_neurons, dtype=np.int64)
+    for _, chunk in binned_sts.iter_chunks():
+        chunk = chunk.tocsr().astype(np.int64)
+        if binary:
+            chunk.data[:] = 1
+        dot_products += chunk.dot(chunk.transpose()).toarray()
+        spike_counts += np.ravel(chunk.sum(axis=1))
+
+    enumerator = dot_products - \
+        np.outer(spike_counts, spike_counts) / binned_sts.num_bins
+    if corrcoef_norm:
+        variances = np.diag(dot_products) - \
+            spike_counts ** 2 / binned_sts.num_bins
+        denominator = np.sqrt(np.outer(variances, variances))
+    else:
+        denominator = binned_sts.num_bins - 1
+    return np.squeeze(enumerator / denominator)
+
+
 def cross_correlation_histogram(
         binned_st1, binned_st2, window='full', border_correction=False, binary=False,
         kernel=None, method='speed', cross_corr_coef=False):
@@ -287,7 +339,7 @@ def cross_correlation_histogram(
         same bin. If True, such spikes are considered as a single spike;
         otherwise they are considered as different spikes.
         Default: False.
-    kernel : array or None (optional)
+    kernel : array, elephant.kernels.Kernel or None (optional)
         A one dimensional array containing an optional smoothing kernel applied
         to the resulting CCH. The length N of the kernel indicates the
         smoothing window. The smoothing window cannot be larger than the
@@ -297,6 +349,9 @@ def cross_correlation_histogram(
           * hamming: numpy.hamming(N)
           * hanning: numpy.hanning(N)
           * bartlett: numpy.bartlett(N)
+        A Kernel object is applied without sampling it, by multiplying the
+        spectrum of the CCH with the Fourier transform of the kernel
+        (`Kernel.fourier()`).
         If None is specified, the CCH is not smoothed.
         Default: None
     method : string (optional)
@@ -378,8 +433,9 @@ def cross_correlation_histogram(
         # Normalizes the CCH to obtain the cross-correlation 
         # coefficient function ranging from -1 to 1
         N  = max(binned_st1.num_bins, binned_st2.num_bins)
-        Nx = len(binned_st1.spike_indices[0])
-        Ny = len(binned_st2.spike_indices[0])
+        # number of spikes, i.e., the offset of the end of the first row
+        Nx = binned_st1.spike_indices_flat[1][1]
+        Ny = binned_st2.spike_indices_flat[1][1]
         spmat = [binned_st1.to_sparse_array(), binned_st2.to_sparse_array()]
         bin_counts_unique = []
         for s in spmat:
@@ -398,7 +454,14 @@ def cross_correlation_histogram(
                 np.arange(l, r + 1)), float)
         return counts * correction
 
-    def _kernel_smoothing(counts, kern, l, r):
+    def _kernel_smoothing(counts, kern, l, r, binsize):
+        if isinstance(kern, kernels.Kernel):
+            # Multiply the spectrum of the CCH with the Fourier transform of
+            # the kernel, padded to avoid wrapping around within the CCH
+            fft_size = scipy.fftpack.next_fast_len(2 * len(counts) - 1)
+            transfer = kern.fourier(np.fft.rfftfreq(fft_size) / binsize)
+            return np.fft.irfft(np.fft.rfft(counts, fft_size) * transfer,
+                                fft_size)[:len(counts)]
         # Define the kern for smoothing as an ndarray
         if hasattr(kern, '__iter__'):
             if len(kern) > np.abs(l) + np.abs(r) + 1:
@@ -500,7 +563,8 @@ def cross_correlation_histogram(
             counts = _border_correction(counts, max_num_bins, l, r)
         if kern is not None:
             # Smoothing
-            counts = _kernel_smoothing(counts, kern, l, r)
+            counts = _kernel_smoothing(counts, kern, l, r,
+                                       binned_st1.binsize)
         # Transform the array count into an AnalogSignal
         cch_result = neo.AnalogSignal(
             signal=counts.reshape(counts.size, 1),
@@ -579,7 +643,8 @@ def cross_correlation_histogram(
             counts = _border_correction(counts, max_num_bins, l, r)
         if kern is not None:
             # Smoothing
-            counts = _kernel_smoothing(counts, kern, l, r)
+            counts = _kernel_smoothing(counts, kern, l, r,
+                                       binned_st1.binsize)
         # Transform the array count into an AnalogSignal
         cch_result = neo.AnalogSignal(
             signal=counts.reshape(counts.size, 1),
@@ -210,10 +210,13 @@ def _victor_purpura_dist_for_st_pair_fast(train_a, train_b, kernel):
     min_dim, max_dim = train_b.size, train_a.size + 1
     cost = np.asfortranarray(np.tile(np.arange(float(max_dim)), (2, 1)))
     decreasing_sequence = np.asfortranarray(cost[:, ::-1])
-    kern = kernel((np.atleast_2d(train_a).T.view(type=pq.Quantity) -
-                   train_b.view(type=pq.Quantity)))
+    # the kernel is evaluated on plain numbers in the units of train_a
+    units = train_a.units
+    kern = kernel.evaluate_magnitude(
+        np.atleast_2d(train_a.magnitude).T -
+        train_b.view(type=pq.Quantity).rescale(units).magnitude, units)
     as_fortran = np.asfortranarray(
-        ((np.sqrt(6.0) * kernel.sigma) * kern).simplified)
+        np.sqrt(6.0) * kernel.sigma.rescale(units).magnitude * kern)
     k = 1 - 2 * as_fortran
 
     for i in xrange(min_dim):
@@ -14,8 +14,9 @@ from __future__ import division
 import numpy as np
 from quantities import ms, mV, Hz, Quantity, dimensionless
 from neo import SpikeTrain
-import random
 from elephant.spike_train_surrogates import dither_spike_train
+import elephant.conversion as conv
+from elephant.utils import get_random_state
 import warnings
 
 
@@ -52,7 +53,8 @@ def spike_extraction(signal, threshold=0.0 * mV, sign='above',
     -------
     result_st : neo SpikeTrain object
         'result_st' contains the time_stamps of each of the spikes and
-        the waveforms in result_st.waveforms.
+        the waveforms in result_st.waveforms. Spikes whose waveforms exceed
+        the signal are not included.
     """
     # Get spike time_stamps
     if time_stamps is None:
@@ -86,32 +88,30 @@ def spike_extraction(signal, threshold=0.0 * mV, sign='above',
 
     data_stamps = data_stamps.astype(int)
 
-    borders_left = data_stamps + data_left
+    borders_left = (data_stamps + data_left).astype(int)
 
-    borders_right = data_stamps + data_right
+    borders_right = (data_stamps + data_right).astype(int)
 
-    borders = np.dstack((borders_left, borders_right)).flatten()
+    # gather all waveforms at once into a (spikes x samples) array; the
+    # spikes whose waveforms are cut by the borders of the signal are
+    # masked out
+    width = (borders_right - borders_left).max()
+    values = np.asarray(signal)
+    inside = (borders_left >= 0) & (borders_left + width <= len(values)) & \
+        (borders_right - borders_left == width)
+    waveforms = values[borders_left[inside, np.newaxis] +
+                       np.arange(width)] * signal.units
 
-    waveforms = np.array(
-                np.split(np.array(signal), borders.astype(int))[1::2]) * signal.units
-
-    # len(np.shape(waveforms)) == 1 if waveforms do not have the same width.
-    # this can occur when extr_interval indexes beyond the signal.
-    # Workaround: delete spikes shorter than the maximum length with
-    if len(np.shape(waveforms)) == 1:
-        max_len = (np.array([len(x) for x in waveforms])).max()
-        to_delete = np.array([idx for idx, x in enumerate(waveforms)
-                             if len(x) < max_len])
-        waveforms = np.delete(waveforms, to_delete, axis=0)
-        waveforms = np.array([x for x in waveforms])
+    if not inside.all():
+        to_delete = np.flatnonzero(~inside)
         warnings.warn("Waveforms " +
                       ("{:d}, " * len(to_delete)).format(*to_delete) +
-                      "exceeded signal and had to be deleted. " +
-                      "Change extr_interval to keep.")
+                      "exceeded signal and had to be deleted together " +
+                      "with their spikes. Change extr_interval to keep.")
 
     waveforms = waveforms[:, np.newaxis, :]
 
-    return SpikeTrain(time_stamps, units=signal.times.units,
+    return SpikeTrain(time_stamps[inside], units=signal.times.units,
                       t_start=signal.t_start, t_stop=signal.t_stop,
                       sampling_rate=signal.sampling_rate, waveforms=waveforms,
                       left_sweep=extr_left)
@@ -253,6 +253,254 @@ def peak_detection(signal, threshold=0.0 * mV, sign='above', format=None):
     return result_st
 
 
+def chunked_spike_detection(signal, threshold, sign='above', method='peak',
+                            sampling_rate=None, t_start=0 * ms,
+                            chunk_size=2 ** 14, extr_interval=None):
+    """
+    Detects the events of all channels of a multi-channel signal, reading it
+    chunk by chunk.
+
+    The signal is typically a `np.memmap` of the raw (e.g. int16) samples of
+    a high-density probe, which is too large to be loaded into memory.
+    All channels of a chunk are thresholded in one vectorized pass, and the
+    state of the threshold crossings is carried across the chunk borders,
+    so that the events are the same as if the whole signal were processed
+    at once by `threshold_detection()` (`method='threshold'`) or
+    `peak_detection()` (`method='peak'`) channel by channel.
+
+    Parameters
+    ----------
+    signal : neo AnalogSignal, np.ndarray or np.memmap
+        The signal, of shape (number of samples, number of channels). A
+        one-dimensional array is treated as a single channel.
+    threshold : float, array-like or Quantity
+        The threshold that must be crossed for an event to be detected, one
+        for all channels or one per channel. A Quantity is rescaled to the
+        units of an AnalogSignal; plain numbers are in the units of the
+        samples.
+    sign : 'above' or 'below'
+        Whether to detect crossings above or below the threshold.
+        Default: 'above'.
+    method : 'peak' or 'threshold'
+        Whether an event is placed at the extremum of each threshold
+        crossing ('peak') or at its first sample ('threshold').
+        Default: 'peak'.
+    sampling_rate : Quantity or None
+        The sampling rate of an array `signal`. Ignored for an AnalogSignal.
+        Default: None.
+    t_start : Quantity
+        The time of the first sample of an array `signal`. Ignored for an
+        AnalogSignal. Default: 0 * ms.
+    chunk_size : int
+        The number of samples read from the signal at once. The memory used
+        is about `chunk_size * number of channels * 16` bytes.
+        Default: 2 ** 14.
+    extr_interval : unpackable time quantities, len == 2, or None
+        If not None, the waveforms in this interval around the events are
+        extracted. They are read from `signal` for the events found in each
+        chunk, only over the samples spanned by these events. Unlike
+        `spike_extraction()`, which drops the waveforms cut by the borders
+        of the signal, all events are kept and the samples beyond the
+        signal are NaN. Default: None.
+
+    Returns
+    -------
+    list of neo SpikeTrain
+        The events of each channel. If `extr_interval` is given, the
+        waveforms of a channel are in the `waveforms` of its SpikeTrain,
+        with shape (number of events, 1, number of samples of the interval).
+
+    Raises
+    ------
+    ValueError
+        If `sign` is not 'above' or 'below', `method` is not 'peak' or
+        'threshold', or `sampling_rate` is missing for an array `signal`.
+
+    Examples
+    --------
+    >>> data = np.memmap('probe.bin', dtype=np.int16, mode='r')
+    >>> data = data.reshape(-1, 384)
+    >>> threshold = -5 * np.median(np.abs(data[:30000]), axis=0) / 0.6745
+    >>> spiketrains = chunked_spike_detection(
+    ...     data, threshold, sign='below', sampling_rate=30 * kHz,
+    ...     extr_interval=(-1 * ms, 2 * ms))
+
+    """
+    if sign not in ('above', 'below'):
+        raise ValueError("sign must be 'above' or 'below'")
+    if method not in ('peak', 'threshold'):
+        raise ValueError("method must be 'peak' or 'threshold'")
+    if hasattr(signal, 'sampling_rate'):
+        sampling_rate = signal.sampling_rate
+        t_start = signal.t_start
+        units = signal.units
+        data = signal.magnitude
+    elif sampling_rate is None:
+        raise ValueError("sampling_rate must be given for an array signal")
+    else:
+        units = dimensionless
+        data = signal
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+    num_samples, num_channels = data.shape
+    chunk_size = int(chunk_size)
+
+    if isinstance(threshold, Quantity):
+        threshold = threshold.rescale(units).magnitude
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float),
+                                (num_channels,))
+    # detect crossings above the threshold of the flipped signal
+    factor = 1. if sign == 'above' else -1.
+    threshold = factor * threshold
+
+    if extr_interval is not None:
+        extr_left, extr_right = extr_interval
+        if extr_left > extr_right:
+            raise ValueError("extr_interval[0] must be < extr_interval[1]")
+        window = np.arange(
+            int(np.floor((extr_left * sampling_rate).simplified.magnitude)),
+            int(np.floor((extr_right * sampling_rate).simplified.magnitude)))
+
+    # state of the crossings that are open at the end of the last chunk
+    above_prev = np.zeros(num_channels, dtype=bool)
+    best_value = np.zeros(num_channels)
+    best_index = np.zeros(num_channels, dtype=int)
+
+    indices, channels, waveforms = [], [], []
+    for start in range(0, num_samples, chunk_size):
+        stop = min(start + chunk_size, num_samples)
+        values = factor * np.asarray(data[start:stop], dtype=float)
+        above = values > threshold
+        onset = above.copy()
+        onset[0] &= ~above_prev
+        onset[1:] &= ~above[:-1]
+
+        if method == 'threshold':
+            event_rows, event_channels = np.nonzero(onset)
+            event_indices = event_rows + start
+        else:
+            event_indices, event_channels = _chunk_peaks(
+                values, above, onset, above_prev, best_value, best_index,
+                start)
+
+        if len(event_indices):
+            indices.append(event_indices)
+            channels.append(event_channels)
+            if extr_interval is not None:
+                waveforms.append(_gather_waveforms(
+                    data, event_indices, event_channels, window))
+        above_prev = above[-1]
+
+    if method == 'peak' and above_prev.any():
+        # crossings lasting until the end of the signal
+        event_channels = np.flatnonzero(above_prev)
+        indices.append(best_index[event_channels])
+        channels.append(event_channels)
+        if extr_interval is not None:
+            waveforms.append(_gather_waveforms(
+                data, best_index[event_channels], event_channels, window))
+
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=int)
+    channels = np.concatenate(channels) if channels else np.zeros(0,
+                                                                  dtype=int)
+    order = np.lexsort((indices, channels))
+    indices, channels = indices[order], channels[order]
+    splits = np.searchsorted(channels, np.arange(1, num_channels))
+    if extr_interval is not None:
+        if waveforms:
+            waveforms = np.concatenate(waveforms)[order]
+        else:
+            waveforms = np.zeros((0, len(window)))
+        waveforms = np.split(waveforms, splits)
+
+    period = (1. / sampling_rate).rescale(t_start.units).magnitude
+    t_stop = t_start + num_samples * period * t_start.units
+    spiketrains = []
+    for channel, channel_indices in enumerate(np.split(indices, splits)):
+        times = t_start.magnitude + channel_indices * period
+        if extr_interval is None:
+            spiketrain = SpikeTrain(times, units=t_start.units,
+                                    t_start=t_start, t_stop=t_stop)
+        else:
+            spiketrain = SpikeTrain(
+                times, units=t_start.units, t_start=t_start, t_stop=t_stop,
+                sampling_rate=sampling_rate,
+                waveforms=waveforms[channel][:, np.newaxis, :] * units,
+                left_sweep=extr_left)
+        spiketrains.append(spiketrain)
+    return spiketrains
+
+
+def _chunk_peaks(values, above, onset, above_prev, best_value, best_index,
+                 start):
+    """
+    Returns the sample indices and channels of the maxima of the crossings
+    of `values` (samples x channels) above threshold that end in the chunk.
+
+    The maxima of the crossings that are still open at the end of the chunk
+    are stored in `best_value` and `best_index`, and combined with the
+    continuation of the crossings open at its beginning (`above_prev`).
+    """
+    num_rows, num_channels = values.shape
+    # channel-major, so that each crossing is a contiguous segment
+    masked = np.where(above, values, -np.inf).T.ravel()
+    continued = above_prev & above[0]
+    is_start = onset.T.ravel()
+    is_start[np.flatnonzero(continued) * num_rows] = True
+    starts = np.flatnonzero(is_start)
+
+    # channels whose carried crossing ended just before the chunk
+    ended = np.flatnonzero(above_prev & ~above[0])
+    event_indices = [best_index[ended]]
+    event_channels = [ended]
+
+    if len(starts):
+        # the segment of a crossing runs up to the next crossing, the
+        # samples in between are masked
+        maxima = np.maximum.reduceat(masked, starts)
+        # the samples before the first crossing belong to no segment
+        segment = np.repeat(np.arange(len(starts)),
+                            np.diff(np.append(starts, len(masked))))
+        hits = np.flatnonzero(masked[starts[0]:] == maxima[segment])
+        hit_segments = segment[hits]
+        first = np.append(True, hit_segments[1:] != hit_segments[:-1])
+        positions = hits[first] + starts[0]
+        seg_channels = starts // num_rows
+        seg_indices = positions % num_rows + start
+
+        from_prev = (starts % num_rows == 0) & continued[seg_channels]
+        keep = from_prev & (best_value[seg_channels] >= maxima)
+        seg_indices[keep] = best_index[seg_channels[keep]]
+        maxima[keep] = best_value[seg_channels[keep]]
+
+        last = np.append(seg_channels[1:] != seg_channels[:-1], True)
+        still_open = last & above[-1][seg_channels]
+        best_value[seg_channels[still_open]] = maxima[still_open]
+        best_index[seg_channels[still_open]] = seg_indices[still_open]
+        event_indices.append(seg_indices[~still_open])
+        event_channels.append(seg_channels[~still_open])
+    return np.concatenate(event_indices), np.concatenate(event_channels)
+
+
+def _gather_waveforms(data, indices, channels, window):
+    """
+    Returns the samples of `data` (samples x channels) at `indices + window`
+    of the given channels, with NaN beyond the borders of `data`.
+
+    Only the rows spanned by the waveforms are read from `data`.
+    """
+    num_samples = data.shape[0]
+    lower = max(indices.min() + window[0], 0)
+    upper = min(indices.max() + window[-1] + 1, num_samples)
+    block = np.asarray(data[lower:upper])
+    rows = indices[:, np.newaxis] + window - lower
+    valid = (rows >= 0) & (rows < upper - lower)
+    waveforms = np.full(rows.shape, np.nan)
+    waveforms[valid] = block[rows[valid], np.broadcast_to(
+        channels[:, np.newaxis], rows.shape)[valid]]
+    return waveforms
+
+
 def _homogeneous_process(interval_generator, args, mean_rate, t_start, t_stop,
                          as_array):
     """
@@ -297,7 +545,7 @@ def _homogeneous_process(interval_generator, args, mean_rate, t_start, t_stop,
 
 
 def homogeneous_poisson_process(rate, t_start=0.0 * ms, t_stop=1000.0 * ms,
-                                as_array=False):
+                                as_array=False, random_state=None):
     """
     Returns a spike train whose spikes are a realization of a Poisson process
     with the given rate, starting at time `t_start` and stopping time `t_stop`.
@@ -316,6 +564,10 @@ def homogeneous_poisson_process(rate, t_start=0.0 * ms, t_stop=1000.0 * ms,
     as_array : bool
                If True, a NumPy array of sorted spikes is returned,
                rather than a SpikeTrain object.
+    random_state : None, int, np.random.RandomState or np.random.Generator
+                   The source of randomness, see
+                   `elephant.utils.get_random_state()`.
+                   Default: None
 
     Raises
     ------
@@ -334,10 +586,11 @@ def homogeneous_poisson_process(rate, t_start=0.0 * ms, t_stop=1000.0 * ms,
     rate = rate.rescale((1 / t_start).units)
     mean_interval = 1 / rate.magnitude
     return _homogeneous_process(
-        np.random.exponential, (mean_interval,), rate, t_start, t_stop,
-        as_array)
+        get_random_state(random_state).exponential, (mean_interval,), rate,
+        t_start, t_stop, as_array)
 
-def inhomogeneous_poisson_process(rate, as_array=False):
+def inhomogeneous_poisson_process(rate, as_array=False, method='thinning',
+                                  random_state=None):
     """
     Returns a spike train whose spikes are a realization of an inhomogeneous
     Poisson process with the given rate profile.
@@ -351,10 +604,34 @@ def inhomogeneous_poisson_process(rate, as_array=False):
     as_array : bool
            If True, a NumPy array of sorted spikes is returned,
            rather than a SpikeTrain object.
+    method : {'thinning', 'time_rescaling'}
+        How the spikes are generated:
+        * 'thinning': spikes of a homogeneous Poisson process with the
+          maximal rate are accepted with probability `rate(t) / max(rate)`.
+        * 'time_rescaling': spikes of a unit rate Poisson process are
+          mapped through the inverse of the integrated rate, see
+          `inhomogeneous_poisson_process_batch()`. The work is proportional
+          to the number of spikes, which is faster for rate profiles with
+          brief high peaks.
+        Both methods sample the same process.
+        Default: 'thinning'
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
     Raises
     ------
-    ValueError : If `rate` contains any negative value.
+    ValueError : If `rate` contains any negative value, or `method` is not
+        valid.
     """
+    random_state = get_random_state(random_state)
+    if method == 'time_rescaling':
+        times, _ = inhomogeneous_poisson_process_batch(
+            rate[:, :1], random_state=random_state)
+        if as_array:
+            return times.magnitude
+        return SpikeTrain(times, t_start=rate.t_start, t_stop=rate.t_stop)
+    elif method != 'thinning':
+        raise ValueError("method must be 'thinning' or 'time_rescaling'")
     # Check rate contains only positive values
     if any(rate < 0) or not rate.size:
         raise ValueError(
@@ -364,19 +641,117 @@ def inhomogeneous_poisson_process(rate, as_array=False):
         #Generate n hidden Poisson SpikeTrains with rate equal to the peak rate
         max_rate = max(rate)
         homogeneous_poiss = homogeneous_poisson_process(
-            rate=max_rate, t_stop=rate.t_stop, t_start=rate.t_start)
+            rate=max_rate, t_stop=rate.t_stop, t_start=rate.t_start,
+            random_state=random_state)
         # Compute the rate profile at each spike time by interpolation
         rate_interpolated = _analog_signal_linear_interp(
             signal=rate, times=homogeneous_poiss.magnitude *
                                homogeneous_poiss.units)
         # Accept each spike at time t with probability rate(t)/max_rate
-        u = np.random.uniform(size=len(homogeneous_poiss)) * max_rate
+        u = random_state.uniform(size=len(homogeneous_poiss)) * max_rate
         spikes = homogeneous_poiss[u < rate_interpolated.flatten()]
         if as_array:
             spikes = spikes.magnitude
         return spikes
 
 
+def inhomogeneous_poisson_process_batch(rate, binsize=None,
+                                        random_state=None):
+    """
+    Returns spike trains whose spikes are realizations of inhomogeneous
+    Poisson processes, one for each channel of a rate profile, generated by
+    time rescaling.
+
+    The rate is linearly interpolated between its samples, like in
+    `inhomogeneous_poisson_process()`, and integrated to the cumulative
+    intensity :math:`\\Lambda(t)`. The spikes of a Poisson process with unit
+    rate in :math:`[0, \\Lambda(t_{stop}))` are mapped to spike times by
+    inverting :math:`\\Lambda`, which is quadratic between two samples. All
+    channels are processed together and, unlike thinning, no spikes are
+    drawn in vain.
+
+    Parameters
+    ----------
+    rate : neo.AnalogSignal
+        The rate profiles evolving over time, one per channel. Its values
+        have all to be `>=0`. The spike trains start at `rate.t_start` and
+        stop at `rate.t_stop`.
+    binsize : Quantity scalar with dimension time or None
+        If given, the spike trains are returned as a
+        `elephant.conversion.BinnedSpikeTrain` with this bin size.
+        Default: None
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
+
+    Returns
+    -------
+    times, offsets : Quantity, np.ndarray
+        The sorted spike times of all spike trains, in the units of the
+        times of `rate`, and the array of length `n + 1` delimiting the `n`
+        spike trains in `times`, see
+        `homogeneous_poisson_process_batch()`. A
+        `elephant.conversion.BinnedSpikeTrain` if `binsize` is given.
+
+    Raises
+    ------
+    ValueError : If `rate` contains any negative value or is empty.
+
+    See also
+    --------
+    inhomogeneous_poisson_process
+    """
+    if not rate.size or np.any(rate.magnitude < 0):
+        raise ValueError(
+            'rate must be a positive non empty signal, representing the'
+            'rate at time t')
+    units = rate.times.units
+    t_start = rate.t_start.rescale(units)
+    t_stop = rate.t_stop.rescale(units)
+    values = rate.rescale(1 / units).magnitude
+    num_samples, num_channels = values.shape
+    # knots of the piecewise linear rate, which is constant after the last
+    # sample, relative to t_start
+    knots = np.r_[np.arange(num_samples) *
+                  rate.sampling_period.rescale(units).magnitude,
+                  (t_stop - t_start).magnitude]
+    values = np.vstack((values, values[-1]))
+    widths = np.diff(knots)[:, np.newaxis]
+    slopes = np.diff(values, axis=0) / widths
+    # integrated rate at the knots, shape (num_samples + 1, num_channels)
+    integral = np.vstack((np.zeros(num_channels), np.cumsum(
+        0.5 * (values[:-1] + values[1:]) * widths, axis=0)))
+
+    # spikes of the unit rate process in the time-rescaled interval of each
+    # channel, concatenated (channel-major) into one increasing axis
+    totals = integral[-1]
+    random_state = get_random_state(random_state)
+    counts = random_state.poisson(totals)
+    starts = np.r_[0., np.cumsum(totals)[:-1]]
+    channels = np.repeat(np.arange(num_channels), counts)
+    rescaled = np.sort(starts[channels] + random_state.uniform(
+        size=counts.sum()) * totals[channels])
+    # segment of the rate containing each spike
+    axis = (integral + starts).T.ravel()
+    segment = np.searchsorted(axis, rescaled, side='right') - 1 - \
+        channels * (num_samples + 1)
+    segment = np.clip(segment, 0, num_samples - 1)
+    # invert the quadratic integral within the segment
+    rate_0 = values[segment, channels]
+    slope = slopes[segment, channels]
+    excess = np.maximum(
+        rescaled - starts[channels] - integral[segment, channels], 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = 2 * excess / (
+            rate_0 + np.sqrt(np.maximum(rate_0 ** 2 + 2 * slope * excess,
+                                        0)))
+    offset = np.nan_to_num(offset)
+    times = np.minimum(knots[segment] + np.minimum(offset, widths[segment, 0]),
+                       knots[-1])
+    offsets = np.r_[0, np.cumsum(counts)]
+    return _batch_output(times, offsets, t_start, t_stop, binsize)
+
+
 def _analog_signal_linear_interp(signal, times):
     '''
     Compute the linear interpolation of a signal at desired times.
@@ -432,7 +807,7 @@ def _analog_signal_linear_interp(signal, times):
     return out.rescale(signal.units)
 
 def homogeneous_gamma_process(a, b, t_start=0.0 * ms, t_stop=1000.0 * ms,
-                              as_array=False):
+                              as_array=False, random_state=None):
     """
     Returns a spike train whose spikes are a realization of a gamma process
     with the given parameters, starting at time `t_start` and stopping time
@@ -454,6 +829,10 @@ def homogeneous_gamma_process(a, b, t_start=0.0 * ms, t_stop=1000.0 * ms,
     as_array : bool
                If True, a NumPy array of sorted spikes is returned,
                rather than a SpikeTrain object.
+    random_state : None, int, np.random.RandomState or np.random.Generator
+                   The source of randomness, see
+                   `elephant.utils.get_random_state()`.
+                   Default: None
 
     Raises
     ------
@@ -472,10 +851,224 @@ def homogeneous_gamma_process(a, b, t_start=0.0 * ms, t_stop=1000.0 * ms,
     b = b.rescale((1 / t_start).units).simplified
     rate = b / a
     k, theta = a, (1 / b.magnitude)
-    return _homogeneous_process(np.random.gamma, (k, theta), rate, t_start, t_stop, as_array)
+    return _homogeneous_process(get_random_state(random_state).gamma,
+                                (k, theta), rate, t_start, t_stop, as_array)
+
+
+def _homogeneous_process_batch(interval_generator, args, rates, duration):
+    """
+    Generates the spike times of several spike trains of a renewal process,
+    whose intervals are drawn by `interval_generator` with the parameters
+    `args` (one array per parameter, with one value per spike train), in the
+    interval `[0, duration)`.
 
+    The intervals of all spike trains are drawn at once into one buffer and
+    summed within each spike train. Only the spike trains for which the
+    buffer was too short are extended, again all at once.
 
-def _n_poisson(rate, t_stop, t_start=0.0 * ms, n=1):
+    Returns
+    -------
+    times : np.ndarray
+        The spike times of all spike trains.
+    offsets : np.ndarray
+        Array of length `len(rates) + 1` delimiting the spike trains in
+        `times`.
+    """
+    num_trains = len(rates)
+    rows, times = [], []
+    # time of the last drawn spike of each spike train
+    last = np.zeros(num_trains)
+    active = np.nonzero(rates > 0)[0]
+    while len(active):
+        expected = rates[active] * (duration - last[active])
+        sizes = np.maximum(np.ceil(expected + 3 * np.sqrt(expected)),
+                           5).astype(int)
+        ids = np.repeat(active, sizes)
+        isi = interval_generator(*[arg[ids] for arg in args])
+        # cumulative sum of the intervals within each spike train
+        ends = np.cumsum(sizes)
+        spikes = np.cumsum(isi)
+        before = np.r_[0., spikes[ends[:-1] - 1]] - last[active]
+        spikes -= np.repeat(before, sizes)
+        rows.append(ids)
+        times.append(spikes)
+        last[active] = spikes[ends - 1]
+        active = active[last[active] < duration]
+
+    rows = np.concatenate([np.zeros(0, dtype=int)] + rows)
+    times = np.concatenate([np.zeros(0)] + times)
+    inside = times < duration
+    rows, times = rows[inside], times[inside]
+    # the spikes of later draws follow those of earlier draws
+    order = np.argsort(rows, kind='mergesort')
+    offsets = np.r_[0, np.cumsum(np.bincount(rows, minlength=num_trains))]
+    return times[order], offsets
+
+
+def _batch_output(times, offsets, t_start, t_stop, binsize):
+    """
+    Returns the spike trains generated by `_homogeneous_process_batch()` as
+    a ragged array or a BinnedSpikeTrain.
+    """
+    units = t_stop.units
+    times = times + t_start.rescale(units).magnitude
+    if binsize is None:
+        return Quantity(times, units=units), offsets
+    return conv.BinnedSpikeTrain.from_arrays(
+        times, units, binsize=binsize, t_start=t_start, t_stop=t_stop,
+        offsets=offsets)
+
+
+def _check_batch_times(t_start, t_stop):
+    if not isinstance(t_start, Quantity) or not isinstance(t_stop, Quantity):
+        raise ValueError("t_start and t_stop must be of type pq.Quantity")
+    if not t_start < t_stop:
+        raise ValueError(
+            't_start (=%s) must be < t_stop (=%s)' % (t_start, t_stop))
+
+
+def homogeneous_poisson_process_batch(rate, t_start=0.0 * ms,
+                                      t_stop=1000.0 * ms, n=1, binsize=None,
+                                      random_state=None):
+    """
+    Returns many spike trains whose spikes are realizations of Poisson
+    processes, generated together in a few vectorized draws, see
+    `homogeneous_poisson_process()`.
+
+    The spike trains are returned as a ragged array (a flat array of spike
+    times plus offsets, see `elephant.conversion.ragged_spike_times`) or
+    binned, without creating a `neo.SpikeTrain` per spike train.
+
+    Parameters
+    ----------
+    rate : Quantity scalar or array with dimension 1/time
+        The rate of the discharge, or the rate of each spike train.
+    t_start : Quantity scalar with dimension time
+        The beginning of the spike trains.
+    t_stop : Quantity scalar with dimension time
+        The end of the spike trains.
+    n : int
+        The number of spike trains if `rate` is a scalar; ignored otherwise.
+        Default: 1
+    binsize : Quantity scalar with dimension time or None
+        If given, the spike trains are returned as a
+        `elephant.conversion.BinnedSpikeTrain` with this bin size.
+        Default: None
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
+
+    Returns
+    -------
+    times : Quantity
+        The sorted spike times of all spike trains, in the units of
+        `t_stop`.
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the spike trains in `times`.
+    or, if `binsize` is given,
+    binned : elephant.conversion.BinnedSpikeTrain
+        The binned spike trains.
+
+    Raises
+    ------
+    ValueError : If `t_start` and `t_stop` are not of type `pq.Quantity`, or
+        `t_start` is not smaller than `t_stop`, or a rate is negative.
+
+    Examples
+    --------
+        >>> from quantities import Hz, ms
+        >>> times, offsets = homogeneous_poisson_process_batch(
+                50*Hz, 0*ms, 1000*ms, n=10000)
+        >>> binned = homogeneous_poisson_process_batch(
+                [10, 20, 30]*Hz, 0*ms, 1000*ms, binsize=5*ms)
+
+    """
+    _check_batch_times(t_start, t_stop)
+    rates = rate.rescale(1 / t_stop.units).magnitude.ravel()
+    if rates.size == 1:
+        rates = np.repeat(rates, n)
+    if np.any(rates < 0):
+        raise ValueError('rate must have non-negative elements.')
+    duration = (t_stop - t_start).rescale(t_stop.units).magnitude.item()
+    with np.errstate(divide='ignore'):
+        scales = 1. / rates
+    random_state = get_random_state(random_state)
+    times, offsets = _homogeneous_process_batch(
+        lambda scale: random_state.exponential(scale), (scales,), rates,
+        duration)
+    return _batch_output(times, offsets, t_start, t_stop, binsize)
+
+
+def homogeneous_gamma_process_batch(a, b, t_start=0.0 * ms,
+                                    t_stop=1000.0 * ms, n=1, binsize=None,
+                                    random_state=None):
+    """
+    Returns many spike trains whose spikes are realizations of gamma
+    processes, generated together in a few vectorized draws, see
+    `homogeneous_gamma_process()` and
+    `homogeneous_poisson_process_batch()`.
+
+    Parameters
+    ----------
+    a : float or array of float
+        The shape parameter of the gamma distribution, or of each spike
+        train.
+    b : Quantity scalar or array with dimension 1/time
+        The rate parameter of the gamma distribution, or of each spike
+        train.
+    t_start : Quantity scalar with dimension time
+        The beginning of the spike trains.
+    t_stop : Quantity scalar with dimension time
+        The end of the spike trains.
+    n : int
+        The number of spike trains if `a` and `b` are scalars; ignored
+        otherwise.
+        Default: 1
+    binsize : Quantity scalar with dimension time or None
+        If given, the spike trains are returned as a
+        `elephant.conversion.BinnedSpikeTrain` with this bin size.
+        Default: None
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
+
+    Returns
+    -------
+    times, offsets : Quantity, np.ndarray
+        The spike trains as a ragged array, or a
+        `elephant.conversion.BinnedSpikeTrain` if `binsize` is given, see
+        `homogeneous_poisson_process_batch()`.
+
+    Raises
+    ------
+    ValueError : If `t_start` and `t_stop` are not of type `pq.Quantity`, or
+        `t_start` is not smaller than `t_stop`, or a parameter is not
+        positive.
+
+    Examples
+    --------
+        >>> from quantities import Hz, ms
+        >>> times, offsets = homogeneous_gamma_process_batch(
+                2.0, 50*Hz, 0*ms, 1000*ms, n=10000)
+
+    """
+    _check_batch_times(t_start, t_stop)
+    shapes, rates_b = np.broadcast_arrays(
+        np.asarray(a, dtype=float).ravel(),
+        b.rescale(1 / t_stop.units).magnitude.ravel())
+    if shapes.size == 1:
+        shapes, rates_b = np.repeat(shapes, n), np.repeat(rates_b, n)
+    if np.any(shapes <= 0) or np.any(rates_b <= 0):
+        raise ValueError('a and b must have positive elements.')
+    duration = (t_stop - t_start).rescale(t_stop.units).magnitude.item()
+    random_state = get_random_state(random_state)
+    times, offsets = _homogeneous_process_batch(
+        lambda shape, scale: random_state.gamma(shape, scale),
+        (shapes, 1. / rates_b), rates_b / shapes, duration)
+    return _batch_output(times, offsets, t_start, t_stop, binsize)
+
+
+def _n_poisson(rate, t_stop, t_start=0.0 * ms, n=1, random_state=None):
     """
     Generates one or more independent Poisson spike trains.
 
@@ -498,6 +1091,9 @@ def _n_poisson(rate, t_stop, t_start=0.0 * ms, n=1):
         SpikeTrains to be generated. If rate is an array, n is ignored and the
         number of SpikeTrains is equal to len(rate).
         Default: 1
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
 
     Returns
@@ -534,15 +1130,53 @@ def _n_poisson(rate, t_stop, t_start=0.0 * ms, n=1):
         rates = rate_dl.flatten()
         if any(rates < 0):
             raise ValueError('rate must have non-negative elements.')
+    random_state = get_random_state(random_state)
     sts = []
     for r in rates:
-        sts.append(homogeneous_poisson_process(r * Hz, t_start, t_stop))
+        sts.append(homogeneous_poisson_process(
+            r * Hz, t_start, t_stop, random_state=random_state))
     return sts
 
 
+def _sip_rates(rate, rate_c, n, min_delay):
+    """
+    Checks the parameters of `single_interaction_process()` and returns the
+    rate of each of its spike trains.
+    """
+    # Check if n is a positive integer
+    if not (isinstance(n, int) and n > 0):
+        raise ValueError('n (=%s) must be a positive integer' % str(n))
+
+    # Define the array of rates from input argument rate. Check that its length
+    # matches with n
+    if rate.ndim == 0:
+        if rate < 0 * Hz:
+            raise ValueError(
+                'rate (=%s) must be non-negative.' % str(rate))
+        rates_b = np.array(
+            [rate.magnitude for _ in range(n)]) * rate.units
+    else:
+        rates_b = np.array(rate).flatten() * rate.units
+        if not all(rates_b >= 0. * Hz):
+            raise ValueError('*rate* must have non-negative elements')
+
+    # Check: rate>=rate_c
+    if np.any(rates_b < rate_c):
+        raise ValueError('all elements of *rate* must be >= *rate_c*')
+
+    # Check min_delay < 1./rate_c
+    if not (rate_c == 0 * Hz or min_delay < 1. / rate_c):
+        raise ValueError(
+            "'*min_delay* (%s) must be lower than 1/*rate_c* (%s)." %
+            (str(min_delay), str((1. / rate_c).rescale(min_delay.units))))
+
+    return rates_b
+
+
 def single_interaction_process(
         rate, rate_c, t_stop, n=2, jitter=0 * ms, coincidences='deterministic',
-        t_start=0 * ms, min_delay=0 * ms, return_coinc=False):
+        t_start=0 * ms, min_delay=0 * ms, return_coinc=False,
+        random_state=None):
     """
     Generates a multidimensional Poisson SIP (single interaction process)
     plus independent Poisson processes
@@ -597,6 +1231,10 @@ def single_interaction_process(
     return_coinc: bool, optional
         Whether to return the coincidence times for the SIP process
         Default: False
+    random_state: None, int, np.random.RandomState or np.random.Generator,
+                  optional
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
 
     Returns
@@ -622,41 +1260,18 @@ def single_interaction_process(
     *************************************************************************
     """
 
-    # Check if n is a positive integer
-    if not (isinstance(n, int) and n > 0):
-        raise ValueError('n (=%s) must be a positive integer' % str(n))
+    rates_b = _sip_rates(rate, rate_c, n, min_delay)
 
     # Assign time unit to jitter, or check that its existing unit is a time
     # unit
     jitter = abs(jitter)
 
-    # Define the array of rates from input argument rate. Check that its length
-    # matches with n
-    if rate.ndim == 0:
-        if rate < 0 * Hz:
-            raise ValueError(
-                'rate (=%s) must be non-negative.' % str(rate))
-        rates_b = np.array(
-            [rate.magnitude for _ in range(n)]) * rate.units
-    else:
-        rates_b = np.array(rate).flatten() * rate.units
-        if not all(rates_b >= 0. * Hz):
-            raise ValueError('*rate* must have non-negative elements')
-
-    # Check: rate>=rate_c
-    if np.any(rates_b < rate_c):
-        raise ValueError('all elements of *rate* must be >= *rate_c*')
-
-    # Check min_delay < 1./rate_c
-    if not (rate_c == 0 * Hz or min_delay < 1. / rate_c):
-        raise ValueError(
-            "'*min_delay* (%s) must be lower than 1/*rate_c* (%s)." %
-            (str(min_delay), str((1. / rate_c).rescale(min_delay.units))))
-
     # Generate the n Poisson processes there are the basis for the SIP
     # (coincidences still lacking)
+    random_state = get_random_state(random_state)
     embedded_poisson_trains = _n_poisson(
-        rate=rates_b - rate_c, t_stop=t_stop, t_start=t_start)
+        rate=rates_b - rate_c, t_stop=t_stop, t_start=t_start,
+        random_state=random_state)
     # Convert the trains from neo SpikeTrain objects to simpler Quantity
     # objects
     embedded_poisson_trains = [
@@ -669,13 +1284,15 @@ def single_interaction_process(
         Nr_coinc = int(((t_stop - t_start) * rate_c).rescale(dimensionless))
         while True:
             coinc_times = t_start + \
-                np.sort(np.random.random(Nr_coinc)) * (t_stop - t_start)
+                np.sort(random_state.uniform(size=Nr_coinc)) * \
+                (t_stop - t_start)
             if len(coinc_times) < 2 or min(np.diff(coinc_times)) >= min_delay:
                 break
     elif coincidences == 'stochastic':
         while True:
             coinc_times = homogeneous_poisson_process(
-                rate=rate_c, t_stop=t_stop, t_start=t_start)
+                rate=rate_c, t_stop=t_stop, t_start=t_start,
+                random_state=random_state)
             if len(coinc_times) < 2 or min(np.diff(coinc_times)) >= min_delay:
                 break
         # Convert coinc_times from a neo SpikeTrain object to a Quantity object
@@ -690,8 +1307,8 @@ def single_interaction_process(
     # Replicate coinc_times n times, and jitter each event in each array by
     # +/- jitter (within (t_start, t_stop))
     embedded_coinc = coinc_times + \
-        np.random.random(
-            (len(rates_b), len(coinc_times))) * 2 * jitter - jitter
+        random_state.uniform(
+            size=(len(rates_b), len(coinc_times))) * 2 * jitter - jitter
     embedded_coinc = embedded_coinc + \
         (t_start - embedded_coinc) * (embedded_coinc < t_start) - \
         (t_stop - embedded_coinc) * (embedded_coinc > t_stop)
@@ -803,7 +1420,7 @@ def _pool_spiketrains(trains, extremes='inner'):
     return merge_trains
 
 
-def _sample_int_from_pdf(a, n):
+def _sample_int_from_pdf(a, n, random_state=None):
     """
     Draw n independent samples from the set {0,1,...,L}, where L=len(a)-1,
     according to the probability distribution a.
@@ -819,18 +1436,22 @@ def _sample_int_from_pdf(a, n):
     n: int
         Number of samples generated with the function
 
+    random_state: None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+
     Output
     -------
     array of n samples taking values between 0 and n=len(a)-1.
     """
 
     A = np.cumsum(a)  # cumulative distribution of a
-    u = np.random.uniform(0, 1, size=n)
+    u = get_random_state(random_state).uniform(0, 1, size=n)
     U = np.array([u for i in a]).T  # copy u (as column vector) len(a) times
     return (A < U).sum(axis=1)
 
 
-def _mother_proc_cpp_stat(A, t_stop, rate, t_start=0 * ms):
+def _mother_proc_cpp_stat(A, t_stop, rate, t_start=0 * ms,
+                          random_state=None):
     """
     Generate the hidden ("mother") Poisson process for a Compound Poisson
     Process (CPP).
@@ -850,6 +1471,9 @@ def _mother_proc_cpp_stat(A, t_stop, rate, t_start=0 * ms):
     t_start : quantities.Quantity, optional
         The starting time of the mother process
         Default: 0 ms
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Output
     ------
@@ -859,10 +1483,11 @@ def _mother_proc_cpp_stat(A, t_stop, rate, t_start=0 * ms):
     exp_A = np.dot(A, range(N + 1))  # expected value of a
     exp_mother = (N * rate) / float(exp_A)  # rate of the mother process
     return homogeneous_poisson_process(
-        rate=exp_mother, t_stop=t_stop, t_start=t_start)
+        rate=exp_mother, t_stop=t_stop, t_start=t_start,
+        random_state=random_state)
 
 
-def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
+def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms, random_state=None):
     """
     Generate a Compound Poisson Process (CPP) with amplitude distribution
     A and heterogeneous firing rates r=r[0], r[1], ..., r[-1].
@@ -880,6 +1505,9 @@ def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
     t_start : quantities.Quantity, optional
         The start time of the output spike trains
         Default: 0 ms
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Output
     ------
@@ -888,9 +1516,11 @@ def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
     """
 
     # Generate mother process and associated spike labels
+    random_state = get_random_state(random_state)
     mother = _mother_proc_cpp_stat(
-        A=A, t_stop=t_stop, rate=rate, t_start=t_start)
-    labels = _sample_int_from_pdf(A, len(mother))
+        A=A, t_stop=t_stop, rate=rate, t_start=t_start,
+        random_state=random_state)
+    labels = _sample_int_from_pdf(A, len(mother), random_state=random_state)
 
     N = len(A) - 1  # Number of trains in output
 
@@ -900,7 +1530,7 @@ def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
         # for each spike, take its label l
         for spike_id, l in enumerate(labels):
             # choose l random trains
-            train_ids = random.sample(range(N), l)
+            train_ids = random_state.choice(N, l, replace=False)
             # and set the spike matrix for that train
             for train_id in train_ids:
                 spike_matrix[train_id, spike_id] = True  # and spike to True
@@ -913,7 +1543,7 @@ def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
         print('memory case')
         times = [[] for i in range(N)]
         for t, l in zip(mother, labels):
-            train_ids = random.sample(range(N), l)
+            train_ids = random_state.choice(N, l, replace=False)
             for train_id in train_ids:
                 times[train_id].append(t)
 
@@ -923,7 +1553,7 @@ def _cpp_hom_stat(A, t_stop, rate, t_start=0 * ms):
     return trains
 
 
-def _cpp_het_stat(A, t_stop, rate, t_start=0. * ms):
+def _cpp_het_stat(A, t_stop, rate, t_start=0. * ms, random_state=None):
     """
     Generate a Compound Poisson Process (CPP) with amplitude distribution
     A and heterogeneous firing rates r=r[0], r[1], ..., r[-1].
@@ -941,6 +1571,9 @@ def _cpp_het_stat(A, t_stop, rate, t_start=0. * ms):
     t_start : quantities.Quantity, optional
         The start time of the output spike trains
         Default: 0 ms
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Output
     ------
@@ -965,18 +1598,38 @@ def _cpp_het_stat(A, t_stop, rate, t_start=0. * ms):
     # Compute the amplitude distrib of the correlated CPP, and generate it
     a = [(r_mother * i) / float(r2) for i in A]
     a[1] = a[1] - r1 / float(r2)
-    CPP = _cpp_hom_stat(a, t_stop, r_min, t_start)
+    random_state = get_random_state(random_state)
+    CPP = _cpp_hom_stat(a, t_stop, r_min, t_start, random_state=random_state)
 
     # Generate the independent heterogeneous Poisson processes
     POISS = [
-        homogeneous_poisson_process(i - r_min, t_start, t_stop) for i in rate]
+        homogeneous_poisson_process(i - r_min, t_start, t_stop,
+                                    random_state=random_state)
+        for i in rate]
 
     # Pool the correlated CPP and the corresponding Poisson processes
     out = [_pool_two_spiketrains(CPP[i], POISS[i]) for i in range(N)]
     return out
 
 
-def compound_poisson_process(rate, A, t_stop, shift=None, t_start=0 * ms):
+def _check_cpp_params(rate, A):
+    """
+    Checks the parameters of `compound_poisson_process()`.
+    """
+    # Check A is a probability distribution (it sums to 1 and is positive)
+    if abs(sum(A) - 1) > np.finfo('float').eps:
+        raise ValueError(
+            'A must be a probability vector, sum(A)= %f !=1' % (sum(A)))
+    if any([a < 0 for a in A]):
+        raise ValueError(
+            'A must be a probability vector, all the elements of must be >0')
+    # Check that the rate is not an empty Quantity
+    if rate.ndim == 1 and len(rate.magnitude) == 0:
+        raise ValueError('Rate is an empty Quantity array')
+
+
+def compound_poisson_process(rate, A, t_stop, shift=None, t_start=0 * ms,
+                             random_state=None):
     """
     Generate a Compound Poisson Process (CPP; see [1]) with a given amplitude
     distribution A and stationary marginal rates r.
@@ -1016,6 +1669,10 @@ def compound_poisson_process(rate, A, t_stop, shift=None, t_start=0 * ms):
     t_start : quantities.Quantity, optional
         The t_start time of the output spike trains.
         Default: 0 s
+    random_state : None, int, np.random.RandomState or np.random.Generator,
+                   optional
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -1027,37 +1684,302 @@ def compound_poisson_process(rate, A, t_stop, shift=None, t_start=0 * ms):
     ----------
     [1] Staude, Rotter, Gruen (2010) J Comput Neurosci 29:327-350.
     """
-    # Check A is a probability distribution (it sums to 1 and is positive)
-    if abs(sum(A) - 1) > np.finfo('float').eps:
-        raise ValueError(
-            'A must be a probability vector, sum(A)= %f !=1' % (sum(A)))
-    if any([a < 0 for a in A]):
-        raise ValueError(
-            'A must be a probability vector, all the elements of must be >0')
-    # Check that the rate is not an empty Quantity
-    if rate.ndim == 1 and len(rate.magnitude) == 0:
-        raise ValueError('Rate is an empty Quantity array')
+    _check_cpp_params(rate, A)
     # Return empty spike trains for specific parameters
-    elif A[0] == 1 or np.sum(np.abs(rate.magnitude)) == 0:
+    if A[0] == 1 or np.sum(np.abs(rate.magnitude)) == 0:
         return [
             SpikeTrain([] * t_stop.units, t_stop=t_stop,
                        t_start=t_start) for i in range(len(A) - 1)]
     else:
+        random_state = get_random_state(random_state)
         # Homogeneous rates
         if rate.ndim == 0:
-            cpp = _cpp_hom_stat(A=A, t_stop=t_stop, rate=rate, t_start=t_start)
+            cpp = _cpp_hom_stat(A=A, t_stop=t_stop, rate=rate,
+                                t_start=t_start, random_state=random_state)
         # Heterogeneous rates
         else:
-            cpp = _cpp_het_stat(A=A, t_stop=t_stop, rate=rate, t_start=t_start)
+            cpp = _cpp_het_stat(A=A, t_stop=t_stop, rate=rate,
+                                t_start=t_start, random_state=random_state)
 
         if shift is None:
             return cpp
         # Dither the output spiketrains
         else:
             cpp = [
-                dither_spike_train(cp, shift=shift, edges=True)[0]
+                dither_spike_train(cp, shift=shift, edges=True,
+                                   random_state=random_state)[0]
                 for cp in cpp]
             return cpp
 
 # Alias for the compound poisson process
 cpp = compound_poisson_process
+
+
+def _stream_chunks(generate, num_trains, t_start, t_stop, chunk_duration,
+                   lag):
+    """
+    Yields spike trains generated in consecutive time chunks.
+
+    `generate(start, stop)` returns the spike times, in units of `t_stop`,
+    of each of the `num_trains` spike trains generated in `[start, stop)`,
+    which may be displaced by up to `lag` (in units of `t_stop`) out of
+    this interval. Chunks are generated ahead as far as needed, and spikes
+    displaced into a later chunk are held until that chunk is yielded, so
+    that the chunks together form one realization in `[t_start, t_stop]`.
+    Spikes displaced out of `[t_start, t_stop]` are dropped.
+
+    Yields
+    ------
+    list of neo.SpikeTrain
+        The spike trains in one chunk of duration `chunk_duration`; the
+        last chunk ends at `t_stop` and may be shorter.
+    """
+    units = t_stop.units
+    start = t_start.rescale(units).magnitude.item()
+    stop = t_stop.magnitude.item()
+    step = chunk_duration.rescale(units).magnitude.item()
+    num_chunks = max(int(np.ceil((stop - start) / step)), 1)
+    edges = np.minimum(start + np.arange(num_chunks + 1) * step, stop)
+    edges[-1] = stop
+    pending = [np.zeros(0)] * num_trains
+    generated = 0
+    for k in range(num_chunks):
+        left, right = edges[k], edges[k + 1]
+        # generate all chunks whose spikes can be displaced into this one
+        while generated < num_chunks and edges[generated] < right + lag:
+            new = generate(edges[generated], edges[generated + 1])
+            pending = [np.concatenate((old, times))
+                       for old, times in zip(pending, new)]
+            generated += 1
+        if k == num_chunks - 1:
+            inside = [times <= right for times in pending]
+        else:
+            inside = [times < right for times in pending]
+        trains = []
+        for i, times in enumerate(pending):
+            chunk = times[inside[i]]
+            trains.append(SpikeTrain(
+                np.sort(chunk[chunk >= left]), units=units,
+                t_start=left * units, t_stop=right * units))
+            pending[i] = times[~inside[i]]
+        yield trains
+
+
+def _check_chunk_duration(chunk_duration):
+    if not isinstance(chunk_duration, Quantity) or chunk_duration <= 0:
+        raise ValueError('chunk_duration must be a positive pq.Quantity')
+
+
+def compound_poisson_process_chunks(rate, A, t_stop, chunk_duration,
+                                    shift=None, t_start=0 * ms,
+                                    random_state=None):
+    """
+    Generates a Compound Poisson Process (CPP) like
+    `compound_poisson_process()`, but yields it in consecutive time chunks,
+    so that the whole realization is never held in memory.
+
+    The mother process and the independent Poisson processes are memoryless,
+    so generating them chunk by chunk gives the same statistics as
+    generating them at once. With `shift`, each spike train is shifted by
+    one random amount for the whole duration, and spikes shifted across a
+    chunk border are yielded with the chunk they are shifted into.
+
+    Parameters
+    ----------
+    rate, A, t_stop, shift, t_start :
+        See `compound_poisson_process()`.
+    chunk_duration : quantities.Quantity
+        The duration of a chunk. The last chunk ends at `t_stop` and may be
+        shorter.
+    random_state : None, int, np.random.RandomState or np.random.Generator,
+                   optional
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
+
+    Returns
+    -------
+    generator of lists of neo.SpikeTrain
+        The len(A)-1 spike trains of each chunk, whose `t_start` and
+        `t_stop` are the borders of the chunk.
+
+    Raises
+    ------
+    ValueError : If `A` is not a probability vector, `rate` is empty, or
+        `chunk_duration` is not positive.
+
+    Examples
+    --------
+        >>> import quantities as pq
+        >>> import elephant.conversion as conv
+        >>> counts = 0
+        >>> for chunk in compound_poisson_process_chunks(
+        ...         5 * pq.Hz, [0.9, 0.05, 0.05], t_stop=3600 * pq.s,
+        ...         chunk_duration=10 * pq.s):
+        ...     counts += conv.BinnedSpikeTrain(
+        ...         chunk, binsize=1 * pq.s).to_array().sum()
+
+    """
+    _check_cpp_params(rate, A)
+    _check_chunk_duration(chunk_duration)
+    random_state = get_random_state(random_state)
+    units = t_stop.units
+    num_trains = len(A) - 1
+    if shift is None:
+        shifts = np.zeros(num_trains)
+    else:
+        shift = shift.rescale(units).magnitude
+        shifts = 2 * shift * random_state.uniform(size=num_trains) - shift
+    empty = A[0] == 1 or np.sum(np.abs(rate.magnitude)) == 0
+
+    def generate(start, stop):
+        if empty:
+            return [np.zeros(0)] * num_trains
+        start, stop = start * units, stop * units
+        if rate.ndim == 0:
+            trains = _cpp_hom_stat(A=A, t_stop=stop, rate=rate,
+                                   t_start=start, random_state=random_state)
+        else:
+            trains = _cpp_het_stat(A=A, t_stop=stop, rate=rate,
+                                   t_start=start, random_state=random_state)
+        return [train.rescale(units).magnitude + train_shift
+                for train, train_shift in zip(trains, shifts)]
+
+    lag = np.abs(shifts).max() if num_trains else 0.
+    return _stream_chunks(generate, num_trains, t_start, t_stop,
+                          chunk_duration, lag)
+
+
+def single_interaction_process_chunks(
+        rate, rate_c, t_stop, chunk_duration, n=2, jitter=0 * ms,
+        coincidences='deterministic', t_start=0 * ms, min_delay=0 * ms,
+        return_coinc=False, random_state=None):
+    """
+    Generates a single interaction process (SIP) like
+    `single_interaction_process()`, but yields it in consecutive time
+    chunks, so that the whole realization is never held in memory.
+
+    The independent background spikes are generated chunk by chunk. The
+    `N` coincidence times are streamed in order: `N` sorted uniform times
+    in `[0, T - (N - 1) * min_delay]` are split among the chunks by
+    binomial draws, and the `i`-th time is delayed by `i * min_delay`. This
+    samples exactly the uniform coincidence times conditioned on being at
+    least `min_delay` apart, which `single_interaction_process()` obtains by
+    rejection. With `coincidences='stochastic'`, `N` is drawn from the
+    Poisson distribution conditioned the same way. Coincident spikes
+    jittered across a chunk border are yielded with the chunk they are
+    jittered into.
+
+    Parameters
+    ----------
+    rate, rate_c, t_stop, n, jitter, coincidences, t_start, min_delay :
+        See `single_interaction_process()`.
+    chunk_duration : quantities.Quantity
+        The duration of a chunk. The last chunk ends at `t_stop` and may be
+        shorter.
+    return_coinc : bool, optional
+        Whether to yield the coincident spikes of each chunk as well.
+        Default: False
+    random_state : None, int, np.random.RandomState or np.random.Generator,
+                   optional
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
+
+    Returns
+    -------
+    generator of lists of neo.SpikeTrain
+        The spike trains of each chunk, whose `t_start` and `t_stop` are the
+        borders of the chunk. If `return_coinc` is True, tuples of the spike
+        trains and of the coincident spikes of each chunk.
+
+    Raises
+    ------
+    ValueError : If the parameters are invalid, see
+        `single_interaction_process()`, or `chunk_duration` is not positive.
+    """
+    rates_b = _sip_rates(rate, rate_c, n, min_delay)
+    _check_chunk_duration(chunk_duration)
+    if coincidences not in ('deterministic', 'stochastic'):
+        raise ValueError(
+            "coincidences must be 'deterministic' or 'stochastic'")
+    random_state = get_random_state(random_state)
+    units = t_stop.units
+    start = t_start.rescale(units).magnitude.item()
+    stop = t_stop.magnitude.item()
+    duration = stop - start
+    step = chunk_duration.rescale(units).magnitude.item()
+    jitter = abs(jitter).rescale(units).magnitude.item()
+    delay = min_delay.rescale(units).magnitude.item()
+    num_trains = len(rates_b)
+
+    # Number of coincidences
+    expected = (rate_c * (t_stop - t_start)).simplified.magnitude.item()
+    if coincidences == 'deterministic':
+        num_coinc = int(expected)
+        if num_coinc > 1 and (num_coinc - 1) * delay > duration:
+            raise ValueError('%d coincidences do not fit min_delay (%s)' %
+                             (num_coinc, min_delay))
+    else:
+        while True:
+            num_coinc = random_state.poisson(expected)
+            if num_coinc < 2 or random_state.uniform() < max(
+                    1 - (num_coinc - 1) * delay / duration, 0) ** num_coinc:
+                break
+
+    def coincidence_blocks():
+        # sorted uniform times in [0, length], in blocks of width step
+        length = duration - max(num_coinc - 1, 0) * delay
+        remaining, position, rank = num_coinc, 0., 0
+        while remaining > 0:
+            if position + step >= length:
+                width, count = length - position, remaining
+            else:
+                width = step
+                count = random_state.binomial(
+                    remaining, width / (length - position))
+            times = position + np.sort(random_state.uniform(size=count)) * \
+                width
+            yield start + times + (rank + np.arange(count)) * delay
+            position += width
+            rank += count
+            remaining -= count
+
+    blocks = coincidence_blocks()
+    # coincidence times drawn but not yet used
+    coinc_pending = [np.zeros(0)]
+
+    def next_coincidences(chunk_stop):
+        times = coinc_pending[0]
+        while not len(times) or times[-1] < chunk_stop:
+            block = next(blocks, None)
+            if block is None:
+                break
+            times = np.concatenate((times, block))
+        if chunk_stop >= stop:
+            coinc_pending[0] = np.zeros(0)
+            return times
+        coinc_pending[0] = times[times >= chunk_stop]
+        return times[times < chunk_stop]
+
+    def generate(chunk_start, chunk_stop):
+        coinc = next_coincidences(chunk_stop)
+        if coincidences == 'stochastic':
+            coinc = np.minimum(coinc, stop - jitter)
+        background, offsets = homogeneous_poisson_process_batch(
+            rates_b - rate_c, t_start=chunk_start * units,
+            t_stop=chunk_stop * units, random_state=random_state)
+        background = background.magnitude
+        embedded = coinc + random_state.uniform(
+            size=(num_trains, len(coinc))) * 2 * jitter - jitter
+        embedded = np.clip(embedded, start, stop)
+        trains = [np.concatenate((background[offsets[i]:offsets[i + 1]],
+                                  embedded[i])) for i in range(num_trains)]
+        if return_coinc:
+            trains.extend(embedded)
+        return trains
+
+    chunks = _stream_chunks(
+        generate, 2 * num_trains if return_coinc else num_trains, t_start,
+        t_stop, chunk_duration, jitter)
+    if not return_coinc:
+        return chunks
+    return ((trains[:num_trains], trains[num_trains:]) for trains in chunks)
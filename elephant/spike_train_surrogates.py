@@ -43,9 +43,11 @@ try:
     isi = es.isi
 except ImportError:
     from .statistics import isi  # Convenience when in elephant working dir.
+from elephant.utils import get_random_state
 
 
-def dither_spikes(spiketrain, dither, n=1, decimals=None, edges=True):
+def dither_spikes(spiketrain, dither, n=1, decimals=None, edges=True,
+                  random_state=None):
     """
     Generates surrogates of a spike train by spike dithering.
 
@@ -78,6 +80,9 @@ def dither_spikes(spiketrain, dither, n=1, decimals=None, edges=True):
         (for edges = True) or set that to the range's closest end
         (for edges = False).
         Default: True
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -109,8 +114,9 @@ def dither_spikes(spiketrain, dither, n=1, decimals=None, edges=True):
     data = spiketrain.view(pq.Quantity)
 
     # Main: generate the surrogates
-    surr = data.reshape((1, len(data))) + 2 * dither * np.random.random_sample(
-        (n, len(data))) - dither
+    random_state = get_random_state(random_state)
+    surr = data.reshape((1, len(data))) + 2 * dither * random_state.uniform(
+        size=(n, len(data))) - dither
 
     # Round the surrogate data to decimal position, if requested
     if decimals is not None:
@@ -136,7 +142,7 @@ def dither_spikes(spiketrain, dither, n=1, decimals=None, edges=True):
             for s in surr]
 
 
-def randomise_spikes(spiketrain, n=1, decimals=None):
+def randomise_spikes(spiketrain, n=1, decimals=None, random_state=None):
     """
     Generates surrogates of a spike trains by spike time randomisation.
 
@@ -158,6 +164,9 @@ def randomise_spikes(spiketrain, n=1, decimals=None):
         Number of decimal points for every spike time in the surrogates
         If None, machine precision is used.
         Default: None
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -186,8 +195,9 @@ def randomise_spikes(spiketrain, n=1, decimals=None):
     """
 
     # Create surrogate spike trains as rows of a Quantity array
+    random_state = get_random_state(random_state)
     sts = ((spiketrain.t_stop - spiketrain.t_start) *
-           np.random.random(size=(n, len(spiketrain))) +
+           random_state.uniform(size=(n, len(spiketrain))) +
            spiketrain.t_start).rescale(spiketrain.units)
 
     # Round the surrogate data to decimal position, if requested
@@ -199,7 +209,7 @@ def randomise_spikes(spiketrain, n=1, decimals=None):
             for st in sts]
 
 
-def shuffle_isis(spiketrain, n=1, decimals=None):
+def shuffle_isis(spiketrain, n=1, decimals=None, random_state=None):
     """
     Generates surrogates of a neo.SpikeTrain object by inter-spike-interval
     (ISI) shuffling.
@@ -220,6 +230,9 @@ def shuffle_isis(spiketrain, n=1, decimals=None):
         Number of decimal points for every spike time in the surrogates
         If None, machine precision is used.
         Default: None
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -254,9 +267,10 @@ def shuffle_isis(spiketrain, n=1, decimals=None):
             ISIs = ISIs.round(decimals)
 
         # Create list of surrogate spike trains by random ISI permutation
+        random_state = get_random_state(random_state)
         sts = []
         for i in range(n):
-            surr_times = np.cumsum(np.random.permutation(ISIs)) *\
+            surr_times = np.cumsum(random_state.permutation(ISIs)) *\
                 spiketrain.units + spiketrain.t_start
             sts.append(neo.SpikeTrain(
                 surr_times, t_start=spiketrain.t_start,
@@ -273,7 +287,8 @@ def shuffle_isis(spiketrain, n=1, decimals=None):
     return sts
 
 
-def dither_spike_train(spiketrain, shift, n=1, decimals=None, edges=True):
+def dither_spike_train(spiketrain, shift, n=1, decimals=None, edges=True,
+                       random_state=None):
     """
     Generates surrogates of a neo.SpikeTrain by spike train shifting.
 
@@ -305,6 +320,9 @@ def dither_spike_train(spiketrain, shift, n=1, decimals=None, edges=True):
         spiketrain.t_stop)`, whether to drop them out (for edges = True) or set
         that to the range's closest end (for edges = False).
         Default: True
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -337,8 +355,9 @@ def dither_spike_train(spiketrain, shift, n=1, decimals=None, edges=True):
     data = spiketrain.view(pq.Quantity)
 
     # Main: generate the surrogates by spike train shifting
+    random_state = get_random_state(random_state)
     surr = data.reshape((1, len(data))) + 2 * shift * \
-        np.random.random_sample((n, 1)) - shift
+        random_state.uniform(size=(n, 1)) - shift
 
     # Round the surrogate data to decimal position, if requested
     if decimals is not None:
@@ -363,7 +382,7 @@ def dither_spike_train(spiketrain, shift, n=1, decimals=None, edges=True):
             for s in surr]
 
 
-def jitter_spikes(spiketrain, binsize, n=1):
+def jitter_spikes(spiketrain, binsize, n=1, random_state=None):
     """
     Generates surrogates of a :attr:`spiketrain` by spike jittering.
 
@@ -387,6 +406,9 @@ def jitter_spikes(spiketrain, binsize, n=1):
     n : int (optional)
         Number of surrogates to be generated.
         Default: 1
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -427,7 +449,8 @@ def jitter_spikes(spiketrain, binsize, n=1):
     bin_edges = np.hstack([bin_edges, stop_dl])
 
     # Create n surrogates with spikes randomly placed in the interval (0,1)
-    surr_poiss01 = np.random.random_sample((n, len(spiketrain)))
+    surr_poiss01 = get_random_state(random_state).uniform(
+        size=(n, len(spiketrain)))
 
     # Compute the bin id of each spike
     bin_ids = np.array(
@@ -453,7 +476,7 @@ def jitter_spikes(spiketrain, binsize, n=1):
 
 def surrogates(
         spiketrain, n=1, surr_method='dither_spike_train', dt=None, decimals=None,
-        edges=True):
+        edges=True, random_state=None):
     """
     Generates surrogates of a :attr:`spiketrain` by a desired generation
     method.
@@ -495,6 +518,9 @@ def surrogates(
         spiketrain.t_stop)`, whether to drop them out (for edges = True) or set
         that to the range's closest end (for edges = False).
         Default: True
+    random_state : None, int, np.random.RandomState or np.random.Generator
+        The source of randomness, see `elephant.utils.get_random_state()`.
+        Default: None
 
     Returns
     -------
@@ -517,7 +543,8 @@ def surrogates(
 
     if surr_method in ['dither_spike_train', 'dither_spikes', 'jitter_spikes']:
         return surrogate_types[surr_method](
-            spiketrain, dt, n=n, decimals=decimals, edges=edges)
+            spiketrain, dt, n=n, decimals=decimals, edges=edges,
+            random_state=random_state)
     elif surr_method in ['randomise_spikes', 'shuffle_isis']:
         return surrogate_types[surr_method](
-            spiketrain, n=n, decimals=decimals)
+            spiketrain, n=n, decimals=decimals, random_state=random_state)
@@ -11,12 +11,16 @@ from __future__ import division, print_function
 import numpy as np
 import quantities as pq
 import scipy.stats
+import scipy.fftpack
 import scipy.signal
 import neo
 from neo.core import SpikeTrain
 import elephant.conversion as conv
 import elephant.kernels as kernels
+from elephant.utils import get_random_state
+import itertools
 import warnings
+from multiprocessing.pool import ThreadPool
 # warnings.simplefilter('always', DeprecationWarning)
 
 
@@ -311,6 +315,227 @@ def cv2(v):
     return 2. * np.mean(np.absolute(np.diff(v)) / (v[:-1] + v[1:]))
 
 
+def _segment_ids(offsets):
+    """
+    Returns the index of the segment of each element of a ragged array
+    delimited by `offsets`.
+    """
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _segment_mean(values, offsets):
+    """
+    Returns the mean of each segment of a ragged array, or nan for empty
+    segments.
+    """
+    counts = np.diff(offsets)
+    sums = np.bincount(_segment_ids(offsets), weights=values,
+                       minlength=len(counts))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def _inner_pairs(offsets):
+    """
+    Returns a mask of the consecutive pairs `(x[k], x[k + 1])` of a ragged
+    array `x` delimited by `offsets` whose elements belong to the same
+    segment, and the offsets of these pairs.
+    """
+    counts = np.diff(offsets)
+    mask = np.ones(max(offsets[-1] - 1, 0), dtype=bool)
+    # the pair of the last element of a segment and the next segment
+    last = offsets[1:-1][counts[:-1] > 0] - 1
+    mask[last[last < len(mask)]] = False
+    pair_offsets = np.r_[0, np.cumsum(np.maximum(counts - 1, 0))]
+    return mask, pair_offsets.astype(int)
+
+
+def isi_batch(times, offsets):
+    """
+    Returns the inter-spike intervals of many spike trains at once.
+
+    The spike trains are given as a ragged array, see
+    `elephant.conversion.ragged_spike_times`, and their intervals are
+    computed with one `np.diff` of all spike times.
+
+    Parameters
+    ----------
+    times : quantities.Quantity or np.ndarray
+        The spike times of all spike trains, sorted within each spike train.
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the `n` spike trains in `times`.
+
+    Returns
+    -------
+    intervals : quantities.Quantity or np.ndarray
+        The inter-spike intervals of all spike trains, in the units of
+        `times`.
+    isi_offsets : np.ndarray
+        Array of length `n + 1` delimiting the intervals of each spike train
+        in `intervals`.
+
+    See also
+    --------
+    isi
+
+    """
+    offsets = np.asarray(offsets)
+    mask, isi_offsets = _inner_pairs(offsets)
+    return np.diff(times)[mask], isi_offsets
+
+
+def lv_batch(times, offsets):
+    """
+    Calculates the measure of local variation LV of the inter-spike
+    intervals of many spike trains at once, see `lv()`.
+
+    Parameters
+    ----------
+    times : quantities.Quantity or np.ndarray
+        The spike times of all spike trains, sorted within each spike train.
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the `n` spike trains in `times`,
+        see `elephant.conversion.ragged_spike_times`.
+
+    Returns
+    -------
+    np.ndarray
+        The LV of each spike train, or nan for spike trains with less than
+        three spikes.
+
+    See also
+    --------
+    lv
+
+    """
+    v, isi_offsets = isi_batch(np.asarray(times), offsets)
+    mask, pair_offsets = _inner_pairs(isi_offsets)
+    ratios = (np.diff(v) / (v[:-1] + v[1:]))[mask]
+    return 3. * _segment_mean(ratios ** 2, pair_offsets)
+
+
+def cv2_batch(times, offsets):
+    """
+    Calculates the measure of CV2 of the inter-spike intervals of many spike
+    trains at once, see `cv2()`.
+
+    Parameters
+    ----------
+    times : quantities.Quantity or np.ndarray
+        The spike times of all spike trains, sorted within each spike train.
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the `n` spike trains in `times`,
+        see `elephant.conversion.ragged_spike_times`.
+
+    Returns
+    -------
+    np.ndarray
+        The CV2 of each spike train, or nan for spike trains with less than
+        three spikes.
+
+    See also
+    --------
+    cv2
+
+    """
+    v, isi_offsets = isi_batch(np.asarray(times), offsets)
+    mask, pair_offsets = _inner_pairs(isi_offsets)
+    ratios = (np.absolute(np.diff(v)) / (v[:-1] + v[1:]))[mask]
+    return 2. * _segment_mean(ratios, pair_offsets)
+
+
+def mean_firing_rate_batch(times, offsets, t_start, t_stop):
+    """
+    Returns the firing rates of many spike trains at once, see
+    `mean_firing_rate()`.
+
+    Parameters
+    ----------
+    times : quantities.Quantity or np.ndarray
+        The spike times of all spike trains.
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting the `n` spike trains in `times`,
+        see `elephant.conversion.ragged_spike_times`.
+    t_start, t_stop : float, quantities scalar or array of length `n`
+        Start and stop time of the interval of each spike train (or of all
+        spike trains). Spikes outside of `[t_start, t_stop]` are ignored.
+
+    Returns
+    -------
+    np.ndarray or quantities.Quantity
+        The firing rate of each spike train, in the inverse units of `times`
+        if it is a quantity array.
+
+    Raises
+    ------
+    TypeError
+        If `times` is a numpy array and `t_start` or `t_stop` is a quantity.
+
+    See also
+    --------
+    mean_firing_rate
+
+    """
+    offsets = np.asarray(offsets)
+    units = getattr(times, 'units', None)
+    bounds = []
+    for bound in (t_start, t_stop):
+        if isinstance(bound, pq.Quantity):
+            if units is None:
+                raise TypeError('t_start and t_stop cannot be quantities if '
+                                'times is not a quantity')
+            bound = bound.rescale(units).magnitude
+        bounds.append(np.broadcast_to(np.asarray(bound, dtype=float),
+                                      (len(offsets) - 1,)))
+    t_start, t_stop = bounds
+    ids = _segment_ids(offsets)
+    times = np.asarray(times)
+    inside = (times >= t_start[ids]) & (times <= t_stop[ids])
+    counts = np.bincount(ids[inside], minlength=len(offsets) - 1)
+    rates = counts / (t_stop - t_start)
+    if units is not None:
+        rates = rates / units
+    return rates
+
+
+def fanofactor_batch(offsets, group_offsets=None):
+    """
+    Evaluates the Fano factor of the spike counts of many groups of spike
+    trains at once, e.g. of the trials of many units, see `fanofactor()`.
+
+    Parameters
+    ----------
+    offsets : np.ndarray
+        Array of length `n + 1` delimiting `n` spike trains in a ragged array
+        of spike times, see `elephant.conversion.ragged_spike_times`. Only
+        the spike counts `np.diff(offsets)` are used.
+    group_offsets : np.ndarray or None
+        Array of length `m + 1` delimiting `m` groups of consecutive spike
+        trains. If None, all spike trains form one group.
+        Default is `None`
+
+    Returns
+    -------
+    np.ndarray
+        The Fano factor of each group, or nan for groups without spikes.
+
+    See also
+    --------
+    fanofactor
+
+    """
+    counts = np.diff(offsets).astype(float)
+    if group_offsets is None:
+        group_offsets = [0, len(counts)]
+    group_offsets = np.asarray(group_offsets)
+    mean = _segment_mean(counts, group_offsets)
+    var = _segment_mean(counts ** 2, group_offsets) - mean ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fano = np.maximum(var, 0) / mean
+    fano[~(mean > 0)] = np.nan
+    return fano
+
+
 # sigma2kw and kw2sigma only needed for oldfct_instantaneous_rate!
 # to finally be taken out of Elephant
 
@@ -651,16 +876,26 @@ def oldfct_instantaneous_rate(spiketrain, sampling_period, form,
 
 
 def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
-                       cutoff=5.0, t_start=None, t_stop=None, trim=False):
+                       cutoff=5.0, t_start=None, t_stop=None, trim=False,
+                       method='auto'):
 
     """
     Estimates instantaneous firing rate by kernel convolution.
 
+    Several spike trains are processed in one batch: the kernel is
+    evaluated once, the spikes of all spike trains are histogrammed in a
+    single pass, and the resulting time x spike train matrix is convolved
+    with the kernel in one FFT.
+
     Parameters
     -----------
-    spiketrain : 'neo.SpikeTrain'
+    spiketrain : 'neo.SpikeTrain', list of 'neo.SpikeTrain' or
+                 elephant.conversion.BinnedSpikeTrain
         Neo object that contains spike times, the unit of the time stamps
-        and t_start and t_stop of the spike train.
+        and t_start and t_stop of the spike train, or a list of such
+        objects. Spike trains already binned with a bin size equal to
+        `sampling_period` can be given as a `BinnedSpikeTrain`, whose bins
+        are used as the time vector.
     sampling_period : Time Quantity
         Time stamp resolution of the spike times. The same resolution will
         be assumed for the kernel
@@ -676,6 +911,8 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
         rate estimation is calculated according to [1] and with this width
         a gaussian kernel is constructed. Automatized calculation of the 
         kernel width is not available for other than gaussian kernel shapes.
+        For several spike trains, one kernel width is calculated from the
+        pooled spikes of all spike trains.
     cutoff : float
         This factor determines the cutoff of the probability distribution of
         the kernel, i.e., the considered width of the kernel in terms of 
@@ -683,11 +920,13 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
         Default: 5.0
     t_start : Time Quantity (optional)
         Start time of the interval used to compute the firing rate. If None
-        assumed equal to spiketrain.t_start
+        assumed equal to spiketrain.t_start, or to the maximal `t_start` of
+        several spike trains
         Default: None
     t_stop : Time Quantity (optional)
         End time of the interval used to compute the firing rate (included).
-        If None assumed equal to spiketrain.t_stop
+        If None assumed equal to spiketrain.t_stop, or to the minimal
+        `t_stop` of several spike trains
         Default: None
     trim : bool
         if False, the output of the Fast Fourier Transformation being a longer
@@ -700,11 +939,29 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
         Transformation by a total of two times the size of the kernel, and
         t_start and t_stop are adjusted.
         Default: False
+    method : {'auto', 'fft', 'direct', 'fourier'}
+        How the spike trains are convolved with the kernel:
+        * 'fft': by FFT convolution of the complete time vectors.
+        * 'direct': by adding the kernel to the time vector only within the
+          support of each spike, which is faster for sparse spike trains
+          and narrow kernels.
+        * 'auto': the method with the lower estimated cost, given the
+          number of spikes, the kernel width and the number of samples.
+        These methods give the same result up to machine precision.
+        * 'fourier': by multiplying the spectra of the time vectors with
+          the closed-form Fourier transform of the kernel
+          (`Kernel.fourier()`), which saves the transform of the sampled
+          kernel and avoids the truncation of the kernel at `cutoff`. The
+          result differs from the other methods by the sampling and
+          truncation error of the kernel; discontinuous kernels such as the
+          rectangular or exponential kernels cause ringing.
+        Default: 'auto'
 
     Returns
     -------
     rate : neo.AnalogSignal
-        Contains the rate estimation in unit hertz (Hz).
+        Contains the rate estimation in unit hertz (Hz), with one channel
+        per spike train.
         Has a property 'rate.times' which contains the time axis of the rate
         estimate. The unit of this property is the same as the resolution that
         is given via the argument 'sampling_period' to the function.
@@ -712,7 +969,8 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
     Raises
     ------
     TypeError:
-        If `spiketrain` is not an instance of :class:`SpikeTrain` of Neo.
+        If `spiketrain` is neither an instance of :class:`SpikeTrain` of Neo,
+        a list of them nor a :class:`BinnedSpikeTrain`.
         If `sampling_period` is not a time quantity.
         If `kernel` is neither instance of :class:`Kernel` or string 'auto'.
         If `cutoff` is neither float nor int.
@@ -721,6 +979,9 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
 
     ValueError:
         If `sampling_period` is smaller than zero.
+        If `method` is not one of 'auto', 'fft', 'direct' or 'fourier'.
+        If the bin size of a `BinnedSpikeTrain` differs from
+        `sampling_period`.
 
     Example
     --------
@@ -733,25 +994,21 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
 
     """
     # Checks of input variables:
-    if not isinstance(spiketrain, SpikeTrain):
-        raise TypeError(
-            "spiketrain must be instance of :class:`SpikeTrain` of Neo!\n"
-            "    Found: %s, value %s" % (type(spiketrain), str(spiketrain)))
-
-    if not (isinstance(sampling_period, pq.Quantity) and
-            sampling_period.dimensionality.simplified ==
-            pq.Quantity(1, "s").dimensionality):
-        raise TypeError(
-            "The sampling period must be a time quantity!\n"
-            "    Found: %s, value %s" % (type(sampling_period), str(sampling_period)))
-
-    if sampling_period.magnitude < 0:
-        raise ValueError("The sampling period must be larger than zero.")
+    spiketrains = _check_rate_input(spiketrain, sampling_period)
 
     if kernel == 'auto':
-        kernel_width = sskernel(spiketrain.magnitude, tin=None,
+        if isinstance(spiketrain, conv.BinnedSpikeTrain):
+            # spikes at the centers of their bins
+            unit = spiketrain.binsize.units
+            spike_times = np.repeat(
+                spiketrain.bin_centers.rescale(unit).magnitude,
+                np.asarray(spiketrain.to_sparse_array().sum(axis=0)).ravel())
+        else:
+            unit = spiketrains[0].units
+            spike_times = np.hstack([st.rescale(unit).magnitude
+                                     for st in spiketrains])
+        kernel_width = sskernel(spike_times, tin=None,
                                 bootstrap=True)['optw']
-        unit = spiketrain.units
         sigma = 1/(2.0 * 2.7) * kernel_width * unit
         # factor 2.0 connects kernel width with its half width,
         # factor 2.7 connects half width of Gaussian distribution with
@@ -779,60 +1036,485 @@ def instantaneous_rate(spiketrain, sampling_period, kernel='auto',
     if not (isinstance(trim, bool)):
         raise TypeError("trim must be bool!")
 
+    if method not in ('auto', 'fft', 'direct', 'fourier'):
+        raise ValueError("method must be 'auto', 'fft', 'direct' or "
+                         "'fourier'!")
+
     # main function:
     units = pq.CompoundUnit("%s*s" % str(sampling_period.rescale('s').magnitude))
-    spiketrain = spiketrain.rescale(units)
-    if t_start is None:
-        t_start = spiketrain.t_start
+    rows, samples, weights, num_rows, num_samples, t_start, t_stop = \
+        _rate_sample_points(spiketrain, spiketrains, units, t_start, t_stop)
+
+    # the kernel is evaluated once and shared by all spike trains
+    kernel_values, median_index = _kernel_samples(kernel, cutoff, units)
+
+    if method == 'auto':
+        # estimated costs, with the time per spike-kernel pair of the direct
+        # summation being about four times that per operation of the FFT
+        fft_size = scipy.fftpack.next_fast_len(num_samples +
+                                               kernel_values.size - 1)
+        direct_cost = 4. * len(samples) * kernel_values.size
+        fft_cost = num_rows * fft_size * np.log2(fft_size)
+        method = 'direct' if direct_cost < fft_cost else 'fft'
+    if method == 'direct':
+        r = _direct_sum_rows(rows, samples, weights, num_rows, num_samples,
+                             kernel_values).T
     else:
-        t_start = t_start.rescale(spiketrain.units)
+        time_matrix = np.bincount(rows * num_samples + samples,
+                                  weights=weights,
+                                  minlength=num_rows * num_samples)
+        time_matrix = time_matrix.reshape(num_rows, num_samples)
+        if method == 'fourier':
+            # the sampled kernel starts at -cutoff standard deviations
+            offset = max(cutoff, kernel.min_cutoff) * \
+                kernel.sigma.rescale(units).magnitude.item()
+            r = _fourier_convolve_rows(
+                time_matrix, kernel, units, offset,
+                num_samples + kernel_values.size - 1).T
+        else:
+            r = _fft_convolve_rows(time_matrix, kernel_values).T
+    if np.any(r < 0):
+        warnings.warn("Instantaneous firing rate approximation contains "
+                      "negative values, possibly caused due to machine "
+                      "precision errors.")
 
-    if t_stop is None:
-        t_stop = spiketrain.t_stop
+    if not trim:
+        r = r[median_index:-(kernel_values.size - median_index)]
+    elif trim:
+        r = r[2 * median_index:-2 * (kernel_values.size - median_index)]
+        t_start += median_index * units
+        t_stop -= (kernel_values.size - median_index) * units
+
+    rate = neo.AnalogSignal(signal=r,
+                            sampling_period=sampling_period,
+                            units=pq.Hz, t_start=t_start, t_stop=t_stop)
+
+    return rate
+
+
+def instantaneous_rate_sweep(spiketrain, sampling_period, kernel,
+                             sigmas=None, cutoff=5.0, t_start=None,
+                             t_stop=None):
+    """
+    Estimates instantaneous firing rates with several kernels at once, e.g.
+    to compare kernel widths.
+
+    The spectrum of the time vector of each spike train is computed only
+    once and multiplied by the spectrum of each kernel, so that each
+    additional kernel costs one inverse FFT per spike train. The rates equal
+    those of `instantaneous_rate()` with `trim=False` and `method='fft'`.
+
+    Parameters
+    ----------
+    spiketrain : 'neo.SpikeTrain', list of 'neo.SpikeTrain' or
+                 elephant.conversion.BinnedSpikeTrain
+        Spike train(s) to estimate the rates of, see `instantaneous_rate()`.
+    sampling_period : Time Quantity
+        Time stamp resolution of the spike times and the kernels.
+    kernel : list of :class:`Kernel` or :class:`Kernel`
+        The kernels to convolve the spike trains with. If `sigmas` is
+        given, a single kernel whose type (and `invert` flag) is used with
+        each of the `sigmas`.
+    sigmas : Time Quantity array or None
+        Standard deviations of the kernels of the type of `kernel`.
+        Default: None
+    cutoff : float
+        The considered width of the kernels in terms of multiples of their
+        standard deviation sigma, see `instantaneous_rate()`.
+        Default: 5.0
+    t_start, t_stop : Time Quantity (optional)
+        Interval used to compute the firing rates, see
+        `instantaneous_rate()`.
+        Default: None
+
+    Returns
+    -------
+    rates : pq.Quantity
+        Rates in hertz (Hz) of shape `(number of kernels, number of sampling
+        points, number of spike trains)`. The sampling points are the
+        `times` of the `neo.AnalogSignal` returned by
+        `instantaneous_rate()` with `trim=False`.
+
+    Raises
+    ------
+    TypeError:
+        If `spiketrain` or `sampling_period` are invalid, see
+        `instantaneous_rate()`.
+        If `kernel` contains other objects than instances of :class:`Kernel`.
+    ValueError:
+        If no kernel is given.
+
+    See also
+    --------
+    instantaneous_rate
+
+    Example
+    --------
+    >>> import neo
+    >>> import quantities as pq
+    >>> import elephant.kernels as kernels
+    >>> st = neo.SpikeTrain([1, 2, 3] * pq.s, t_stop=10 * pq.s)
+    >>> rates = instantaneous_rate_sweep(
+    ...     st, 10 * pq.ms, kernels.GaussianKernel(100 * pq.ms),
+    ...     sigmas=[50, 100, 200, 500] * pq.ms)
+    >>> print(rates.shape)
+    (4, 1000, 1)
+
+    """
+    spiketrains = _check_rate_input(spiketrain, sampling_period)
+    if sigmas is not None:
+        if not isinstance(kernel, kernels.Kernel):
+            raise TypeError("kernel must be instance of :class:`Kernel` if "
+                            "sigmas are given!")
+        kernel = [type(kernel)(sigma=sigma, invert=kernel.invert)
+                  for sigma in sigmas]
+    if not all([isinstance(k, kernels.Kernel) for k in kernel]):
+        raise TypeError("kernel must contain instances of :class:`Kernel`!")
+    if len(kernel) == 0:
+        raise ValueError("At least one kernel must be given!")
+
+    units = pq.CompoundUnit("%s*s" % str(sampling_period.rescale('s').magnitude))
+    rows, samples, weights, num_rows, num_samples, t_start, t_stop = \
+        _rate_sample_points(spiketrain, spiketrains, units, t_start, t_stop)
+    kernel_samples = [_kernel_samples(k, cutoff, units) for k in kernel]
+
+    # one forward transform of the time vectors, long enough for all kernels
+    max_kernel_size = max([len(values) for values, _ in kernel_samples])
+    fft_size = scipy.fftpack.next_fast_len(num_samples + max_kernel_size - 1)
+    time_matrix = np.bincount(rows * num_samples + samples, weights=weights,
+                              minlength=num_rows * num_samples)
+    spectrum = np.fft.rfft(time_matrix.reshape(num_rows, num_samples),
+                           fft_size)
+
+    rates = np.empty((len(kernel), num_samples - 1, num_rows))
+    for idx, (kernel_values, median_index) in enumerate(kernel_samples):
+        r = np.fft.irfft(spectrum * np.fft.rfft(kernel_values, fft_size),
+                         fft_size)
+        rates[idx] = r[:, median_index:median_index + num_samples - 1].T
+    return rates * pq.Hz
+
+
+def instantaneous_rate_at(spiketrain, times, kernel, cutoff=5.0):
+    """
+    Estimates the instantaneous firing rate by kernel convolution at
+    arbitrary time points.
+
+    Only the spikes within the support of the kernel, i.e. within
+    `cutoff` standard deviations around each time point, contribute to the
+    rate at that time point, so evaluating a sparse set of time points of a
+    long recording does not require a time vector covering the recording.
+    As in `instantaneous_rate()`, asymmetric kernels are aligned at their
+    median.
+
+    Parameters
+    ----------
+    spiketrain : 'neo.SpikeTrain' or list of 'neo.SpikeTrain'
+        Spike train(s) to estimate the rate of.
+    times : Time Quantity array
+        Time points at which the rate is evaluated.
+    kernel : callable object of :class:`Kernel` from module 'kernels.py'
+        The kernel to convolve the spike trains with.
+    cutoff : float
+        The considered width of the kernel in terms of multiples of its
+        standard deviation sigma, see `instantaneous_rate()`.
+        Default: 5.0
+
+    Returns
+    -------
+    rate : pq.Quantity
+        Rate in hertz (Hz) of shape `(len(times), number of spike trains)`.
+
+    Raises
+    ------
+    TypeError:
+        If `spiketrain` is neither an instance of :class:`SpikeTrain` of Neo
+        nor a list of them.
+        If `times` is not a time quantity.
+        If `kernel` is not an instance of :class:`Kernel`.
+        If `cutoff` is neither float nor int.
+
+    See also
+    --------
+    instantaneous_rate
+
+    Example
+    --------
+    >>> import neo
+    >>> import quantities as pq
+    >>> import elephant.kernels as kernels
+    >>> st = neo.SpikeTrain([1, 2, 3] * pq.s, t_stop=10 * pq.s)
+    >>> rate = instantaneous_rate_at(st, [2, 9] * pq.s,
+    ...                              kernels.RectangularKernel(1 * pq.s))
+    >>> print(rate.flatten())
+    [0.8660254 0.       ] Hz
+
+    """
+    if isinstance(spiketrain, SpikeTrain):
+        spiketrains = [spiketrain]
+    elif isinstance(spiketrain, (list, tuple)) and len(spiketrain) > 0 and \
+            all([isinstance(st, SpikeTrain) for st in spiketrain]):
+        spiketrains = spiketrain
     else:
-        t_stop = t_stop.rescale(spiketrain.units)
+        raise TypeError(
+            "spiketrain must be instance of :class:`SpikeTrain` of Neo or a "
+            "list of them!\n"
+            "    Found: %s, value %s" % (type(spiketrain), str(spiketrain)))
 
-    time_vector = np.zeros(int((t_stop - t_start)) + 1)
+    if not (isinstance(times, pq.Quantity) and
+            times.dimensionality.simplified ==
+            pq.Quantity(1, "s").dimensionality):
+        raise TypeError("times must be a time quantity!")
 
-    spikes_slice = spiketrain.time_slice(t_start, t_stop) \
-        if len(spiketrain) else np.array([])
+    if not isinstance(kernel, kernels.Kernel):
+        raise TypeError(
+            "kernel must be instance of :class:`Kernel`!\n"
+            "    Found: %s, value %s" % (type(kernel), str(kernel)))
 
-    for spike in spikes_slice:
-        index = int((spike - t_start))
-        time_vector[index] += 1
+    if not (isinstance(cutoff, float) or isinstance(cutoff, int)):
+        raise TypeError("cutoff must be float or integer!")
 
     if cutoff < kernel.min_cutoff:
         cutoff = kernel.min_cutoff
         warnings.warn("The width of the kernel was adjusted to a minimally "
                       "allowed width.")
 
-    t_arr = np.arange(-cutoff * kernel.sigma.rescale(units).magnitude,
-                      cutoff * kernel.sigma.rescale(units).magnitude +
-                      sampling_period.rescale(units).magnitude,
-                      sampling_period.rescale(units).magnitude) * units
+    units = times.units
+    query = np.atleast_1d(times.magnitude)
+    support = cutoff * kernel.sigma.rescale(units).magnitude
+    if kernel.is_symmetric():
+        t_median = 0.
+    else:
+        t_fine = np.linspace(-support, support, 2001) * units
+        t_median = t_fine[kernel.median_index(t_fine)].magnitude
+
+    rate = np.zeros((len(query), len(spiketrains)))
+    for idx, st in enumerate(spiketrains):
+        spikes = np.sort(st.rescale(units).magnitude)
+        # the spikes within the support of each time point
+        lower = np.searchsorted(spikes, query + t_median - support, 'left')
+        upper = np.searchsorted(spikes, query + t_median + support, 'right')
+        num_pairs = upper - lower
+        query_idx = np.repeat(np.arange(len(query)), num_pairs)
+        spike_idx = np.arange(num_pairs.sum()) + np.repeat(
+            lower - np.cumsum(num_pairs) + num_pairs, num_pairs)
+        values = kernel((query[query_idx] - spikes[spike_idx] + t_median) *
+                        units).rescale(pq.Hz).magnitude
+        rate[:, idx] = np.bincount(query_idx, weights=values,
+                                   minlength=len(query))
+    return rate * pq.Hz
+
+
+def _check_rate_input(spiketrain, sampling_period):
+    """
+    Checks the spike trains and the sampling period given to
+    `instantaneous_rate()`.
 
-    r = scipy.signal.fftconvolve(time_vector,
-                                 kernel(t_arr).rescale(pq.Hz).magnitude, 'full')
-    if np.any(r < 0):
-        warnings.warn("Instantaneous firing rate approximation contains "
-                      "negative values, possibly caused due to machine "
-                      "precision errors.")
+    Returns
+    -------
+    list of neo.SpikeTrain or None
+        The spike trains, or None if a `BinnedSpikeTrain` is given.
+    """
+    spiketrains = None
+    if isinstance(spiketrain, SpikeTrain):
+        spiketrains = [spiketrain]
+    elif isinstance(spiketrain, (list, tuple)) and len(spiketrain) > 0 and \
+            all([isinstance(st, SpikeTrain) for st in spiketrain]):
+        spiketrains = spiketrain
+    elif not isinstance(spiketrain, conv.BinnedSpikeTrain):
+        raise TypeError(
+            "spiketrain must be instance of :class:`SpikeTrain` of Neo!\n"
+            "    Found: %s, value %s" % (type(spiketrain), str(spiketrain)))
 
-    if not trim:
-        r = r[kernel.median_index(t_arr):-(kernel(t_arr).size -
-                                           kernel.median_index(t_arr))]
-    elif trim:
-        r = r[2 * kernel.median_index(t_arr):-2 * (kernel(t_arr).size -
-                                                   kernel.median_index(t_arr))]
-        t_start += kernel.median_index(t_arr) * spiketrain.units
-        t_stop -= (kernel(t_arr).size -
-                   kernel.median_index(t_arr)) * spiketrain.units
+    if not (isinstance(sampling_period, pq.Quantity) and
+            sampling_period.dimensionality.simplified ==
+            pq.Quantity(1, "s").dimensionality):
+        raise TypeError(
+            "The sampling period must be a time quantity!\n"
+            "    Found: %s, value %s" % (type(sampling_period), str(sampling_period)))
 
-    rate = neo.AnalogSignal(signal=r.reshape(r.size, 1),
-                            sampling_period=sampling_period,
-                            units=pq.Hz, t_start=t_start, t_stop=t_stop)
+    if sampling_period.magnitude < 0:
+        raise ValueError("The sampling period must be larger than zero.")
 
-    return rate
+    if isinstance(spiketrain, conv.BinnedSpikeTrain) and \
+            spiketrain.binsize.rescale(sampling_period.units) != \
+            sampling_period:
+        raise ValueError("The bin size of the binned spike trains must be "
+                         "equal to the sampling period.")
+    return spiketrains
+
+
+def _rate_sample_points(spiketrain, spiketrains, units, t_start, t_stop):
+    """
+    Computes the time vectors of `instantaneous_rate()` in sparse form, i.e.
+    the spike train and sampling point of each spike (or of each filled bin
+    of a `BinnedSpikeTrain`, with its spike count as weight).
+
+    Returns
+    -------
+    rows, samples : np.ndarray
+        Spike train and sampling point index of each entry.
+    weights : np.ndarray or None
+        Spike count of each entry, or None if every entry is one spike.
+    num_rows, num_samples : int
+        Number of spike trains and sampling points.
+    t_start, t_stop : pq.Quantity
+        First and last sampling point, in `units`.
+    """
+    if isinstance(spiketrain, conv.BinnedSpikeTrain):
+        binned = spiketrain
+        if t_start is not None or t_stop is not None:
+            binned = binned.time_slice(t_start, t_stop)
+        t_start = binned.t_start.rescale(units)
+        t_stop = binned.t_stop.rescale(units)
+        spmat = binned.to_sparse_array().tocoo()
+        rows, samples, weights = spmat.row, spmat.col, spmat.data
+        num_rows = binned.matrix_rows
+        # the sampling point at t_stop is included, as for spike trains
+        num_samples = binned.num_bins + 1
+    else:
+        if t_start is None or t_stop is None:
+            max_tstart, min_tstop = conv._get_start_stop_from_input(
+                spiketrains)
+            if t_start is None:
+                t_start = max_tstart
+            if t_stop is None:
+                t_stop = min_tstop
+        t_start = t_start.rescale(units)
+        t_stop = t_stop.rescale(units)
+        rows, samples = _rate_sample_indices(spiketrains, t_start, t_stop)
+        weights = None
+        num_rows = len(spiketrains)
+        num_samples = int(t_stop - t_start) + 1
+    return rows, samples, weights, num_rows, num_samples, t_start, t_stop
+
+
+def _kernel_samples(kernel, cutoff, units):
+    """
+    Evaluates `kernel` on the sampling points within `cutoff` standard
+    deviations, given in `units` of the sampling period.
+
+    Returns
+    -------
+    kernel_values : np.ndarray
+        The kernel in Hz at the sampling points.
+    median_index : int
+        Index of the median of the kernel.
+    """
+    if cutoff < kernel.min_cutoff:
+        cutoff = kernel.min_cutoff
+        warnings.warn("The width of the kernel was adjusted to a minimally "
+                      "allowed width.")
+
+    # the sampled kernel is cached by the kernel, in units of 1 / units
+    kernel_values, median_index = kernel.sample(pq.Quantity(1, units),
+                                                cutoff)
+    to_hz = (1. / units).rescale(pq.Hz).magnitude.item()
+    return kernel_values * to_hz, median_index
+
+
+def _rate_sample_indices(spiketrains, t_start, t_stop):
+    """
+    Computes the sampling point of `instantaneous_rate()` of each spike of
+    several spike trains.
+
+    `t_start` and `t_stop` must be given in the units of the sampling
+    period, such that the sampling points are the integers between them.
+
+    Returns
+    -------
+    rows : np.ndarray
+        Index of the spike train of each spike.
+    samples : np.ndarray
+        Index of the sampling point of each spike.
+    """
+    rows, samples = [], []
+    for idx, st in enumerate(spiketrains):
+        times = st.rescale(t_start.units).magnitude
+        times = times[np.logical_and(times >= t_start.magnitude,
+                                     times <= t_stop.magnitude)]
+        samples.append(np.array(times - t_start.magnitude, dtype=int))
+        rows.append(np.repeat(idx, len(times)))
+    return np.hstack(rows).astype(int), np.hstack(samples).astype(int)
+
+
+def _direct_sum_rows(rows, samples, weights, num_rows, num_samples,
+                     kernel_values, max_pairs=2 ** 22):
+    """
+    Convolves time vectors with `kernel_values` ('full' mode) by adding the
+    kernel at the sampling point of each spike, which takes time
+    proportional to the number of spikes times the kernel length.
+
+    The time vectors are given by the row and sampling point of each spike
+    and the optional weight (spike count) of each entry. Spikes are
+    processed in batches of at most `max_pairs` spike-kernel pairs, in the
+    order of their position in the result, so that each batch only adds
+    into the range of the result it touches.
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape `(num_rows, num_samples + len(kernel) - 1)`.
+    """
+    size = num_samples + len(kernel_values) - 1
+    result = np.zeros(num_rows * size)
+    offsets = np.arange(len(kernel_values))
+    positions = rows * size + samples
+    order = np.argsort(positions, kind='mergesort')
+    positions = positions[order]
+    if weights is not None:
+        weights = weights[order]
+    step = max(max_pairs // len(kernel_values), 1)
+    for start in range(0, len(positions), step):
+        sl = slice(start, start + step)
+        first = positions[sl][0]
+        indices = (positions[sl, np.newaxis] - first + offsets).ravel()
+        values = np.tile(kernel_values, len(positions[sl]))
+        if weights is not None:
+            values *= np.repeat(weights[sl], len(kernel_values))
+        touched = np.bincount(indices, weights=values)
+        result[first:first + len(touched)] += touched
+    return result.reshape(num_rows, size)
+
+
+def _fft_convolve_rows(matrix, kernel_values):
+    """
+    Convolves each row of `matrix` with `kernel_values` ('full' mode), using
+    one real FFT along the rows for all rows at once.
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape `(matrix.shape[0], matrix.shape[1] + len(kernel) - 1)`.
+    """
+    size = matrix.shape[1] + len(kernel_values) - 1
+    fft_size = scipy.fftpack.next_fast_len(size)
+    spectrum = np.fft.rfft(matrix, fft_size)
+    spectrum *= np.fft.rfft(kernel_values, fft_size)
+    return np.fft.irfft(spectrum, fft_size)[:, :size]
+
+
+def _fourier_convolve_rows(matrix, kernel, units, offset, size):
+    """
+    Convolves each row of `matrix` with `kernel`, by multiplying the
+    spectrum of the rows with the Fourier transform of the kernel.
+
+    The columns of `matrix` are samples spaced by `units`, and column `m`
+    of the result is the sum over `i` of `matrix[:, i]` times the kernel at
+    `(m - i - offset) * units`, in Hz, like the 'full' convolution with the
+    kernel sampled from `-offset * units` on.
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape `(matrix.shape[0], size)`.
+    """
+    fft_size = scipy.fftpack.next_fast_len(size)
+    freqs = np.fft.rfftfreq(fft_size)
+    transfer = kernel.fourier(freqs / units) * \
+        np.exp(-2j * np.pi * freqs * offset)
+    spectrum = np.fft.rfft(matrix, fft_size) * transfer
+    to_hz = (1. / units).rescale(pq.Hz).magnitude.item()
+    return np.fft.irfft(spectrum, fft_size)[:, :size] * to_hz
 
 
 def time_histogram(spiketrains, binsize, t_start=None, t_stop=None,
@@ -842,8 +1524,13 @@ def time_histogram(spiketrains, binsize, t_start=None, t_stop=None,
 
     Parameters
     ----------
-    spiketrains : List of neo.SpikeTrain objects
-        Spiketrains with a common time axis (same `t_start` and `t_stop`)
+    spiketrains : List of neo.SpikeTrain objects,
+                  elephant.conversion.MemmapBinnedSpikeTrain or
+                  elephant.conversion.AppendableBinnedSpikeTrain
+        Spiketrains with a common time axis (same `t_start` and `t_stop`).
+        If spike trains binned on disk or appendable binned spike trains
+        are given, the histogram is computed from their column format and
+        `binsize` must be their bin size.
     binsize : quantities.Quantity
         Width of the histogram's time bins.
     t_start, t_stop : Quantity (optional)
@@ -852,6 +1539,8 @@ def time_histogram(spiketrains, binsize, t_start=None, t_stop=None,
         are considered in the histogram. If `t_start` and/or `t_stop` are not
         specified, the maximum `t_start` of all :attr:spiketrains is used as
         `t_start`, and the minimum `t_stop` is used as `t_stop`.
+        Must be None for a `MemmapBinnedSpikeTrain` or an
+        `AppendableBinnedSpikeTrain`.
         Default: t_start = t_stop = None
     output : str (optional)
         Normalization of the histogram. Can be one of:
@@ -879,6 +1568,46 @@ def time_histogram(spiketrains, binsize, t_start=None, t_stop=None,
     --------
     elephant.conversion.BinnedSpikeTrain
     """
+    if isinstance(spiketrains, (conv.MemmapBinnedSpikeTrain,
+                                conv.AppendableBinnedSpikeTrain)):
+        bin_hist = _time_histogram_chunked(spiketrains, binsize, t_start,
+                                           t_stop, binary)
+        t_start = spiketrains.t_start
+        num_spiketrains = spiketrains.matrix_rows
+    else:
+        bin_hist, t_start = _time_histogram(spiketrains, binsize, t_start,
+                                            t_stop, binary)
+        num_spiketrains = len(spiketrains)
+    # Renormalise the histogram
+    if output == 'counts':
+        # Raw
+        bin_hist = bin_hist * pq.dimensionless
+    elif output == 'mean':
+        # Divide by number of input spike trains
+        bin_hist = bin_hist * 1. / num_spiketrains * pq.dimensionless
+    elif output == 'rate':
+        # Divide by number of input spike trains and bin width
+        bin_hist = bin_hist * 1. / num_spiketrains / binsize
+    else:
+        raise ValueError('Parameter output is not valid.')
+
+    return neo.AnalogSignal(signal=bin_hist.reshape(bin_hist.size, 1),
+                                 sampling_period=binsize, units=bin_hist.units,
+                                 t_start=t_start)
+
+
+def _time_histogram(spiketrains, binsize, t_start, t_stop, binary):
+    """
+    Computes the spike counts of the time histogram of a list of
+    neo.SpikeTrain objects, see `time_histogram()`.
+
+    Returns
+    -------
+    bin_hist : np.ndarray
+        The spike count of each bin.
+    t_start : quantities.Quantity
+        The start time of the histogram.
+    """
     min_tstop = 0
     if t_start is None:
         # Find the internal range for t_start, where all spike trains are
@@ -919,22 +1648,182 @@ def time_histogram(spiketrains, binsize, t_start=None, t_stop=None,
         bin_hist = bs.to_sparse_array().sum(axis=0)
     # Flatten array
     bin_hist = np.ravel(bin_hist)
-    # Renormalise the histogram
-    if output == 'counts':
-        # Raw
-        bin_hist = bin_hist * pq.dimensionless
-    elif output == 'mean':
-        # Divide by number of input spike trains
-        bin_hist = bin_hist * 1. / len(spiketrains) * pq.dimensionless
-    elif output == 'rate':
-        # Divide by number of input spike trains and bin width
-        bin_hist = bin_hist * 1. / len(spiketrains) / binsize
-    else:
+    return bin_hist, t_start
+
+
+def _time_histogram_chunked(binned_sts, binsize, t_start, t_stop, binary):
+    """
+    Computes the spike counts of the time histogram of spike trains binned
+    on disk chunk by chunk, see `time_histogram()`.
+
+    Returns
+    -------
+    bin_hist : np.ndarray
+        The spike count of each bin.
+    """
+    _check_binned_binsize(binned_sts, binsize)
+    if t_start is not None or t_stop is not None:
+        raise ValueError("t_start and t_stop are given by the binned spike "
+                         "trains and must be None")
+    bin_hist = np.zeros(binned_sts.num_bins, dtype=int)
+    for start, chunk in binned_sts.iter_chunks():
+        if binary:
+            # number of filled bins in each column of the CSC matrix
+            counts = np.diff(chunk.indptr)
+        else:
+            counts = np.ravel(chunk.sum(axis=0))
+        bin_hist[start:start + len(counts)] = counts
+    return bin_hist
+
+
+def psth(spiketrains, events, binsize, window, conditions=None,
+         output='rate', kernel=None, cutoff=5.0):
+    """
+    Peri-stimulus time histograms (PSTH) of spike trains aligned to events,
+    averaged over the trials of each condition.
+
+    All spike trains are merged into one sorted array of spike times, in
+    which the bin edges of all units and trials are located with a single
+    `np.searchsorted`, such that no spike train is sliced or binned per
+    trial.
+
+    Parameters
+    ----------
+    spiketrains : neo.SpikeTrain or list of neo.SpikeTrain
+        The spike trains of the units, each covering all trials.
+    events : quantities.Quantity
+        The times of the alignment events, one per trial.
+    binsize : quantities.Quantity
+        Width of the histogram's time bins.
+    window : tuple of quantities.Quantity
+        Start and stop of the histogram relative to the events, e.g.
+        `(-0.5 * pq.s, 1 * pq.s)`, rounded down to a multiple of `binsize`.
+    conditions : array-like or None
+        The condition of each trial, e.g. the stimulus, or the kind of
+        alignment event if `events` combines several kinds. The trials of
+        each condition are averaged separately. If None, all trials are
+        averaged.
+        Default is `None`
+    output : {'counts', 'rate'}
+        Normalization of the histograms:
+          * 'counts': mean spike count per bin
+          * 'rate': mean firing rate in Hz
+        Default is `'rate'`
+    kernel : elephant.kernels.Kernel or None
+        If given, the histogram of each trial is smoothed with `kernel`
+        before averaging, see `instantaneous_rate()`. Spikes outside of the
+        window are not taken into account.
+        Default is `None`
+    cutoff : float
+        Width of the smoothing kernel in standard deviations, see
+        `instantaneous_rate()`.
+        Default is 5.0
+
+    Returns
+    -------
+    mean, sem : neo.AnalogSignal or dict
+        The trial average and its standard error of the mean, as signals of
+        one channel per unit whose times are relative to the events. If
+        `conditions` is given, dictionaries mapping each condition to these
+        signals.
+
+    Raises
+    ------
+    ValueError
+        If the window of a trial is not covered by the spike trains, or the
+        number of conditions is not the number of events, or `output` is
+        not valid.
+
+    See also
+    --------
+    time_histogram
+    elephant.conversion.ragged_spike_times
+
+    Examples
+    --------
+    >>> import neo
+    >>> import quantities as pq
+    >>> from elephant.statistics import psth
+    >>> st = neo.SpikeTrain([1.1, 1.2, 3.3, 5.1, 5.4] * pq.s,
+    ...                     t_stop=7 * pq.s)
+    >>> mean, sem = psth(st, [1, 3, 5] * pq.s, 0.25 * pq.s,
+    ...                  (0 * pq.s, 0.5 * pq.s), output='counts')
+    >>> print(mean.magnitude.ravel())
+    [1.         0.66666667]
+
+    """
+    if isinstance(spiketrains, SpikeTrain):
+        spiketrains = [spiketrains]
+    if output not in ('counts', 'rate'):
         raise ValueError('Parameter output is not valid.')
+    units = binsize.units
+    binsize_s = binsize.rescale(pq.s).magnitude.item()
+    binsize = binsize.magnitude.item()
+    events = np.ravel(events.rescale(units).magnitude)
+    first_bin = int(np.floor(window[0].rescale(units).magnitude / binsize))
+    num_bins = int(np.floor(window[1].rescale(units).magnitude / binsize)) - \
+        first_bin
+    if num_bins < 1:
+        raise ValueError("The window must be longer than binsize")
+    if conditions is not None and len(conditions) != len(events):
+        raise ValueError("conditions must give the condition of each event")
+
+    # bin edges of all trials, shape (num_trials, num_bins + 1)
+    edges = events[:, np.newaxis] + \
+        (first_bin + np.arange(num_bins + 1)) * binsize
+    for st in spiketrains:
+        if np.any(edges[:, 0] < st.t_start.rescale(units).magnitude) or \
+                np.any(edges[:, -1] > st.t_stop.rescale(units).magnitude):
+            raise ValueError("The windows of all events must be within "
+                             "t_start and t_stop of the spike trains")
+
+    times, offsets = conv.ragged_spike_times(spiketrains, units=units)
+    times = times.magnitude
+    # shift the spikes and edges of each unit by a multiple of the total
+    # time span to search all units in one sorted array
+    t_min = min(times.min() if len(times) else np.inf, edges.min())
+    span = max(times.max() if len(times) else -np.inf, edges.max()) - \
+        t_min + 1.
+    shifts = np.arange(len(spiketrains)) * span - t_min
+    times = times + np.repeat(shifts, np.diff(offsets))
+    edges = edges + shifts[:, np.newaxis, np.newaxis]
+    # spike counts of shape (num_units, num_trials, num_bins)
+    counts = np.diff(np.searchsorted(times, edges), axis=-1).astype(float)
+
+    if kernel is not None:
+        # sample the kernel at the bins
+        bin_units = pq.CompoundUnit("%s*s" % str(binsize_s))
+        kernel_values, median_index = _kernel_samples(kernel, cutoff,
+                                                      bin_units)
+        smoothed = _fft_convolve_rows(counts.reshape(-1, num_bins),
+                                      kernel_values)
+        counts = smoothed[:, median_index:median_index + num_bins].reshape(
+            counts.shape) * binsize_s
+    if output == 'rate':
+        counts = counts / binsize_s
+        signal_units = pq.Hz
+    else:
+        signal_units = pq.dimensionless
 
-    return neo.AnalogSignal(signal=bin_hist.reshape(bin_hist.size, 1),
-                                 sampling_period=binsize, units=bin_hist.units,
-                                 t_start=t_start)
+    def _average(trials):
+        mean = counts[:, trials].mean(axis=1)
+        if trials.sum() > 1:
+            sem = counts[:, trials].std(axis=1, ddof=1) / np.sqrt(
+                trials.sum())
+        else:
+            sem = np.full_like(mean, np.nan)
+        return [neo.AnalogSignal(
+            signal.T, units=signal_units,
+            t_start=first_bin * binsize * units,
+            sampling_period=binsize * units) for signal in (mean, sem)]
+
+    if conditions is None:
+        return tuple(_average(np.ones(len(events), dtype=bool)))
+    conditions = np.asarray(conditions)
+    mean, sem = {}, {}
+    for condition in np.unique(conditions):
+        mean[condition], sem[condition] = _average(conditions == condition)
+    return mean, sem
 
 
 def complexity_pdf(spiketrains, binsize):
@@ -950,8 +1839,11 @@ def complexity_pdf(spiketrains, binsize):
 
     Parameters
     ----------
-    spiketrains : List of neo.SpikeTrain objects
-    Spiketrains with a common time axis (same `t_start` and `t_stop`)
+    spiketrains : List of neo.SpikeTrain objects or
+                  elephant.conversion.BinnedSpikeTrain
+    Spiketrains with a common time axis (same `t_start` and `t_stop`). Spike
+    trains binned on disk (`elephant.conversion.MemmapBinnedSpikeTrain`) are
+    processed chunk by chunk.
     binsize : quantities.Quantity
     Width of the histogram's time bins.
 
@@ -964,6 +1856,8 @@ def complexity_pdf(spiketrains, binsize):
     See also
     --------
     elephant.conversion.BinnedSpikeTrain
+    complexity_pdf_sliding
+    ComplexityHistogram
 
     References
     ----------
@@ -973,14 +1867,297 @@ def complexity_pdf(spiketrains, binsize):
     Springer Berlin Heidelberg.
 
     """
-    # Computing the population histogram with parameter binary=True to clip the
-    # spike trains before summing
-    pophist = time_histogram(spiketrains, binsize, binary=True)
+    if isinstance(spiketrains, conv.BinnedSpikeTrain):
+        # Accumulating the complexity histogram chunk by chunk
+        _check_binned_binsize(spiketrains, binsize)
+        complexity_hist = ComplexityHistogram(spiketrains.matrix_rows)
+        complexity_hist.add(spiketrains)
+        complexity_hist = complexity_hist.counts
+    else:
+        # Computing the population histogram with parameter binary=True to
+        # clip the spike trains before summing
+        pophist = time_histogram(spiketrains, binsize, binary=True)
+
+        # Computing the histogram of the entries of pophist (=Complexity
+        # histogram)
+        complexity_hist = np.histogram(
+            pophist.magnitude, bins=range(0, len(spiketrains) + 2))[0]
+
+    return _complexity_pdf_signal(complexity_hist)
+
+
+def complexity_pdf_sliding(spiketrains, binsize, window_size,
+                           step_size=None):
+    """
+    Time-resolved complexity distribution of spike trains in sliding time
+    windows, see `complexity_pdf()`.
+
+    The complexity of each bin is computed chunk by chunk, and the
+    complexity histograms of all windows ending in a chunk are obtained at
+    once from the cumulative histograms at the window borders. Only the
+    complexities of the bins of the current windows are kept in memory, so
+    long recordings binned on disk can be processed.
+
+    Parameters
+    ----------
+    spiketrains : List of neo.SpikeTrain objects or
+                  elephant.conversion.BinnedSpikeTrain
+        Spiketrains with a common time axis (same `t_start` and `t_stop`).
+    binsize : quantities.Quantity
+        Width of the time bins.
+    window_size : quantities.Quantity
+        Width of the windows, rounded to a multiple of `binsize`.
+    step_size : quantities.Quantity or None
+        Shift between consecutive windows, rounded to a multiple of
+        `binsize`. If None, the windows do not overlap.
+        Default is `None`
+
+    Returns
+    -------
+    neo.AnalogSignal
+        Signal whose `k`-th sample is the complexity distribution (one
+        channel per complexity `0, ..., len(spiketrains)`) of the window
+        starting at `t_start + k * step_size`. Bins at the end of the
+        spike trains not filling a window are discarded.
+
+    Raises
+    ------
+    ValueError
+        If `window_size` or `step_size` is smaller than `binsize`, or
+        `binsize` differs from the bin size of binned spike trains.
+
+    See also
+    --------
+    complexity_pdf
+    ComplexityHistogram
+
+    Examples
+    --------
+    >>> import neo
+    >>> import quantities as pq
+    >>> from elephant.statistics import complexity_pdf_sliding
+    >>> st1 = neo.SpikeTrain([1, 3, 5, 6] * pq.ms, t_stop=8 * pq.ms)
+    >>> st2 = neo.SpikeTrain([1, 2, 5, 6] * pq.ms, t_stop=8 * pq.ms)
+    >>> pdf = complexity_pdf_sliding([st1, st2], 1 * pq.ms, 4 * pq.ms)
+    >>> print(pdf.magnitude)
+    [[0.25 0.5  0.25]
+     [0.5  0.   0.5 ]]
+
+    """
+    if isinstance(spiketrains, conv.BinnedSpikeTrain):
+        _check_binned_binsize(spiketrains, binsize)
+        binned = spiketrains
+    else:
+        binned = conv.BinnedSpikeTrain(spiketrains, binsize=binsize)
+    if step_size is None:
+        step_size = window_size
+    window, step = [int(np.round((size / binsize).simplified.magnitude))
+                    for size in (window_size, step_size)]
+    if window < 1 or step < 1:
+        raise ValueError("window_size and step_size must be at least "
+                         "binsize")
+
+    num_complexities = binned.matrix_rows + 1
+    hists = [np.zeros((0, num_complexities), dtype=int)]
+    pending = np.zeros(0, dtype=int)
+    # bins between the windows still to skip, if step > window
+    num_skipped = 0
+    for complexities in _complexity_chunks(binned):
+        pending = np.concatenate((pending, complexities[num_skipped:]))
+        num_skipped = max(num_skipped - len(complexities), 0)
+        num_windows = max(len(pending) - window, -step) // step + 1
+        if num_windows > 0:
+            hists.append(_sliding_histograms(
+                pending, window, step, num_windows, num_complexities))
+            # keep the bins of the windows not complete yet
+            num_skipped = max(num_windows * step - len(pending), 0)
+            pending = pending[num_windows * step:]
+    pdf = np.vstack(hists) / window
+    return neo.AnalogSignal(pdf * pq.dimensionless,
+                            t_start=binned.t_start,
+                            sampling_period=step * binned.binsize)
+
+
+class ComplexityHistogram(object):
+    """
+    Complexity histogram accumulated from consecutive blocks of bins, e.g.
+    while the spike trains are recorded, see `complexity_pdf()`.
+
+    The histogram counts the bins of each complexity (number of spike trains
+    with at least one spike in the bin). Blocks of bins are added and removed
+    incrementally with :meth:`add` and :meth:`remove`. If `window_size` is
+    given, the histogram covers the last `window_size` bins only, and the
+    oldest bins are removed automatically when new bins are added.
+
+    Parameters
+    ----------
+    num_spiketrains : int
+        Number of spike trains, i.e. the maximal complexity.
+    window_size : int or None
+        Number of most recent bins covered by the histogram. If None, all
+        added bins are counted.
+        Default is `None`
+
+    Attributes
+    ----------
+    counts : np.ndarray
+        Number of bins of complexity `0, ..., num_spiketrains`.
+    num_bins : int
+        Number of bins in the histogram.
+
+    See also
+    --------
+    complexity_pdf
+    complexity_pdf_sliding
+    elephant.conversion.AppendableBinnedSpikeTrain
+
+    Examples
+    --------
+    >>> import neo
+    >>> import quantities as pq
+    >>> import elephant.conversion as conv
+    >>> from elephant.statistics import ComplexityHistogram
+    >>> binned = conv.AppendableBinnedSpikeTrain(2, binsize=1 * pq.ms)
+    >>> hist = ComplexityHistogram(2, window_size=4)
+    >>> hist.add(binned.append([[1, 3] * pq.ms, [1, 2] * pq.ms],
+    ...                        t_stop=4 * pq.ms))
+    >>> hist.add(binned.append([[5, 6] * pq.ms, [5, 6] * pq.ms],
+    ...                        t_stop=8 * pq.ms))
+    >>> print(hist.counts)
+    [2 0 2]
+
+    """
+
+    def __init__(self, num_spiketrains, window_size=None):
+        self.counts = np.zeros(num_spiketrains + 1, dtype=int)
+        self.window_size = window_size
+        # complexities of the bins in the window, oldest first
+        self._window = np.zeros(0, dtype=int)
+
+    @property
+    def num_bins(self):
+        return int(self.counts.sum())
+
+    def _complexities(self, bins):
+        """
+        Returns the complexity of each bin of `bins`, given as a
+        BinnedSpikeTrain or an array of complexities.
+        """
+        if isinstance(bins, conv.BinnedSpikeTrain):
+            complexities = list(_complexity_chunks(bins))
+            complexities = np.concatenate(
+                [np.zeros(0, dtype=int)] + complexities)
+        else:
+            complexities = np.asarray(bins, dtype=int).ravel()
+        if np.any(complexities < 0) or np.any(
+                complexities >= len(self.counts)):
+            raise ValueError("The complexities must be between 0 and the "
+                             "number of spike trains")
+        return complexities
+
+    def add(self, bins):
+        """
+        Adds bins to the histogram. If the histogram covers a window, the
+        bins falling out of the window are removed.
+
+        Parameters
+        ----------
+        bins : elephant.conversion.BinnedSpikeTrain or np.ndarray
+            The new bins, following the previously added bins, or the
+            complexity of each bin.
+
+        """
+        complexities = self._complexities(bins)
+        self.counts += np.bincount(complexities, minlength=len(self.counts))
+        if self.window_size is not None:
+            self._window = np.concatenate((self._window, complexities))
+            num_dropped = len(self._window) - self.window_size
+            if num_dropped > 0:
+                self.counts -= np.bincount(self._window[:num_dropped],
+                                           minlength=len(self.counts))
+                self._window = self._window[num_dropped:]
+
+    def remove(self, bins):
+        """
+        Removes bins added before from the histogram.
+
+        Parameters
+        ----------
+        bins : elephant.conversion.BinnedSpikeTrain or np.ndarray
+            The bins to remove, or the complexity of each bin.
+
+        Raises
+        ------
+        ValueError
+            If the histogram covers a window, which removes bins itself, or
+            the bins are not in the histogram.
+
+        """
+        if self.window_size is not None:
+            raise ValueError("Bins cannot be removed from a histogram over a "
+                             "sliding window")
+        counts = self.counts - np.bincount(self._complexities(bins),
+                                           minlength=len(self.counts))
+        if np.any(counts < 0):
+            raise ValueError("The bins to remove are not in the histogram")
+        self.counts = counts
+
+    def pdf(self):
+        """
+        Returns the complexity distribution of the bins in the histogram.
+
+        Returns
+        -------
+        neo.AnalogSignal
+            The complexity distribution, see `complexity_pdf()`.
+
+        """
+        return _complexity_pdf_signal(self.counts)
+
+
+def _check_binned_binsize(binned_sts, binsize):
+    if binsize != binned_sts.binsize:
+        raise ValueError("binsize (%s) must be the bin size of the binned "
+                         "spike trains (%s)" % (binsize, binned_sts.binsize))
+
+
+def _complexity_chunks(binned_sts):
+    """
+    Yields the complexity of the bins of binned spike trains chunk by chunk,
+    from the number of filled bins in each column of the CSC matrices.
+    """
+    if isinstance(binned_sts, (conv.MemmapBinnedSpikeTrain,
+                               conv.AppendableBinnedSpikeTrain)):
+        for _, chunk in binned_sts.iter_chunks():
+            yield np.diff(chunk.indptr)
+    else:
+        yield np.diff(binned_sts._sparse_csc_array().indptr)
 
-    # Computing the histogram of the entries of pophist (=Complexity histogram)
-    complexity_hist = np.histogram(
-        pophist.magnitude, bins=range(0, len(spiketrains) + 2))[0]
 
+def _sliding_histograms(values, window, step, num_windows, size):
+    """
+    Returns the histograms of the integers `values` in `num_windows` windows
+    of `window` elements shifted by `step` elements, as an array of shape
+    `(num_windows, size)`.
+    """
+    starts = np.arange(num_windows) * step
+    borders = np.union1d(starts, starts + window)
+    # histogram of the values between consecutive borders
+    segments = np.repeat(np.arange(len(borders) - 1), np.diff(borders))
+    counts = np.bincount(segments * size + values[:borders[-1]],
+                         minlength=(len(borders) - 1) * size)
+    # histogram of the values before each border
+    cumulative = np.zeros((len(borders), size), dtype=int)
+    np.cumsum(counts.reshape(-1, size), axis=0, out=cumulative[1:])
+    return (cumulative[np.searchsorted(borders, starts + window)] -
+            cumulative[np.searchsorted(borders, starts)])
+
+
+def _complexity_pdf_signal(complexity_hist):
+    """
+    Normalizes a complexity histogram to a probability distribution, see
+    `complexity_pdf()`.
+    """
     # Normalization of the Complexity Histogram to 1 (probabilty distribution)
     complexity_hist = complexity_hist / complexity_hist.sum()
     # Convert the Complexity pdf to an neo.AnalogSignal
@@ -1036,15 +2213,47 @@ def fftkernel(x, w):
     Ported to Python: Subhasis Ray, NCBS. Tue Jun 10 10:42:38 IST 2014
 
     """
-    L = len(x)
-    Lmax = L + 3 * w
-    n = nextpow2(Lmax)
-    X = np.fft.fft(x, n)
-    f = np.arange(0, n, 1.0) / n
-    f = np.concatenate((-f[:int(n / 2)], f[int(n / 2):0:-1]))
-    K = np.exp(-0.5 * (w * 2 * np.pi * f)**2)
-    y = np.fft.ifft(X * K, n)
-    y = y[:L].copy()
+    return _fftkernel_batch(x, [w])[0]
+
+
+_gauss_kernel = kernels.GaussianKernel(sigma=1 * pq.s)
+
+
+def _fftkernel_batch(x, ws, spectra=None):
+    """
+    Applies the Gauss kernel smoother of `fftkernel()` with each bandwidth
+    in `ws` to the signal `x`, or to each row of a matrix `x`.
+
+    The Fourier transform of `x` is computed once for all bandwidths that
+    share an FFT length, and stored in the dict `spectra` (keyed by the FFT
+    length) if given, so that it can be reused by later calls with the same
+    `x`. The inverse transforms of all bandwidths sharing an FFT length are
+    computed in one batch.
+
+    Returns
+    -------
+    np.ndarray
+        Complex array of shape `(len(ws),) + x.shape` with the smoothed
+        signals.
+    """
+    x = np.asarray(x)
+    if spectra is None:
+        spectra = {}
+    L = x.shape[-1]
+    ws = np.asarray(ws, dtype=float)
+    sizes = np.array([nextpow2(L + 3 * w) for w in ws])
+    y = np.empty((len(ws),) + x.shape, dtype=complex)
+    for n in np.unique(sizes):
+        if n not in spectra:
+            spectra[n] = np.fft.fft(x, n)
+        idx = np.nonzero(sizes == n)[0]
+        f = np.arange(0, n, 1.0) / n
+        f = np.concatenate((-f[:int(n / 2)], f[int(n / 2):0:-1]))
+        # closed-form Fourier transform of the Gauss kernel
+        K = _gauss_kernel._fourier_magnitude(f, ws[idx, np.newaxis])
+        if x.ndim > 1:
+            K = K[:, np.newaxis, :]
+        y[idx] = np.fft.ifft(spectra[n] * K, n)[..., :L]
     return y
 
 
@@ -1071,17 +2280,35 @@ def cost_function(x, N, w, dt):
     Cn(w) = sum_{i,j} int k(x - x_i) k(x - x_j) dx - 2 sum_{i~=j} k(x_i - x_j)
 
      """
-    yh = np.abs(fftkernel(x, w / dt))  # density
+    C, yh = _cost_function_batch(x, N, [w], dt)
+    return C[0], yh[0]
+
+
+def _cost_function_batch(x, N, ws, dt, spectra=None):
+    """
+    Evaluates `cost_function()` for each bandwidth in `ws`, sharing the
+    Fourier transform of `x` between them, see `_fftkernel_batch()`.
+
+    Returns
+    -------
+    C : np.ndarray
+        The cost of each bandwidth.
+    yh : np.ndarray
+        The density estimated with each bandwidth, one per row.
+    """
+    ws = np.asarray(ws, dtype=float)
+    yh = np.abs(_fftkernel_batch(x, ws / dt, spectra))  # density
     # formula for density
-    C = np.sum(yh ** 2) * dt - 2 * np.sum(yh * x) * \
-               dt + 2 / np.sqrt(2 * np.pi) / w / N
+    C = np.sum(yh ** 2, axis=1) * dt - 2 * np.sum(yh * x, axis=1) * \
+        dt + 2 / np.sqrt(2 * np.pi) / ws / N
     C = C * N * N
     # formula for rate
     # C = dt*sum( yh.^2 - 2*yh.*y_hist + 2/sqrt(2*pi)/w*y_hist )
     return C, yh
 
 
-def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
+def sskernel(spiketimes, tin=None, w=None, bootstrap=False, num_workers=1,
+             random_state=None):
     """
 
     Calculates optimal fixed kernel bandwidth.
@@ -1091,10 +2318,20 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
     tin: (optional) time points at which the kernel bandwidth is to be estimated.
 
     w: (optional) vector of kernel bandwidths. If specified, optimal
-    bandwidth is selected from this.
+    bandwidth is selected from this. The costs of all bandwidths are
+    evaluated in a batch, sharing the Fourier transform of the spike
+    histogram.
 
     bootstrap (optional): whether to calculate the 95% confidence
-    interval. (default False)
+    interval. The bootstrap resamples are histogrammed and smoothed in
+    blocks. (default False)
+
+    num_workers (optional): number of threads processing the blocks of
+    bootstrap resamples. The resamples are drawn in the same order for any
+    number of threads. (default 1)
+
+    random_state (optional): source of randomness of the bootstrap
+    resamples, see `elephant.utils.get_random_state()`. (default None)
 
     Returns
 
@@ -1143,15 +2380,13 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
     yhist = yhist / (N * dt)  # density
     optw = None
     y = None
+    # Fourier transforms of yhist, shared by all cost evaluations
+    spectra = {}
     if w is not None:
-        C = np.zeros(len(w))
-        Cmin = np.inf
-        for k, w_ in enumerate(w):
-            C[k], yh = cost_function(yhist, N, w_, dt)
-            if C[k] < Cmin:
-                Cmin = C[k]
-                optw = w_
-                y = yh
+        C, yh = _cost_function_batch(yhist, N, w, dt, spectra)
+        k = np.argmin(C)
+        optw = w[k]
+        y = yh[k]
     else:
         # Golden section search on a log-exp scale
         wmin = 2 * dt
@@ -1165,8 +2400,8 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
         b = ilogexp(wmax)
         c1 = (phi - 1) * a + (2 - phi) * b
         c2 = (2 - phi) * a + (phi - 1) * b
-        f1, y1 = cost_function(yhist, N, logexp(c1), dt)
-        f2, y2 = cost_function(yhist, N, logexp(c2), dt)
+        f1, y1 = _cost_function(yhist, N, logexp(c1), dt, spectra)
+        f2, y2 = _cost_function(yhist, N, logexp(c2), dt, spectra)
         k = 0
         while (np.abs(b - a) > (tolerance * (np.abs(c1) + np.abs(c2))))\
               and (k < imax):
@@ -1175,7 +2410,7 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
                 c2 = c1
                 c1 = (phi - 1) * a + (2 - phi) * b
                 f2 = f1
-                f1, y1 = cost_function(yhist, N, logexp(c1), dt)
+                f1, y1 = _cost_function(yhist, N, logexp(c1), dt, spectra)
                 w[k] = logexp(c1)
                 C[k] = f1
                 optw = logexp(c1)
@@ -1185,7 +2420,7 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
                 c1 = c2
                 c2 = (2 - phi) * a + (phi - 1) * b
                 f1 = f2
-                f2, y2 = cost_function(yhist, N, logexp(c2), dt)
+                f2, y2 = _cost_function(yhist, N, logexp(c2), dt, spectra)
                 w[k] = logexp(c2)
                 C[k] = f2
                 optw = logexp(c2)
@@ -1196,15 +2431,8 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
     yb = None
     if bootstrap:
         nbs = 1000
-        yb = np.zeros((nbs, len(tin)))
-        for ii in range(nbs):
-            idx = np.floor(np.random.rand(N) * N).astype(int)
-            xb = spiketimes[idx]
-            y_histb, bins = np.histogram(
-                xb, np.r_[t - dt / 2, t[-1] + dt / 2]) / dt / N
-            yb_buf = fftkernel(y_histb, optw / dt).real
-            yb_buf = yb_buf / np.sum(yb_buf * dt)
-            yb[ii, :] = np.interp(tin, t, yb_buf)
+        yb = _bootstrap_densities(spiketimes, N, t, tin, dt, optw, nbs,
+                                  num_workers, random_state=random_state)
         ybsort = np.sort(yb, axis=0)
         y95b = ybsort[np.floor(0.05 * nbs).astype(int), :]
         y95u = ybsort[np.floor(0.95 * nbs).astype(int), :]
@@ -1217,3 +2445,76 @@ def sskernel(spiketimes, tin=None, w=None, bootstrap=False):
             'C': C,
             'confb95': confb95,
             'yb': yb}
+
+
+def _cost_function(x, N, w, dt, spectra):
+    """
+    `cost_function()` reusing the Fourier transforms of `x` in `spectra`.
+    """
+    C, yh = _cost_function_batch(x, N, [w], dt, spectra)
+    return C[0], yh[0]
+
+
+def _bootstrap_densities(spiketimes, N, t, tin, dt, optw, nbs, num_workers,
+                         block_size=50, random_state=None):
+    """
+    Computes the densities of `nbs` bootstrap resamples of the spike times
+    for `sskernel()`.
+
+    The resamples are drawn as a matrix of spike indices, histogrammed
+    with one `bincount` and smoothed with one batched FFT per block of
+    `block_size` resamples. The blocks are drawn in order, such that the
+    result does not depend on `num_workers`, and processed by `num_workers`
+    threads.
+
+    Returns
+    -------
+    np.ndarray
+        The densities of shape `(nbs, len(tin))`.
+    """
+    edges = np.r_[t - dt / 2, t[-1] + dt / 2]
+    num_bins = len(t)
+    N = int(N)
+    # the bin of each spike is computed once; resamples only look it up
+    spike_bins = np.searchsorted(edges, spiketimes, side='right') - 1
+    # the last bin includes its right edge, as in np.histogram
+    spike_bins[spiketimes == edges[-1]] = num_bins - 1
+    spike_bins[(spike_bins < 0) | (spike_bins >= num_bins)] = -1
+
+    random_state = get_random_state(random_state)
+
+    def draw_blocks():
+        for start in range(0, nbs, block_size):
+            num = min(block_size, nbs - start)
+            yield np.floor(random_state.uniform(size=(num, N)) * N).astype(int)
+
+    def densities(idx):
+        bins = spike_bins[idx]
+        bins += (np.arange(len(idx)) * num_bins)[:, np.newaxis]
+        valid = spike_bins[idx] >= 0
+        y_histb = np.bincount(bins[valid], minlength=len(idx) * num_bins)
+        y_histb = y_histb.reshape(len(idx), num_bins) / dt / N
+        yb_buf = _fftkernel_batch(y_histb, [optw / dt])[0].real
+        yb_buf = yb_buf / np.sum(yb_buf * dt, axis=1)[:, np.newaxis]
+        if t is tin:
+            return yb_buf
+        return np.array([np.interp(tin, t, row) for row in yb_buf])
+
+    if num_workers > 1:
+        # at most num_workers blocks of resamples are held in memory
+        blocks = []
+        pool = ThreadPool(num_workers)
+        try:
+            draws = draw_blocks()
+            while True:
+                wave = list(itertools.islice(draws, num_workers))
+                if not wave:
+                    break
+                blocks.extend(pool.map(densities, wave))
+        finally:
+            pool.close()
+    else:
+        blocks = [densities(idx) for idx in draw_blocks()]
+    if not blocks:
+        return np.zeros((0, len(tin)))
+    return np.vstack(blocks)
@@ -185,6 +185,18 @@ class MultipleFilterAlgorithmTestCase(unittest.TestCase):
                         atol=5)
         print('detected {0} cps: {1}'.format(len(result_concatenated),
                                                            result_concatenated))
+
+
+class EmpiricalParametersTestCase(unittest.TestCase):
+    def test_random_state(self):
+        window_sizes = [1, 2] * pq.s
+        res1 = mft.empirical_parameters(window_sizes, 10 * pq.s, 5, 20,
+                                        dt=0.1 * pq.s, random_state=7)
+        res2 = mft.empirical_parameters(window_sizes, 10 * pq.s, 5, 20,
+                                        dt=0.1 * pq.s, random_state=7)
+        assert_allclose(res1[0], res2[0])
+        assert_allclose(res1[1], res2[1])
+
                                                 
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,9 @@ Unit tests for the conversion module.
 :license: Modified BSD, see LICENSE.txt for details.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import neo
@@ -500,6 +503,416 @@ class TimeHistogramTestCase(unittest.TestCase):
             np.array_equal(xa.bin_edges[:-1],
                            xb.bin_edges[:-1].rescale(binsize.units)))
 
+    def test_binned_spiketrain_vectorized_binning(self):
+        np.random.seed(0)
+        sts = []
+        for units in ['s', 'ms'] * 5:
+            factor = 1000 if units == 'ms' else 1
+            times = np.sort(np.random.uniform(-1, 10, 50)).round(1)
+            sts.append(neo.SpikeTrain(times * factor, units=units,
+                                      t_start=-1 * factor,
+                                      t_stop=10 * factor))
+        x = cv.BinnedSpikeTrain(sts, binsize=0.3 * pq.s, t_start=-0.5 * pq.s,
+                                t_stop=9.5 * pq.s)
+        for row, st in zip(x.to_array(), sts):
+            st = st.rescale(pq.s).magnitude
+            st = st[np.logical_and(st >= -0.5, st <= 9.5)]
+            bins = np.array((st + 0.5) / 0.3, dtype=int)
+            bins = bins[bins < x.num_bins]
+            self.assertTrue(np.array_equal(
+                row, np.bincount(bins, minlength=x.num_bins)))
+        s = x.to_sparse_array()
+        self.assertTrue(s.has_sorted_indices)
+        self.assertTrue(np.all(s.data > 0))
+
+    def test_binned_spiketrain_unsorted_and_empty(self):
+        a = neo.SpikeTrain([4.3, 1.8, 1.7, 1.75] * pq.s, t_stop=10.0 * pq.s)
+        b = neo.SpikeTrain([] * pq.s, t_stop=10.0 * pq.s)
+        x = cv.BinnedSpikeTrain([a, b], binsize=1 * pq.s)
+        self.assertTrue(np.array_equal(
+            x.to_array(), [[0, 3, 0, 0, 1, 0, 0, 0, 0, 0], [0] * 10]))
+        self.assertEqual(x.spike_indices, [[1, 1, 1, 4], []])
+
+    def test_binned_spiketrain_from_arrays(self):
+        a = self.spiketrain_a
+        b = self.spiketrain_b
+        x = cv.BinnedSpikeTrain([a, b], binsize=self.binsize)
+        times = [a.magnitude, b.magnitude]
+        y = cv.BinnedSpikeTrain.from_arrays(times, 's', binsize=1,
+                                            t_start=0, t_stop=10)
+        self.assertIsNone(y.lst_input)
+        self.assertEqual(x.num_bins, y.num_bins)
+        self.assertEqual(x.t_start, y.t_start)
+        self.assertEqual(x.t_stop, y.t_stop)
+        self.assertEqual(x.binsize, y.binsize)
+        self.assertTrue(np.array_equal(x.to_array(), y.to_array()))
+        self.assertTrue(np.array_equal(x.bin_edges, y.bin_edges))
+
+        # flat array with offsets and quantity parameters
+        y = cv.BinnedSpikeTrain.from_arrays(
+            np.concatenate(times) * 1000, 'ms', binsize=self.binsize,
+            num_bins=10, t_start=0 * pq.s,
+            offsets=[0, len(a), len(a) + len(b)])
+        self.assertEqual(y.matrix_rows, 2)
+        self.assertTrue(np.array_equal(x.to_array(), y.to_array()))
+        self.assertEqual(x.spike_indices, y.spike_indices)
+
+    def test_binned_spiketrain_from_arrays_errors(self):
+        times = [self.spiketrain_a.magnitude]
+        self.assertRaises(AttributeError, cv.BinnedSpikeTrain.from_arrays,
+                          times, 's', binsize=1)
+        self.assertRaises(ValueError, cv.BinnedSpikeTrain.from_arrays,
+                          times, 's', binsize=3, num_bins=10, t_start=0,
+                          t_stop=10)
+        self.assertRaises(ValueError, cv.BinnedSpikeTrain.from_arrays,
+                          times, 's', binsize=1, t_start=10, t_stop=0)
+
+    def test_binned_spiketrain_compact(self):
+        a = neo.SpikeTrain(np.linspace(0, 0.99, 300) * pq.s,
+                           t_stop=10.0 * pq.s)
+        c = [a, self.spiketrain_b]
+        x = cv.BinnedSpikeTrain(c, binsize=self.binsize)
+        x_compact = cv.BinnedSpikeTrain(c, binsize=self.binsize, compact=True)
+        self.assertEqual(x.to_sparse_array().dtype, int)
+        self.assertEqual(x_compact.to_sparse_array().dtype, np.uint16)
+        self.assertTrue(np.array_equal(x.to_array(), x_compact.to_array()))
+        x_compact = cv.BinnedSpikeTrain(self.spiketrain_a,
+                                        binsize=self.binsize, compact=True)
+        self.assertEqual(x_compact.to_sparse_array().dtype, np.uint8)
+
+    def test_binned_spiketrain_packed_bool_array(self):
+        np.random.seed(1)
+        sts = [neo.SpikeTrain(np.sort(np.random.uniform(0, 1, 40)) * pq.s,
+                              t_stop=1 * pq.s) for _ in range(5)]
+        for binsize in [1, 7, 10, 30] * pq.ms:
+            x = cv.BinnedSpikeTrain(sts, binsize=binsize)
+            bool_array = x.to_bool_array()
+            packed = x.to_packed_bool_array()
+            self.assertEqual(packed.dtype, np.uint8)
+            self.assertTrue(np.array_equal(packed,
+                                           np.packbits(bool_array, axis=1)))
+            self.assertTrue(np.array_equal(cv._popcount(packed),
+                                           bool_array.sum(axis=1)))
+            bool_array = bool_array.astype(int)
+            self.assertTrue(np.array_equal(
+                cv._packed_coincidences(packed),
+                np.dot(bool_array, bool_array.T)))
+            self.assertTrue(np.array_equal(
+                cv._packed_coincidences(packed[:2], packed[2:]),
+                np.dot(bool_array[:2], bool_array[2:].T)))
+
+    def test_binned_spiketrain_spike_indices_flat(self):
+        a = self.spiketrain_a
+        b = neo.SpikeTrain([] * pq.s, t_stop=10.0 * pq.s)
+        c = self.spiketrain_b
+        x = cv.BinnedSpikeTrain([a, b, c], binsize=self.binsize)
+        spike_idx, offsets = x.spike_indices_flat
+        self.assertTrue(np.array_equal(offsets, [0, 7, 7, 14]))
+        self.assertTrue(np.array_equal(
+            spike_idx, [0, 0, 1, 3, 4, 5, 6, 0, 0, 1, 2, 4, 5, 8]))
+        self.assertEqual(x.spike_indices, [[0, 0, 1, 3, 4, 5, 6], [],
+                                           [0, 0, 1, 2, 4, 5, 8]])
+
+    def test_binned_spiketrain_cache(self):
+        x = cv.BinnedSpikeTrain([self.spiketrain_a, self.spiketrain_b],
+                                binsize=self.binsize)
+        self.assertIs(x.to_sparse_bool_array(), x.to_sparse_bool_array())
+        self.assertIs(x.spike_indices_flat, x.spike_indices_flat)
+        self.assertIs(x.to_packed_bool_array(), x.to_packed_bool_array())
+        self.assertIsNot(x.to_bool_array(), x.to_bool_array())
+        bool_array = x.to_bool_array(store_array=True)
+        self.assertIs(x.to_bool_array(), bool_array)
+        x.to_array(store_array=True)
+
+        sparse_bool = x.to_sparse_bool_array()
+        x.clear_cache()
+        self.assertIsNone(x._mat_u)
+        self.assertIsNot(x.to_sparse_bool_array(), sparse_bool)
+        self.assertIsNot(x.to_bool_array(), bool_array)
+        self.assertTrue(np.array_equal(x.to_bool_array(), bool_array))
+        self.assertTrue(np.array_equal(x.to_sparse_bool_array().toarray(),
+                                       sparse_bool.toarray()))
+
+    def test_binned_spiketrain_rebin(self):
+        np.random.seed(3)
+        sts = [neo.SpikeTrain(np.random.uniform(0, 1000, 300), units='ms',
+                              t_stop=1000 * pq.ms) for _ in range(5)]
+        x = cv.BinnedSpikeTrain(sts, binsize=1 * pq.ms, t_start=0.5 * pq.ms,
+                                t_stop=999.5 * pq.ms)
+        for factor in [1, 2, 3, 7, 10, 999]:
+            rebinned = x.rebin(factor)
+            target = cv.BinnedSpikeTrain(sts, binsize=factor * pq.ms,
+                                         t_start=0.5 * pq.ms,
+                                         num_bins=999 // factor)
+            self.assertEqual(rebinned.num_bins, target.num_bins)
+            self.assertEqual(rebinned.binsize, target.binsize)
+            self.assertEqual(rebinned.t_start, target.t_start)
+            self.assertEqual(rebinned.t_stop, target.t_stop)
+            self.assertTrue(np.array_equal(rebinned.to_array(),
+                                           target.to_array()))
+            self.assertEqual(rebinned.spike_indices, target.spike_indices)
+        self.assertRaises(TypeError, x.rebin, 1.5)
+        self.assertRaises(ValueError, x.rebin, 0)
+
+    def test_binned_spiketrain_rebin_compact(self):
+        a = neo.SpikeTrain(np.linspace(0, 9.99, 1000) * pq.s,
+                           t_stop=10.0 * pq.s)
+        x = cv.BinnedSpikeTrain(a, binsize=1 * pq.s, compact=True)
+        self.assertEqual(x.to_sparse_array().dtype, np.uint8)
+        rebinned = x.rebin(5)
+        self.assertEqual(rebinned.to_sparse_array().dtype, np.uint16)
+        self.assertTrue(np.array_equal(rebinned.to_array(), [[500, 500]]))
+
+    def test_binned_spiketrain_pyramid(self):
+        x = cv.BinnedSpikeTrain([self.spiketrain_a, self.spiketrain_b],
+                                binsize=500 * pq.ms)
+        pyramid = cv.BinnedSpikeTrainPyramid(x)
+        self.assertIs(pyramid.get(500 * pq.ms), x)
+        for binsize in [1, 2, 5] * pq.s:
+            target = cv.BinnedSpikeTrain(
+                [self.spiketrain_a, self.spiketrain_b], binsize=binsize)
+            self.assertTrue(np.array_equal(pyramid.get(binsize).to_array(),
+                                           target.to_array()))
+        self.assertEqual(pyramid.factors, [1, 2, 4, 10])
+        self.assertIs(pyramid.get(1 * pq.s), pyramid.rebin(2))
+        self.assertRaises(ValueError, pyramid.get, 0.75 * pq.s)
+        pyramid.clear()
+        self.assertEqual(pyramid.factors, [1])
+
+    def test_binned_spiketrain_time_slice(self):
+        x = cv.BinnedSpikeTrain([self.spiketrain_a, self.spiketrain_b],
+                                binsize=self.binsize)
+        window = x.time_slice(2 * pq.s, 6.5 * pq.s)
+        self.assertIsInstance(window, cv.BinnedSpikeTrainView)
+        self.assertEqual(window.t_start, 2 * pq.s)
+        self.assertEqual(window.t_stop, 6 * pq.s)
+        self.assertEqual(window.num_bins, 4)
+        self.assertTrue(np.array_equal(window.bin_edges, [2, 3, 4, 5, 6]))
+        self.assertTrue(np.array_equal(window.to_array(),
+                                       x.to_array()[:, 2:6]))
+        self.assertTrue(np.array_equal(window.to_bool_array(),
+                                       x.to_bool_array()[:, 2:6]))
+        self.assertEqual(window.spike_indices, [[1, 2, 3], [0, 2, 3]])
+        # the spike data is shared with the parent, also for windows
+        # holding much less than half of the spikes
+        long_train = neo.SpikeTrain(np.arange(0.5, 100) * pq.s,
+                                    t_stop=100 * pq.s)
+        long_binned = cv.BinnedSpikeTrain(long_train, binsize=1 * pq.s)
+        for t_start, t_stop in [(2, 6), (10, 11), (50, 60)] * pq.s:
+            small_window = long_binned.time_slice(t_start, t_stop)
+            for attr in ('data', 'indices'):
+                self.assertTrue(np.shares_memory(
+                    getattr(small_window._sparse_csc_array(), attr),
+                    getattr(long_binned._sparse_csc_array(), attr)))
+            self.assertTrue(np.array_equal(
+                small_window.to_array(),
+                long_binned.to_array()[:, int(t_start):int(t_stop)]))
+
+        # same window by slicing, and windows of windows
+        self.assertTrue(np.array_equal(x[:, 2:6].to_array(),
+                                       window.to_array()))
+        sub_window = window.time_slice(t_start=3.2 * pq.s)
+        self.assertEqual(sub_window.parent, x)
+        self.assertEqual(sub_window.t_start, 4 * pq.s)
+        self.assertTrue(np.array_equal(sub_window.to_array(),
+                                       x.to_array()[:, 4:6]))
+        self.assertTrue(np.array_equal(window[:, 1:-1].to_array(),
+                                       x.to_array()[:, 3:5]))
+        self.assertEqual(x.time_slice().num_bins, x.num_bins)
+        self.assertEqual(x.time_slice(20 * pq.s).num_bins, 0)
+
+        self.assertRaises(IndexError, x.__getitem__, slice(2, 6))
+        self.assertRaises(IndexError, x.__getitem__, (0, slice(2, 6)))
+        self.assertRaises(IndexError, x.__getitem__, (slice(None), 2))
+        self.assertRaises(IndexError, x.__getitem__,
+                          (slice(None), slice(2, 6, 2)))
+
+
+class MemmapBinnedSpikeTrainTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        np.random.seed(2)
+        self.spiketrains = [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 1000, 200)),
+                           units='ms', t_stop=1000 * pq.ms)
+            for _ in range(4)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_memmap_binned_spiketrain(self):
+        target = cv.BinnedSpikeTrain(self.spiketrains, binsize=10 * pq.ms,
+                                     t_start=5 * pq.ms)
+        x = cv.MemmapBinnedSpikeTrain.create(
+            self.tmpdir, self.spiketrains, binsize=10 * pq.ms,
+            t_start=5 * pq.ms, chunk_size=30)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.tmpdir, 'metadata.json')))
+        self.assertEqual(x.num_bins, target.num_bins)
+        self.assertEqual(x.matrix_rows, 4)
+        self.assertEqual(x.t_start, target.t_start)
+        self.assertEqual(x.t_stop, target.t_stop)
+        self.assertTrue(np.array_equal(x.bin_edges, target.bin_edges))
+        self.assertTrue(np.array_equal(x.to_array(), target.to_array()))
+        self.assertEqual(x.spike_indices, target.spike_indices)
+
+        # chunks cover all bins
+        starts = []
+        dense = target.to_array()
+        for start, chunk in x.iter_chunks():
+            starts.append(start)
+            self.assertTrue(np.array_equal(
+                chunk.toarray(), dense[:, start:start + chunk.shape[1]]))
+        self.assertEqual(starts, list(range(0, target.num_bins, 30)))
+
+        # reopen from disk
+        y = cv.MemmapBinnedSpikeTrain(self.tmpdir)
+        self.assertTrue(np.array_equal(y.to_array(), target.to_array()))
+        self.assertEqual(y.binsize, 10 * pq.ms)
+
+    def test_binned_spiketrain_save_load(self):
+        filename = os.path.join(self.tmpdir, 'binned.npz')
+        for compact in [False, True]:
+            target = cv.BinnedSpikeTrain(self.spiketrains, binsize=10 * pq.ms,
+                                         t_stop=995 * pq.ms, compact=compact)
+            target.save(filename)
+            for mmap_mode in [None, 'r']:
+                x = cv.BinnedSpikeTrain.load(filename, mmap_mode=mmap_mode)
+                self.assertIsNone(x.lst_input)
+                self.assertEqual(x.compact, compact)
+                self.assertEqual(x.binsize, target.binsize)
+                self.assertEqual(x.t_start, target.t_start)
+                self.assertEqual(x.t_stop, target.t_stop)
+                self.assertEqual(x.num_bins, target.num_bins)
+                self.assertEqual(x.to_sparse_array().dtype,
+                                 target.to_sparse_array().dtype)
+                self.assertTrue(np.array_equal(x.to_array(),
+                                               target.to_array()))
+            # the memory-mapped matrix is read-only
+            self.assertFalse(x.to_sparse_array().data.flags.writeable)
+
+        # subclasses load instances of themselves
+        class SubBinnedSpikeTrain(cv.BinnedSpikeTrain):
+            pass
+        self.assertIsInstance(SubBinnedSpikeTrain.load(filename),
+                              SubBinnedSpikeTrain)
+
+        # windows and empty matrices
+        target = cv.BinnedSpikeTrain(self.spiketrains, binsize=10 * pq.ms)
+        target.time_slice(200 * pq.ms, 300 * pq.ms).save(filename)
+        x = cv.BinnedSpikeTrain.load(filename, mmap_mode='r')
+        self.assertEqual(x.t_start, 200 * pq.ms)
+        self.assertTrue(np.array_equal(x.to_array(),
+                                       target.to_array()[:, 20:30]))
+        target.time_slice(2000 * pq.ms).save(filename)
+        x = cv.BinnedSpikeTrain.load(filename, mmap_mode='r')
+        self.assertEqual(x.to_array().shape, (4, 0))
+
+
+
+class TrialBinnedSpikeTrainTestCase(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(3)
+        self.trials = [
+            [neo.SpikeTrain(np.sort(np.random.uniform(0, 1000, 50)),
+                            units='ms', t_stop=1000 * pq.ms)
+             for _ in range(3)]
+            for _ in range(5)]
+
+    def test_trial_binned_spiketrain(self):
+        x = cv.TrialBinnedSpikeTrain(self.trials, binsize=10 * pq.ms)
+        self.assertEqual(x.shape, (5, 3, 100))
+        targets = [cv.BinnedSpikeTrain(trial, binsize=10 * pq.ms)
+                   for trial in self.trials]
+        dense = x.to_array()
+        bool_dense = x.to_bool_array()
+        packed = x.to_packed_bool_array()
+        for i, target in enumerate(targets):
+            self.assertTrue(np.array_equal(dense[i], target.to_array()))
+            self.assertTrue(np.array_equal(bool_dense[i],
+                                           target.to_bool_array()))
+            self.assertTrue(np.array_equal(packed[i],
+                                           target.to_packed_bool_array()))
+            self.assertTrue(np.array_equal(x.trial(i).to_array(),
+                                           target.to_array()))
+        self.assertEqual(x.trial(-1).t_stop, 1000 * pq.ms)
+        self.assertRaises(IndexError, x.trial, 5)
+
+        self.assertTrue(np.array_equal(
+            x.trial_sum().to_array(),
+            sum(target.to_array() for target in targets)))
+        self.assertTrue(np.array_equal(
+            x.trial_sum(binary=True).to_array(),
+            sum(target.to_bool_array().astype(int) for target in targets)))
+
+    def test_trial_binned_spiketrain_time_slice(self):
+        x = cv.TrialBinnedSpikeTrain(self.trials, binsize=10 * pq.ms)
+        window = x.time_slice(200 * pq.ms, 500 * pq.ms)
+        self.assertEqual(window.shape, (5, 3, 30))
+        self.assertTrue(np.array_equal(window.to_array(),
+                                       x.to_array()[:, :, 20:50]))
+        self.assertTrue(np.array_equal(window.trial(2).to_array(),
+                                       x.to_array()[2, :, 20:50]))
+
+    def test_trial_binned_spiketrain_errors(self):
+        self.assertRaises(ValueError, cv.TrialBinnedSpikeTrain, [],
+                          binsize=10 * pq.ms)
+        self.assertRaises(ValueError, cv.TrialBinnedSpikeTrain,
+                          [self.trials[0], self.trials[1][:2]],
+                          binsize=10 * pq.ms)
+
+
+
+class AppendableBinnedSpikeTrainTestCase(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(4)
+        self.spiketrains = [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 1000, 300)),
+                           units='ms', t_stop=1000 * pq.ms)
+            for _ in range(4)]
+
+    def test_appendable_binned_spiketrain(self):
+        x = cv.AppendableBinnedSpikeTrain(4, binsize=3 * pq.ms)
+        self.assertEqual(x.num_bins, 0)
+        self.assertEqual(x.to_array().shape, (4, 0))
+        # blocks not aligned to the bins, partially in seconds
+        borders = np.r_[np.arange(0, 1000, 37), 1000] * pq.ms
+        blocks = []
+        for t_start, t_stop in zip(borders[:-1], borders[1:]):
+            block = x.append([st.time_slice(t_start, t_stop).rescale('s')
+                              for st in self.spiketrains], t_stop=t_stop)
+            self.assertEqual(block.t_stop, x.t_stop)
+            blocks.append(block.to_array())
+        target = cv.BinnedSpikeTrain(self.spiketrains, binsize=3 * pq.ms)
+        self.assertEqual(x.num_bins, target.num_bins)
+        self.assertEqual(x.t_received, 1000 * pq.ms)
+        self.assertEqual(x.t_stop, 999 * pq.ms)
+        self.assertTrue(np.array_equal(x.to_array(), target.to_array()))
+        self.assertTrue(np.array_equal(np.hstack(blocks), target.to_array()))
+        self.assertEqual(x.spike_indices, target.spike_indices)
+
+    def test_appendable_binned_spiketrain_spike_times(self):
+        x = cv.AppendableBinnedSpikeTrain(1, binsize=1 * pq.s)
+        x.append([[0.5, 0.7, 1.2] * pq.s], t_stop=2.5 * pq.s)
+        self.assertTrue(np.array_equal(x.to_array(), [[2, 1]]))
+        # the spike at the border was part of the previous block
+        x.append([[2.5, 2.6, 3.1] * pq.s], t_stop=4 * pq.s)
+        self.assertTrue(np.array_equal(x.to_array(), [[2, 1, 1, 1]]))
+        self.assertEqual(x.t_stop, 4 * pq.s)
+
+    def test_appendable_binned_spiketrain_errors(self):
+        self.assertRaises(ValueError, cv.AppendableBinnedSpikeTrain, 0,
+                          binsize=1 * pq.s)
+        self.assertRaises(TypeError, cv.AppendableBinnedSpikeTrain, 1,
+                          binsize=1)
+        x = cv.AppendableBinnedSpikeTrain(1, binsize=1 * pq.s)
+        self.assertRaises(ValueError, x.append, [[0.5] * pq.s])
+        self.assertRaises(ValueError, x.append, [[0.5] * pq.s, [] * pq.s],
+                          t_stop=1 * pq.s)
+        x.append([[0.5] * pq.s], t_stop=2 * pq.s)
+        self.assertRaises(ValueError, x.append, [[0.5] * pq.s],
+                          t_stop=1 * pq.s)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
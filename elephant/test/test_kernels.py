@@ -125,5 +125,55 @@ class kernel_TestCase(unittest.TestCase):
                                       x=restric_defdomain.magnitude)[-1]
                 self.assertAlmostEqual(frac, fraction, delta=0.002)
 
+    def test_kernel_evaluate_magnitude(self):
+        t = np.linspace(-3, 3, 61)
+        for kernel_type in self.kernel_types:
+            for invert in (False, True):
+                kernel = kernel_type(sigma=0.5 * pq.ms, invert=invert)
+                targ = kernel(t * pq.s).rescale(1 / pq.s)
+                values = kernel.evaluate_magnitude(t, pq.s)
+                self.assertIsInstance(values, np.ndarray)
+                self.assertNotIsInstance(values, pq.Quantity)
+                np.testing.assert_array_almost_equal(values, targ.magnitude)
+
+    def test_kernel_fourier(self):
+        t = np.arange(-3000, 3001) * 1e-3
+        freqs = np.array([0, 0.1, 0.5, 1.3, 4.]) * pq.Hz
+        for kernel_type in self.kernel_types:
+            for invert in (False, True):
+                kernel = kernel_type(sigma=200 * pq.ms, invert=invert)
+                values = kernel.evaluate_magnitude(t, pq.s)
+                targ = np.exp(-2j * np.pi * np.outer(freqs.magnitude, t)).dot(
+                    values) * 1e-3
+                transform = kernel.fourier(freqs)
+                self.assertAlmostEqual(transform[0], 1.)
+                np.testing.assert_array_almost_equal(transform, targ,
+                                                     decimal=2)
+                np.testing.assert_array_almost_equal(
+                    kernel.fourier(freqs.rescale(1 / pq.ms)), transform)
+        self.assertRaises(TypeError, kernel.fourier, [1, 2])
+        self.assertRaises(TypeError, kernel.fourier, [1, 2] * pq.s)
+        self.assertRaises(NotImplementedError,
+                          kernels.Kernel(sigma=1 * pq.s).fourier, [1] * pq.Hz)
+
+    def test_kernel_sample(self):
+        kernels.clear_sample_cache()
+        for kernel_type in self.kernel_types:
+            kernel = kernel_type(sigma=20 * pq.ms)
+            values, median_index = kernel.sample(5 * pq.ms, cutoff=3.0)
+            t = np.arange(-12, 13) * 5 * pq.ms
+            np.testing.assert_array_almost_equal(values,
+                                                 kernel(t).magnitude)
+            self.assertEqual(median_index, kernel.median_index(t))
+            self.assertFalse(values.flags.writeable)
+            # equal kernels share the sampled kernel
+            same = kernel_type(sigma=0.02 * pq.s).sample(5 * pq.ms,
+                                                         cutoff=3.0)
+            self.assertIs(same[0], values)
+            other = kernel.sample(5 * pq.ms, cutoff=3.0, cache=False)
+            self.assertIsNot(other[0], values)
+            np.testing.assert_array_equal(other[0], values)
+        kernels.clear_sample_cache()
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,12 +7,15 @@ Unit tests for the spike_train_correlation module.
 """
 
 import unittest
+import shutil
+import tempfile
 
 import numpy as np
 from numpy.testing.utils import assert_array_equal, assert_array_almost_equal
 import quantities as pq
 import neo
 import elephant.conversion as conv
+import elephant.kernels as kernels
 import elephant.spike_train_correlation as sc
 
 
@@ -117,6 +120,52 @@ class covariance_TestCase(unittest.TestCase):
         self.assertEqual(target.ndim, target_numpy.ndim)
         self.assertAlmostEqual(target, target_numpy)
 
+    def test_covariance_binned_compact(self):
+        '''
+        Test if compact count types of the binned spike trains yield the same
+        result, i.e. do not overflow.
+        '''
+        st_2 = neo.SpikeTrain(np.linspace(0, 0.99, 300), units='ms',
+                              t_stop=50.)
+        sts = [self.st_0, self.st_1, st_2]
+        binned_st = conv.BinnedSpikeTrain(
+            sts, t_start=0 * pq.ms, t_stop=50. * pq.ms, binsize=1 * pq.ms)
+        binned_st_compact = conv.BinnedSpikeTrain(
+            sts, t_start=0 * pq.ms, t_stop=50. * pq.ms, binsize=1 * pq.ms,
+            compact=True)
+        for binary in [True, False]:
+            assert_array_almost_equal(
+                sc.covariance(binned_st, binary=binary),
+                sc.covariance(binned_st_compact, binary=binary))
+            assert_array_almost_equal(
+                sc.covariance(binned_st, binary=binary),
+                np.cov(binned_st.to_bool_array() if binary
+                       else binned_st.to_array()))
+
+    def test_covariance_memmap_binned(self):
+        '''
+        Test if spike trains binned on disk yield the same result as in
+        memory.
+        '''
+        tmpdir = tempfile.mkdtemp()
+        try:
+            binned_st = conv.MemmapBinnedSpikeTrain.create(
+                tmpdir, [self.st_0, self.st_1, self.st_0],
+                t_start=0 * pq.ms, t_stop=50. * pq.ms, binsize=1 * pq.ms,
+                chunk_size=16)
+            target = conv.BinnedSpikeTrain(
+                [self.st_0, self.st_1, self.st_0], t_start=0 * pq.ms,
+                t_stop=50. * pq.ms, binsize=1 * pq.ms)
+            for binary in [True, False]:
+                assert_array_almost_equal(
+                    sc.covariance(binned_st, binary=binary),
+                    sc.covariance(target, binary=binary))
+                assert_array_almost_equal(
+                    sc.corrcoef(binned_st, binary=binary),
+                    sc.corrcoef(target, binary=binary))
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 class corrcoeff_TestCase(unittest.TestCase):
 
@@ -595,6 +644,23 @@ class cross_correlation_histogram_TestCase(unittest.TestCase):
             ValueError, sc.cch, self.binned_st1, self.binned_st2, kernel='BOX',
             method='memory')
 
+    def test_kernel_object(self):
+        binsize = self.binned_st1.binsize
+        kernel = kernels.GaussianKernel(sigma=2 * binsize)
+        # the kernel sampled far beyond its width
+        sampled = kernel(np.arange(-30, 31) * binsize).magnitude
+        for method in ['speed', 'memory']:
+            targ, _ = sc.cross_correlation_histogram(
+                self.binned_st1, self.binned_st2, window=[-40, 40],
+                kernel=sampled, method=method)
+            smoothed, bin_ids = sc.cross_correlation_histogram(
+                self.binned_st1, self.binned_st2, window=[-40, 40],
+                kernel=kernel, method=method)
+            assert_array_equal(bin_ids, np.arange(-40, 41))
+            # the sampled kernel is truncated at the borders of the CCH
+            assert_array_almost_equal(smoothed.magnitude[30:-30],
+                                      targ.magnitude[30:-30])
+
     def test_exist_alias(self):
         '''
         Test if alias cch still exists.
@@ -126,7 +126,119 @@ class AnalogSignalSpikeExtractionTestCase(unittest.TestCase):
                 np.array_equal(spike_train.waveforms[0][0].magnitude,
                                self.first_spike))
 
-        
+
+class SpikeExtractionEdgesTestCase(unittest.TestCase):
+
+    def test_spike_extraction_edges(self):
+        signal = neo.AnalogSignal(np.arange(100.) * mV,
+                                  sampling_rate=1 * kHz).reshape(-1)
+        extr_interval = (-2 * ms, 3 * ms)
+        time_stamps = neo.SpikeTrain([20.5, 50.5, 70.5] * ms,
+                                     t_stop=signal.t_stop)
+        spike_train = stgen.spike_extraction(
+            signal, time_stamps=time_stamps, extr_interval=extr_interval)
+        self.assertEqual(spike_train.waveforms.shape, (3, 1, 5))
+        for waveform, index in zip(spike_train.waveforms, [20, 50, 70]):
+            np.testing.assert_array_equal(waveform[0].magnitude,
+                                          np.arange(index - 2, index + 3))
+
+        # the spikes whose waveforms exceed the signal are dropped
+        time_stamps = neo.SpikeTrain([0.5, 10.5, 98.5] * ms,
+                                     t_stop=signal.t_stop)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            spike_train = stgen.spike_extraction(
+                signal, time_stamps=time_stamps, extr_interval=extr_interval)
+        self.assertTrue(any('exceeded signal' in str(x.message) for x in w))
+        self.assertEqual(len(spike_train), 1)
+        self.assertEqual(spike_train[0], 10.5 * ms)
+        self.assertEqual(spike_train.waveforms.shape, (1, 1, 5))
+        np.testing.assert_array_equal(spike_train.waveforms[0, 0].magnitude,
+                                      np.arange(8, 13))
+
+
+class ChunkedSpikeDetectionTestCase(unittest.TestCase):
+
+    def test_single_channel(self):
+        curr_dir = os.path.dirname(os.path.realpath(__file__))
+        npz_file_loc = os.path.join(curr_dir, 'spike_extraction_test_data.npz')
+        iom2 = neo.io.PyNNNumpyIO(npz_file_loc)
+        data = iom2.read()
+        vm = data[0].segments[0].analogsignals[0]
+        # chunk borders inside the crossings must not change the events
+        for chunk_size in (7, 100, len(vm)):
+            result = stgen.chunked_spike_detection(
+                vm, 0 * mV, chunk_size=chunk_size)
+            self.assertEqual(len(result), 1)
+            assert_array_almost_equal(
+                result[0].magnitude,
+                stgen.peak_detection(vm).rescale(result[0].units))
+            result = stgen.chunked_spike_detection(
+                vm, 0 * mV, method='threshold', chunk_size=chunk_size)
+            assert_array_almost_equal(
+                result[0].magnitude,
+                stgen.threshold_detection(vm).rescale(result[0].units))
+
+    def test_random_channels(self):
+        # smoothed noise, so that the crossings last several samples
+        noise = np.random.RandomState(0).normal(size=(1004, 4))
+        values = (noise[:-4] + noise[1:-3] + noise[2:-2] + noise[3:-1] +
+                  noise[4:]) / np.sqrt(5)
+        signal = neo.AnalogSignal(values, units=mV, sampling_rate=1 * kHz)
+        for sign, threshold in (('above', 1.5 * mV), ('below', -1.5 * mV)):
+            for method, detection in (('peak', stgen.peak_detection),
+                                      ('threshold',
+                                       stgen.threshold_detection)):
+                expected = [detection(signal[:, channel], threshold,
+                                      sign=sign)
+                            for channel in range(signal.shape[1])]
+                for chunk_size in (1, 3, 64, 1000):
+                    result = stgen.chunked_spike_detection(
+                        signal, threshold, sign=sign, method=method,
+                        chunk_size=chunk_size)
+                    self.assertEqual(len(result), signal.shape[1])
+                    for spiketrain, target in zip(result, expected):
+                        self.assertTrue(len(target) > 0)
+                        assert_array_almost_equal(
+                            spiketrain.magnitude,
+                            target.rescale(spiketrain.units).magnitude)
+
+    def test_multi_channel(self):
+        data = np.zeros((50, 3), dtype=np.int16)
+        data[[3, 4, 5, 6], 0] = [-20, -50, -30, -20]
+        data[[10, 11], 1] = [-40, -60]
+        data[[19, 20, 21], 1] = [-30, -30, -70]
+        data[[47, 48, 49], 2] = [-40, -80, -20]
+        threshold = [-10, -35, -10]
+        expected = [[4], [11, 21], [48]]
+        for chunk_size in (1, 4, 5, 50):
+            result = stgen.chunked_spike_detection(
+                data, threshold, sign='below', sampling_rate=1 * kHz,
+                chunk_size=chunk_size, extr_interval=(-1 * ms, 3 * ms))
+            for spiketrain, times in zip(result, expected):
+                assert_array_almost_equal(spiketrain.rescale(ms).magnitude,
+                                          times)
+                self.assertEqual(spiketrain.t_stop, 50 * ms)
+            np.testing.assert_array_equal(result[0].waveforms[0, 0],
+                                          [-20, -50, -30, -20])
+            waveform = result[2].waveforms[0, 0].magnitude
+            np.testing.assert_array_equal(waveform[:3], [-40, -80, -20])
+            self.assertTrue(np.isnan(waveform[3]))
+        result = stgen.chunked_spike_detection(
+            data, threshold, sign='below', method='threshold',
+            sampling_rate=1 * kHz, chunk_size=4)
+        for spiketrain, times in zip(result, [[3], [10, 21], [47]]):
+            assert_array_almost_equal(spiketrain.rescale(ms).magnitude,
+                                      times)
+
+    def test_errors(self):
+        data = np.zeros((10, 2))
+        self.assertRaises(ValueError, stgen.chunked_spike_detection, data, 1.)
+        self.assertRaises(ValueError, stgen.chunked_spike_detection, data, 1.,
+                          sign='up', sampling_rate=1 * kHz)
+        self.assertRaises(ValueError, stgen.chunked_spike_detection, data, 1.,
+                          method='max', sampling_rate=1 * kHz)
+
 
 class HomogeneousPoissonProcessTestCase(unittest.TestCase):
 
@@ -236,6 +348,66 @@ class InhomogeneousPoissonProcessTestCase(unittest.TestCase):
         self.assertRaises(
             ValueError, stgen.inhomogeneous_poisson_process,
             self.rate_profile_negative)
+        self.assertRaises(
+            ValueError, stgen.inhomogeneous_poisson_process,
+            self.rate_profile_negative, method='time_rescaling')
+        self.assertRaises(
+            ValueError, stgen.inhomogeneous_poisson_process,
+            self.rate_profile, method='rejection')
+
+    def test_time_rescaling(self):
+        np.random.seed(seed=12345)
+        for rate in [self.rate_profile, self.rate_profile.rescale(kHz)]:
+            spiketrain = stgen.inhomogeneous_poisson_process(
+                rate, method='time_rescaling')
+            self.assertEqual(rate.t_stop, spiketrain.t_stop)
+            self.assertEqual(rate.t_start, spiketrain.t_start)
+            # 20 spikes expected in the first and 200 in the second second
+            first = np.sum(spiketrain < 1 * s)
+            self.assertLess(pdiff(20, first), 0.8)
+            self.assertLess(pdiff(200, spiketrain.size - first), 0.3)
+        spiketrain = stgen.inhomogeneous_poisson_process(
+            self.rate_profile_0, method='time_rescaling', as_array=True)
+        self.assertTrue(isinstance(spiketrain, np.ndarray))
+        self.assertEqual(spiketrain.size, 0)
+
+    def test_batch(self):
+        np.random.seed(seed=12345)
+        num_samples = 1000
+        values = np.zeros((num_samples, 3))
+        values[:, 0] = 20
+        # a brief peak
+        values[100:110, 1] = 2000
+        values[:, 2] = np.linspace(0, 100, num_samples)
+        rate = neo.AnalogSignal(values * Hz, sampling_period=1 * ms,
+                                t_start=500 * ms)
+        counts = []
+        for _ in range(200):
+            times, offsets = stgen.inhomogeneous_poisson_process_batch(rate)
+            self.assertEqual(times.units, ms)
+            self.assertTrue(np.all(times >= 500 * ms))
+            self.assertTrue(np.all(times < 1500 * ms))
+            for i in range(3):
+                self.assertTrue(np.all(
+                    np.diff(times.magnitude[offsets[i]:offsets[i + 1]]) >= 0))
+            counts.append(np.diff(offsets))
+        np.testing.assert_allclose(np.mean(counts, axis=0),
+                                   [20, 20, 50], rtol=0.1)
+        # the spikes of the peak fall into the peak
+        peak = times[offsets[1]:offsets[2]]
+        self.assertTrue(np.all(peak >= 599 * ms))
+        self.assertTrue(np.all(peak <= 610 * ms))
+        # the spike density follows the linearly increasing rate
+        ramp = times[offsets[2]:offsets[3]].magnitude - 500
+        self.assertLess(np.mean(ramp < 500), 0.5)
+
+        binned = stgen.inhomogeneous_poisson_process_batch(
+            rate, binsize=10 * ms)
+        self.assertEqual(binned.matrix_rows, 3)
+        self.assertEqual(binned.num_bins, 100)
+        self.assertRaises(ValueError,
+                          stgen.inhomogeneous_poisson_process_batch,
+                          self.rate_profile_negative)
 
 class HomogeneousGammaProcessTestCase(unittest.TestCase):
 
@@ -275,6 +447,89 @@ class HomogeneousGammaProcessTestCase(unittest.TestCase):
                 self.assertLess(D, 0.25)
 
 
+class BatchProcessTestCase(unittest.TestCase):
+
+    def test_poisson_batch(self):
+        np.random.seed(seed=12345)
+        times, offsets = stgen.homogeneous_poisson_process_batch(
+            [0, 1, 50, 123] * Hz, t_start=100 * ms, t_stop=20 * second)
+        self.assertEqual(times.units, second)
+        self.assertEqual(len(offsets), 5)
+        self.assertEqual(offsets[1], 0)
+        intervals = np.diff(times.magnitude[offsets[3]:offsets[4]])
+        self.assertTrue(np.all(intervals > 0))
+        self.assertTrue(np.all(times >= 100 * ms))
+        self.assertTrue(np.all(times < 20 * second))
+        self.assertLess(pdiff(50 * 19.9, offsets[3] - offsets[2]), 0.2)
+        D, p = kstest(intervals, "expon", args=(0, 1 / 123.),
+                      alternative='two-sided')
+        self.assertGreater(p, 0.001)
+
+        times, offsets = stgen.homogeneous_poisson_process_batch(
+            10 * Hz, t_stop=1000 * ms, n=1000)
+        counts = np.diff(offsets)
+        self.assertEqual(len(counts), 1000)
+        # the spike counts are Poisson distributed
+        self.assertLess(pdiff(10, counts.mean()), 0.1)
+        self.assertLess(pdiff(10, counts.var()), 0.2)
+
+        binned = stgen.homogeneous_poisson_process_batch(
+            [10, 20] * Hz, t_stop=1000 * ms, binsize=10 * ms)
+        self.assertEqual(binned.matrix_rows, 2)
+        self.assertEqual(binned.num_bins, 100)
+        self.assertRaises(ValueError, stgen.homogeneous_poisson_process_batch,
+                          -1 * Hz)
+        self.assertRaises(ValueError, stgen.homogeneous_poisson_process_batch,
+                          1 * Hz, t_start=1 * second, t_stop=1 * second)
+
+    def test_gamma_batch(self):
+        np.random.seed(seed=12345)
+        a = 3.0
+        times, offsets = stgen.homogeneous_gamma_process_batch(
+            a, 67.0 * Hz, t_stop=2345 * ms, n=50)
+        self.assertEqual(len(offsets), 51)
+        intervals = np.diff(times.magnitude[offsets[7]:offsets[8]])
+        self.assertTrue(np.all(intervals > 0))
+        self.assertLess(pdiff(67 / a * 2.345 * 50, len(times)), 0.1)
+        D, p = kstest(intervals, "gamma", args=(a, 0, 1000 / 67.),
+                      alternative='two-sided')
+        self.assertGreater(p, 0.001)
+        times, offsets = stgen.homogeneous_gamma_process_batch(
+            [1, 10], [1, 1000] * Hz, t_stop=10 * second)
+        self.assertLess(pdiff(1000, offsets[2] - offsets[1]), 0.1)
+        self.assertRaises(ValueError, stgen.homogeneous_gamma_process_batch,
+                          0, 1 * Hz)
+
+
+class RandomStateTestCase(unittest.TestCase):
+
+    def test_reproducible(self):
+        rate = neo.AnalogSignal(
+            np.linspace(0, 100, 1000)[:, np.newaxis] * Hz,
+            sampling_period=1 * ms)
+        generators = [
+            lambda random_state: stgen.homogeneous_poisson_process(
+                50 * Hz, random_state=random_state),
+            lambda random_state: stgen.homogeneous_gamma_process(
+                2., 50 * Hz, random_state=random_state),
+            lambda random_state: stgen.inhomogeneous_poisson_process(
+                rate, random_state=random_state),
+            lambda random_state: stgen.homogeneous_poisson_process_batch(
+                [10, 20] * Hz, random_state=random_state)[0],
+            lambda random_state: stgen.single_interaction_process(
+                20 * Hz, 5 * Hz, t_stop=1 * s, n=3, jitter=1 * ms,
+                random_state=random_state)[1],
+            lambda random_state: stgen.compound_poisson_process(
+                [5, 10, 15] * Hz, [0, .8, .1, .1], t_stop=1 * s,
+                shift=2 * ms, random_state=random_state)[2],
+        ]
+        for generator in generators:
+            spikes1 = generator(17)
+            np.random.seed(0)
+            spikes2 = generator(np.random.RandomState(17))
+            assert_array_almost_equal(spikes1.magnitude, spikes2.magnitude)
+
+
 class _n_poisson_TestCase(unittest.TestCase):
 
     def setUp(self):
@@ -396,6 +651,42 @@ class singleinteractionprocess_TestCase(unittest.TestCase):
             ValueError, stgen.single_interaction_process, n=self.n,
             rate=self.rate, rate_c=self.rate + 1*Hz, t_stop=self.t_stop)
 
+    def test_sip_chunks(self):
+        np.random.seed(seed=12345)
+        chunks = list(stgen.single_interaction_process_chunks(
+            n=self.n, t_stop=self.t_stop, rate=self.rate,
+            rate_c=self.rate_c, chunk_duration=1 * s, jitter=5 * ms,
+            min_delay=50 * ms, return_coinc=True))
+        self.assertEqual(len(chunks), 10)
+        for i, (sip, coinc) in enumerate(chunks):
+            self.assertEqual(len(sip), self.n)
+            self.assertEqual(len(coinc), self.n)
+            self.assertEqual(sip[0].t_start, i * s)
+            self.assertEqual(sip[0].t_stop, (i + 1) * s)
+        sip = [np.concatenate([chunk[0][i].magnitude for chunk in chunks])
+               for i in range(self.n)]
+        coinc = np.concatenate([chunk[1][0].magnitude for chunk in chunks])
+        # all coincidences are yielded, at least min_delay apart
+        self.assertEqual(len(coinc), 10)
+        self.assertTrue(np.all(np.diff(coinc) >= 40))
+        for train in sip:
+            self.assertTrue(np.all(np.diff(train) >= 0))
+            self.assertLess(pdiff(100, len(train)), 0.5)
+
+        sip = stgen.single_interaction_process_chunks(
+            n=self.n, t_stop=self.t_stop, rate=self.rate,
+            rate_c=self.rate_c, chunk_duration=3 * s,
+            coincidences='stochastic', min_delay=10 * ms)
+        self.assertEqual([len(chunk) for chunk in sip], [self.n] * 4)
+        self.assertRaises(
+            ValueError, stgen.single_interaction_process_chunks, n=self.n,
+            rate=self.rate, rate_c=self.rate + 1 * Hz, t_stop=self.t_stop,
+            chunk_duration=1 * s)
+        self.assertRaises(
+            ValueError, stgen.single_interaction_process_chunks, n=self.n,
+            rate=self.rate, rate_c=self.rate_c, t_stop=self.t_stop,
+            chunk_duration=0 * s)
+
 
 class cppTestCase(unittest.TestCase):
     def test_cpp_hom(self):
@@ -631,6 +922,33 @@ class cppTestCase(unittest.TestCase):
             self.assertEqual(st.t_start, t_start)
         self.assertEqual(len(cpp_shift), len(A) - 1)
 
+    def test_cpp_chunks(self):
+        np.random.seed(seed=12345)
+        t_start = 5 * 1000 * ms
+        t_stop = 100 * 1000 * ms
+        chunks = list(stgen.compound_poisson_process_chunks(
+            3 * Hz, [0, .9, .1], t_stop, chunk_duration=700 * ms,
+            t_start=t_start, shift=3 * ms))
+        self.assertEqual(len(chunks), 136)
+        self.assertEqual(chunks[0][0].t_start, t_start)
+        self.assertEqual(chunks[-1][0].t_stop, t_stop)
+        for i in range(2):
+            train = np.concatenate([chunk[i].magnitude for chunk in chunks])
+            self.assertTrue(np.all(np.diff(train) >= 0))
+            self.assertLess(pdiff(3 * 95, len(train)), 0.3)
+
+        # fully synchronous spike trains
+        chunks = stgen.compound_poisson_process_chunks(
+            [3, 3] * Hz, [0, 0, 1], 10 * 1000 * ms, chunk_duration=1 * s)
+        for chunk in chunks:
+            assert_array_almost_equal(chunk[0].magnitude, chunk[1].magnitude)
+        chunks = stgen.compound_poisson_process_chunks(
+            3 * Hz, [1, 0, 0], 10 * 1000 * ms, chunk_duration=1 * s)
+        self.assertEqual(sum(len(chunk[0]) for chunk in chunks), 0)
+        self.assertRaises(
+            ValueError, stgen.compound_poisson_process_chunks, 3 * Hz,
+            [0, 1.1, -0.1], 10 * 1000 * ms, chunk_duration=1 * s)
+
 
 if __name__ == '__main__':
     unittest.main()
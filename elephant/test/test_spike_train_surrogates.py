@@ -309,6 +309,26 @@ class SurrogatesTestCase(unittest.TestCase):
             self.assertEqual(len(surrog), len(st))
         self.assertTrue(len(surrs2) == nr_surr2)
 
+    def test_random_state(self):
+        st = neo.SpikeTrain([90, 150, 180, 350] * pq.ms, t_stop=500 * pq.ms)
+        for surr_method in ('dither_spike_train', 'dither_spikes',
+                            'randomise_spikes', 'shuffle_isis'):
+            surrs1 = surr.surrogates(st, n=3, surr_method=surr_method,
+                                     dt=10 * pq.ms, random_state=1)
+            surrs2 = surr.surrogates(st, n=3, surr_method=surr_method,
+                                     dt=10 * pq.ms,
+                                     random_state=np.random.RandomState(1))
+            for surrog1, surrog2 in zip(surrs1, surrs2):
+                np.testing.assert_array_equal(surrog1.magnitude,
+                                              surrog2.magnitude)
+        surrs1 = surr.jitter_spikes(st, binsize=100 * pq.ms, n=3,
+                                    random_state=5)
+        surrs2 = surr.jitter_spikes(st, binsize=100 * pq.ms, n=3,
+                                    random_state=5)
+        for surrog1, surrog2 in zip(surrs1, surrs2):
+            np.testing.assert_array_equal(surrog1.magnitude,
+                                          surrog2.magnitude)
+
 
 def suite():
     suite = unittest.makeSuite(SurrogatesTestCase, 'test')
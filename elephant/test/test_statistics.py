@@ -8,6 +8,9 @@ Unit tests for the statistics module.
 from __future__ import division
     
 import unittest
+import shutil
+import tempfile
+import time
 
 import neo
 import numpy as np
@@ -15,6 +18,7 @@ from numpy.testing.utils import assert_array_almost_equal, assert_array_equal
 import quantities as pq
 import scipy.integrate as spint
 
+import elephant.conversion as conv
 import elephant.statistics as es
 import elephant.kernels as kernels
 import warnings
@@ -375,6 +379,68 @@ class CV2TestCase(unittest.TestCase):
         self.assertRaises(AttributeError, es.cv2, np.array([seq, seq]))
 
 
+class BatchStatisticsTestCase(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(2)
+        self.spiketrains = [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 10, n)), units='s',
+                           t_stop=10 * pq.s)
+            for n in [5, 0, 1, 2, 30, 3, 12]]
+        self.times, self.offsets = conv.ragged_spike_times(self.spiketrains)
+
+    def test_ragged_spike_times(self):
+        times, offsets = conv.ragged_spike_times(
+            [[0.3, 0.1] * pq.s, [] * pq.s, [200] * pq.ms])
+        assert_array_equal(offsets, [0, 2, 2, 3])
+        assert_array_almost_equal(times.magnitude, [0.1, 0.3, 0.2])
+        self.assertEqual(times.units, pq.s)
+        times, offsets = conv.ragged_spike_times([[3, 1, 2], [1]])
+        self.assertNotIsInstance(times, pq.Quantity)
+        assert_array_equal(times, [1, 2, 3, 1])
+
+    def test_isi_batch(self):
+        intervals, isi_offsets = es.isi_batch(self.times, self.offsets)
+        self.assertEqual(intervals.units, pq.s)
+        assert_array_equal(isi_offsets, [0, 4, 4, 4, 5, 34, 36, 47])
+        for i, st in enumerate(self.spiketrains):
+            assert_array_almost_equal(
+                intervals[isi_offsets[i]:isi_offsets[i + 1]].magnitude,
+                es.isi(st).magnitude)
+
+    def test_lv_cv2_batch(self):
+        lv = es.lv_batch(self.times, self.offsets)
+        cv2 = es.cv2_batch(self.times, self.offsets)
+        self.assertTrue(np.all(np.isnan(lv[1:4])))
+        self.assertTrue(np.all(np.isnan(cv2[1:4])))
+        for i in [0, 4, 5, 6]:
+            intervals = es.isi(self.spiketrains[i]).magnitude
+            self.assertAlmostEqual(lv[i], es.lv(intervals))
+            self.assertAlmostEqual(cv2[i], es.cv2(intervals))
+
+    def test_mean_firing_rate_batch(self):
+        rates = es.mean_firing_rate_batch(self.times, self.offsets,
+                                          1 * pq.s, 8000 * pq.ms)
+        self.assertEqual(rates.units, pq.Hz)
+        for st, rate in zip(self.spiketrains, rates):
+            self.assertAlmostEqual(
+                rate.magnitude,
+                es.mean_firing_rate(st, 1 * pq.s, 8 * pq.s).magnitude)
+        rates = es.mean_firing_rate_batch(self.times.magnitude, self.offsets,
+                                          0, np.arange(1, 8))
+        self.assertEqual(rates[4], len(self.spiketrains[4].time_slice(
+            0 * pq.s, 5 * pq.s)) / 5.)
+        self.assertRaises(TypeError, es.mean_firing_rate_batch,
+                          self.times.magnitude, self.offsets, 0, 1 * pq.s)
+
+    def test_fanofactor_batch(self):
+        self.assertAlmostEqual(es.fanofactor_batch(self.offsets)[0],
+                               es.fanofactor(self.spiketrains))
+        fano = es.fanofactor_batch(self.offsets, [0, 3, 7, 7])
+        self.assertAlmostEqual(fano[0], es.fanofactor(self.spiketrains[:3]))
+        self.assertAlmostEqual(fano[1], es.fanofactor(self.spiketrains[3:]))
+        self.assertTrue(np.isnan(fano[2]))
+
+
 class RateEstimationTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -401,7 +467,7 @@ class RateEstimationTestCase(unittest.TestCase):
         sampling_period = 0.01*pq.s
         with warnings.catch_warnings(record=True) as w:
             inst_rate = es.instantaneous_rate(
-                st, sampling_period, self.kernel, cutoff=0)
+                st, sampling_period, self.kernel, cutoff=0, method='fft')
             self.assertEqual("The width of the kernel was adjusted to a minimally "
                              "allowed width.", str(w[-2].message))
             self.assertEqual("Instantaneous firing rate approximation contains "
@@ -497,6 +563,197 @@ class RateEstimationTestCase(unittest.TestCase):
                                      x=rate_estimate.times.rescale('s').magnitude)[-1]
                 self.assertAlmostEqual(num_spikes, auc, delta=0.05*num_spikes)
 
+    def test_instantaneous_rate_multiple_spiketrains(self):
+        np.random.seed(5)
+        spiketrains = [self.spike_train] + [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 20, 100)) * pq.s,
+                           t_stop=20 * pq.s) for _ in range(3)]
+        spiketrains[2] = spiketrains[2].rescale('ms')
+        for trim in [False, True]:
+            rate = es.instantaneous_rate(spiketrains, 0.01 * pq.s,
+                                         self.kernel, trim=trim)
+            self.assertEqual(rate.shape[1], len(spiketrains))
+            for idx, st in enumerate(spiketrains):
+                target = es.instantaneous_rate(st, 0.01 * pq.s, self.kernel,
+                                               trim=trim)
+                self.assertEqual(rate.t_start, target.t_start)
+                assert_array_almost_equal(rate.magnitude[:, idx],
+                                          target.magnitude[:, 0])
+
+        # the bins of a binned spike train are used as time vector
+        binned = conv.BinnedSpikeTrain(spiketrains, binsize=0.01 * pq.s)
+        rate = es.instantaneous_rate(binned, 0.01 * pq.s, self.kernel,
+                                     t_start=5 * pq.s)
+        target = es.instantaneous_rate(spiketrains, 0.01 * pq.s,
+                                       self.kernel, t_start=5 * pq.s)
+        self.assertEqual(rate.t_start, 5 * pq.s)
+        self.assertEqual(rate.shape, (binned.num_bins - 500, len(spiketrains)))
+        assert_array_almost_equal(rate.magnitude,
+                                  target.magnitude[:len(rate)], decimal=3)
+        self.assertRaises(ValueError, es.instantaneous_rate, binned,
+                          0.02 * pq.s, self.kernel)
+        self.assertRaises(TypeError, es.instantaneous_rate,
+                          [self.spike_train, [1, 2] * pq.s], 0.01 * pq.s,
+                          self.kernel)
+
+    def test_instantaneous_rate_methods(self):
+        np.random.seed(6)
+        spiketrains = [self.spike_train] + [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 20, 20)) * pq.s,
+                           t_stop=20 * pq.s) for _ in range(2)]
+        binned = conv.BinnedSpikeTrain(spiketrains, binsize=0.01 * pq.s)
+        for kernel in [self.kernel, kernels.AlphaKernel(0.1 * pq.s)]:
+            for data in [spiketrains, binned]:
+                for trim in [False, True]:
+                    rate_fft = es.instantaneous_rate(
+                        data, 0.01 * pq.s, kernel, trim=trim, method='fft')
+                    rate_direct = es.instantaneous_rate(
+                        data, 0.01 * pq.s, kernel, trim=trim,
+                        method='direct')
+                    self.assertEqual(rate_fft.t_start, rate_direct.t_start)
+                    assert_array_almost_equal(rate_fft.magnitude,
+                                              rate_direct.magnitude)
+        self.assertRaises(ValueError, es.instantaneous_rate,
+                          self.spike_train, 0.01 * pq.s, self.kernel,
+                          method='convolve')
+
+    def test_instantaneous_rate_auto(self):
+        # dense spike trains, for which the FFT is faster
+        np.random.seed(9)
+        spiketrains = [neo.SpikeTrain(
+            np.sort(np.random.uniform(0, 60, 2400)) * pq.s,
+            t_stop=60 * pq.s) for _ in range(20)]
+        kernel = kernels.GaussianKernel(20 * pq.ms)
+        durations = {}
+        for method in ('fft', 'auto'):
+            durations[method] = []
+            for _ in range(3):
+                start = time.time()
+                es.instantaneous_rate(spiketrains, 1 * pq.ms, kernel,
+                                      method=method)
+                durations[method].append(time.time() - start)
+        self.assertLess(min(durations['auto']),
+                        1.5 * min(durations['fft']) + 0.05)
+
+        # the batches of the direct summation add up to the full sum
+        rows = np.repeat(np.arange(3), 40)
+        samples = np.random.randint(0, 500, size=len(rows))
+        kernel_values = np.random.uniform(size=31)
+        target = es._direct_sum_rows(rows, samples, None, 3, 500,
+                                     kernel_values)
+        assert_array_almost_equal(
+            es._direct_sum_rows(rows, samples, None, 3, 500, kernel_values,
+                                max_pairs=100), target)
+
+    def test_instantaneous_rate_fourier(self):
+        kernel = kernels.GaussianKernel(0.1 * pq.s)
+        for trim in [False, True]:
+            rate_fft = es.instantaneous_rate(
+                self.spike_train, 0.01 * pq.s, kernel, trim=trim,
+                method='fft')
+            rate_fourier = es.instantaneous_rate(
+                self.spike_train, 0.01 * pq.s, kernel, trim=trim,
+                method='fourier')
+            self.assertEqual(rate_fft.t_start, rate_fourier.t_start)
+            self.assertEqual(rate_fft.shape, rate_fourier.shape)
+            # the rates differ by the truncation error of the kernel
+            assert_array_almost_equal(rate_fft.magnitude,
+                                      rate_fourier.magnitude, decimal=3)
+
+    def test_instantaneous_rate_sweep(self):
+        np.random.seed(8)
+        spiketrains = [self.spike_train, neo.SpikeTrain(
+            np.sort(np.random.uniform(0, 20, 50)) * pq.s, t_stop=20 * pq.s)]
+        kernel_list = [self.kernel, kernels.GaussianKernel(0.2 * pq.s),
+                       kernels.AlphaKernel(0.1 * pq.s, invert=True)]
+        rates = es.instantaneous_rate_sweep(spiketrains, 0.01 * pq.s,
+                                            kernel_list)
+        self.assertEqual(rates.units, pq.Hz)
+        for kernel, rate in zip(kernel_list, rates):
+            target = es.instantaneous_rate(spiketrains, 0.01 * pq.s, kernel,
+                                           method='fft')
+            assert_array_almost_equal(rate.magnitude, target.magnitude)
+
+        sigmas = [0.05, 0.1, 0.3] * pq.s
+        rates = es.instantaneous_rate_sweep(
+            spiketrains[0], 0.01 * pq.s, kernels.GaussianKernel(1 * pq.s),
+            sigmas=sigmas, t_start=5 * pq.s)
+        self.assertEqual(rates.shape, (3, 1500, 1))
+        for sigma, rate in zip(sigmas, rates):
+            target = es.instantaneous_rate(
+                spiketrains[0], 0.01 * pq.s, kernels.GaussianKernel(sigma),
+                t_start=5 * pq.s)
+            assert_array_almost_equal(rate.magnitude, target.magnitude)
+
+        self.assertRaises(ValueError, es.instantaneous_rate_sweep,
+                          self.spike_train, 0.01 * pq.s, [])
+        self.assertRaises(TypeError, es.instantaneous_rate_sweep,
+                          self.spike_train, 0.01 * pq.s, ['auto'])
+        self.assertRaises(TypeError, es.instantaneous_rate_sweep,
+                          self.spike_train, 0.01 * pq.s, kernel_list,
+                          sigmas=sigmas)
+
+    def test_instantaneous_rate_at(self):
+        # spikes on the sampling points
+        np.random.seed(7)
+        spiketrains = [
+            neo.SpikeTrain(np.unique(np.random.randint(0, 80, 30)) * 0.25,
+                           units='s', t_stop=20 * pq.s) for _ in range(2)]
+        kernel = kernels.GaussianKernel(1 * pq.s)
+        rate = es.instantaneous_rate(spiketrains, 0.25 * pq.s, kernel)
+        times = rate.times[::3]
+        rate_at = es.instantaneous_rate_at(spiketrains, times, kernel)
+        self.assertEqual(rate_at.units, pq.Hz)
+        assert_array_almost_equal(rate_at.magnitude, rate.magnitude[::3])
+        rate_at = es.instantaneous_rate_at(spiketrains[0],
+                                           times.rescale('ms'), kernel)
+        self.assertEqual(rate_at.shape, (len(times), 1))
+        assert_array_almost_equal(rate_at.magnitude[:, 0],
+                                  rate.magnitude[::3, 0])
+
+        self.assertRaises(TypeError, es.instantaneous_rate_at,
+                          self.spike_train, [1, 2], kernel)
+        self.assertRaises(TypeError, es.instantaneous_rate_at,
+                          self.spike_train, [1, 2] * pq.s, 'auto')
+
+
+class SSKernelTestCase(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(9)
+        self.spiketimes = np.sort(np.random.uniform(0, 10, 200))
+
+    def test_sskernel_given_bandwidths(self):
+        w = np.linspace(0.05, 2, 25)
+        result = es.sskernel(self.spiketimes, w=w)
+        self.assertEqual(len(result['C']), len(w))
+        # the batched costs equal those of the single cost function
+        t = np.linspace(self.spiketimes[0], self.spiketimes[-1], 400)
+        result = es.sskernel(self.spiketimes, tin=t, w=w)
+        dt = np.min(np.diff(t))
+        yhist = np.histogram(self.spiketimes,
+                             np.r_[t - dt / 2, t[-1] + dt / 2])[0]
+        N = np.sum(yhist)
+        costs = [es.cost_function(yhist / (N * dt), N, w_, dt)[0]
+                 for w_ in w]
+        assert_array_almost_equal(result['C'], costs)
+        self.assertEqual(result['optw'], w[np.argmin(costs)])
+
+    def test_sskernel_bootstrap(self):
+        np.random.seed(10)
+        result = es.sskernel(self.spiketimes, bootstrap=True)
+        self.assertEqual(result['yb'].shape, (1000, len(result['t'])))
+        lower, upper = result['confb95']
+        self.assertTrue(np.all(lower <= upper))
+        # each bootstrap density is normalized
+        dt = result['t'][1] - result['t'][0]
+        assert_array_almost_equal(np.sum(result['yb'], axis=1) * dt,
+                                  np.ones(1000), decimal=2)
+        # the resamples do not depend on the number of threads
+        np.random.seed(10)
+        result_threads = es.sskernel(self.spiketimes, bootstrap=True,
+                                     num_workers=3)
+        assert_array_equal(result['yb'], result_threads['yb'])
+
 
 class TimeHistogramTestCase(unittest.TestCase):
     def setUp(self):
@@ -558,6 +815,100 @@ class TimeHistogramTestCase(unittest.TestCase):
         self.assertRaises(ValueError, es.time_histogram, self.spiketrains,
                           binsize=pq.s, output=' ')
 
+    def test_time_histogram_memmap_binned(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            binned = conv.MemmapBinnedSpikeTrain.create(
+                tmpdir, self.spiketrains, binsize=pq.s, chunk_size=3)
+            for binary in [False, True]:
+                for output in ['counts', 'mean', 'rate']:
+                    targ = es.time_histogram(self.spiketrains, binsize=pq.s,
+                                             output=output, binary=binary)
+                    histogram = es.time_histogram(
+                        binned, binsize=pq.s, output=output, binary=binary)
+                    assert_array_equal(targ.magnitude, histogram.magnitude)
+                    self.assertEqual(targ.units, histogram.units)
+                    self.assertEqual(targ.t_start, histogram.t_start)
+            self.assertRaises(ValueError, es.time_histogram, binned,
+                              binsize=2 * pq.s)
+            self.assertRaises(ValueError, es.time_histogram, binned,
+                              binsize=pq.s, t_start=1 * pq.s)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_time_histogram_appendable_binned(self):
+        binned = conv.AppendableBinnedSpikeTrain(len(self.spiketrains),
+                                                 binsize=pq.s)
+        for t_stop in [3.5, 7, 10] * pq.s:
+            binned.append([st.time_slice(binned.t_received, t_stop)
+                           for st in self.spiketrains], t_stop=t_stop)
+            targ = es.time_histogram(self.spiketrains, binsize=pq.s,
+                                     t_stop=binned.t_stop)
+            histogram = es.time_histogram(binned, binsize=pq.s)
+            assert_array_equal(targ.magnitude, histogram.magnitude)
+
+
+class PSTHTestCase(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(4)
+        self.spiketrains = [
+            neo.SpikeTrain(np.sort(np.random.uniform(0, 100, 500)),
+                           units='s', t_stop=100 * pq.s) for _ in range(3)]
+        self.events = np.random.uniform(2, 98, 20) * pq.s
+        self.conditions = np.array(['a', 'b'] * 10)
+
+    def _trial_counts(self, unit, events):
+        edges = np.arange(-10, 21) * 0.05
+        return np.array([np.histogram(
+            self.spiketrains[unit].magnitude, bins=event + edges)[0]
+            for event in events.magnitude])
+
+    def test_psth(self):
+        mean, sem = es.psth(self.spiketrains, self.events, 50 * pq.ms,
+                            (-0.5 * pq.s, 1 * pq.s), output='counts')
+        self.assertIsInstance(mean, neo.AnalogSignal)
+        self.assertEqual(mean.shape, (30, 3))
+        self.assertAlmostEqual(mean.t_start, -0.5 * pq.s)
+        self.assertAlmostEqual(mean.sampling_period, 0.05 * pq.s)
+        for unit in range(3):
+            counts = self._trial_counts(unit, self.events)
+            assert_array_almost_equal(mean.magnitude[:, unit],
+                                      counts.mean(axis=0))
+            assert_array_almost_equal(
+                sem.magnitude[:, unit],
+                counts.std(axis=0, ddof=1) / np.sqrt(20))
+
+    def test_psth_conditions(self):
+        mean, sem = es.psth(self.spiketrains[0], self.events, 50 * pq.ms,
+                            (-0.5 * pq.s, 1 * pq.s),
+                            conditions=self.conditions)
+        self.assertEqual(sorted(mean.keys()), ['a', 'b'])
+        for condition in ['a', 'b']:
+            counts = self._trial_counts(
+                0, self.events[self.conditions == condition])
+            self.assertEqual(mean[condition].units, pq.Hz)
+            assert_array_almost_equal(mean[condition].magnitude[:, 0],
+                                      counts.mean(axis=0) / 0.05)
+
+    def test_psth_smoothed(self):
+        kernel = kernels.GaussianKernel(sigma=100 * pq.ms)
+        mean, _ = es.psth(self.spiketrains, self.events, 50 * pq.ms,
+                          (-0.5 * pq.s, 1 * pq.s), kernel=kernel)
+        kernel_values = kernel(
+            np.arange(-10, 11) * 50 * pq.ms).rescale(pq.Hz).magnitude
+        for unit in range(3):
+            counts = self._trial_counts(unit, self.events).mean(axis=0)
+            targ = np.convolve(counts, kernel_values, mode='same')
+            assert_array_almost_equal(mean.magnitude[:, unit], targ)
+
+    def test_psth_errors(self):
+        self.assertRaises(ValueError, es.psth, self.spiketrains,
+                          [1, 50] * pq.s, 50 * pq.ms, (-2 * pq.s, 1 * pq.s))
+        self.assertRaises(ValueError, es.psth, self.spiketrains, self.events,
+                          50 * pq.ms, (0 * pq.s, 1 * pq.s), conditions=[1])
+        self.assertRaises(ValueError, es.psth, self.spiketrains, self.events,
+                          50 * pq.ms, (0 * pq.s, 1 * pq.s), output='mean')
+
 
 class ComplexityPdfTestCase(unittest.TestCase):
     def setUp(self):
@@ -585,6 +936,70 @@ class ComplexityPdfTestCase(unittest.TestCase):
         self.assertIsInstance(complexity, neo.AnalogSignal)
         self.assertEqual(complexity.units, 1*pq.dimensionless)
 
+    def test_complexity_pdf_memmap_binned(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            binned = conv.MemmapBinnedSpikeTrain.create(
+                tmpdir, self.spiketrains, binsize=0.1 * pq.s, chunk_size=7)
+            complexity = es.complexity_pdf(binned, binsize=0.1 * pq.s)
+            targ = es.complexity_pdf(self.spiketrains, binsize=0.1 * pq.s)
+            assert_array_almost_equal(targ.magnitude, complexity.magnitude)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_complexity_pdf_sliding(self):
+        np.random.seed(3)
+        spiketrains = [neo.SpikeTrain(np.random.uniform(0, 10, 40),
+                                      units='s', t_stop=10 * pq.s)
+                       for _ in range(4)]
+        binned = conv.BinnedSpikeTrain(spiketrains, binsize=0.1 * pq.s)
+        complexity = np.ravel(binned.to_bool_array().sum(axis=0))
+        tmpdir = tempfile.mkdtemp()
+        try:
+            memmap = conv.MemmapBinnedSpikeTrain.create(
+                tmpdir, spiketrains, binsize=0.1 * pq.s, chunk_size=7)
+            for window, step in [(10, 10), (13, 4), (5, 9), (100, 1)]:
+                targ = [np.bincount(complexity[k:k + window], minlength=5)
+                        for k in range(0, 100 - window + 1, step)]
+                targ = np.array(targ) / window
+                for input in (spiketrains, binned, memmap):
+                    pdf = es.complexity_pdf_sliding(
+                        input, 0.1 * pq.s, window * 0.1 * pq.s,
+                        step * 100 * pq.ms)
+                    self.assertIsInstance(pdf, neo.AnalogSignal)
+                    assert_array_almost_equal(pdf.magnitude, targ)
+                    self.assertAlmostEqual(pdf.sampling_period,
+                                           step * 0.1 * pq.s)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertRaises(ValueError, es.complexity_pdf_sliding, binned,
+                          0.2 * pq.s, 1 * pq.s)
+        self.assertRaises(ValueError, es.complexity_pdf_sliding, binned,
+                          0.1 * pq.s, 1 * pq.ms)
+
+    def test_complexity_histogram(self):
+        binned = conv.AppendableBinnedSpikeTrain(3, binsize=0.1 * pq.s)
+        hist = es.ComplexityHistogram(3)
+        window_hist = es.ComplexityHistogram(3, window_size=20)
+        blocks = []
+        for t_stop in [2.5, 3, 7.3, 10]:
+            blocks.append(binned.append(self.spiketrains,
+                                        t_stop=t_stop * pq.s))
+            hist.add(blocks[-1])
+            window_hist.add(blocks[-1])
+        targ = es.complexity_pdf(self.spiketrains, binsize=0.1 * pq.s)
+        assert_array_almost_equal(hist.pdf().magnitude, targ.magnitude)
+        self.assertEqual(hist.num_bins, 100)
+        complexity = np.ravel(binned.to_bool_array().sum(axis=0))
+        assert_array_equal(window_hist.counts,
+                           np.bincount(complexity[80:], minlength=4))
+        hist.remove(blocks[0])
+        assert_array_equal(hist.counts,
+                           np.bincount(complexity[25:], minlength=4))
+        self.assertRaises(ValueError, hist.remove, blocks[0])
+        self.assertRaises(ValueError, hist.add, [4])
+        self.assertRaises(ValueError, window_hist.remove, blocks[-1])
+
 
 if __name__ == '__main__':
     unittest.main()
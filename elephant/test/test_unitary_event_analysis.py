@@ -10,6 +10,7 @@ import numpy as np
 import quantities as pq
 import types
 import elephant.unitary_event_analysis as ue
+import elephant.conversion as conv
 import neo
 import sys
 import os
@@ -233,6 +234,49 @@ class UETestCase(unittest.TestCase):
         n_exp_surr = ue.n_exp_mat_sum_trial(mat, N, pattern_hash, method='surrogate_TrialByTrial',n_surr = 1000)
         self.assertLess((np.abs(n_exp_anal[0]-np.mean(n_exp_surr))/n_exp_anal[0]),0.1)
 
+    def test_n_exp_mat_sum_trial_surrogate_random_state(self):
+        mat = self.binary_sts
+        pattern_hash = np.array([5])
+        N = 3
+        n_exp_1 = ue.n_exp_mat_sum_trial(
+            mat, N, pattern_hash, method='surrogate_TrialByTrial', n_surr=50,
+            random_state=3)
+        n_exp_2 = ue.n_exp_mat_sum_trial(
+            mat, N, pattern_hash, method='surrogate_TrialByTrial', n_surr=50,
+            random_state=3)
+        np.testing.assert_array_equal(n_exp_1, n_exp_2)
+        # every surrogate has its own stream, whatever their number
+        n_exp_3 = ue.n_exp_mat(mat[0], N, pattern_hash, method='surr',
+                               n_surr=50, random_state=3)
+        n_exp_4 = ue.n_exp_mat(mat[0], N, pattern_hash, method='surr',
+                               n_surr=10, random_state=3)
+        np.testing.assert_array_equal(n_exp_3[:10], n_exp_4)
+
+    def test_jointJ_window_analysis_trial_binned(self):
+        np.random.seed(4)
+        data = [[neo.SpikeTrain(
+            np.sort(np.random.uniform(0, 1000, 40)) * pq.ms,
+            t_stop=1000 * pq.ms) for _ in range(2)] for _ in range(5)]
+        binsize = 5 * pq.ms
+        binned = conv.TrialBinnedSpikeTrain(data, binsize=binsize)
+        pattern_hash = [3]
+        for method in ['analytic_TrialByTrial', 'analytic_TrialAverage',
+                       'surrogate_TrialByTrial']:
+            UE_list = ue.jointJ_window_analysis(
+                data, binsize, 100 * pq.ms, 50 * pq.ms, pattern_hash,
+                method=method, n_surr=20, random_state=2)
+            UE_binned = ue.jointJ_window_analysis(
+                binned, binsize, 100 * pq.ms, 50 * pq.ms, pattern_hash,
+                method=method, n_surr=20, random_state=2)
+            for key in ['Js', 'n_emp', 'n_exp', 'rate_avg']:
+                np.testing.assert_array_almost_equal(UE_binned[key],
+                                                     UE_list[key])
+            self.assertEqual(sorted(UE_binned['indices']),
+                             sorted(UE_list['indices']))
+            for trial, indices in UE_list['indices'].items():
+                np.testing.assert_array_equal(UE_binned['indices'][trial],
+                                              indices)
+
     def test_n_exp_mat_sum_trial_ValueError(self):
         mat = np.array([[0,0,0], [1,0,0], [0,1,0], [0,0,1], [1,1,0],
                       [1,0,1],[0,1,1],[1,1,1]])
@@ -348,6 +392,15 @@ class UETestCase(unittest.TestCase):
             UE_dic['indices']['trial26'],expected_indecis_tril26))
         self.assertTrue(np.allclose(
             UE_dic['indices']['trial4'],expected_indecis_tril4))
+
+        # reusing the binning of a trial-stacked binned spike train
+        binned = conv.TrialBinnedSpikeTrain(data, binsize=binsize)
+        UE_binned = ue.jointJ_window_analysis(
+            binned, binsize, winsize, winstep, pattern_hash)
+        self.assertTrue(np.allclose(UE_binned['Js'], UE_dic['Js']))
+        self.assertTrue(np.allclose(UE_binned['n_emp'], UE_dic['n_emp']))
+        self.assertTrue(np.allclose(
+            UE_binned['indices']['trial26'], expected_indecis_tril26))
         
     @staticmethod    
     def load_gdf2Neo(fname, trigger, t_pre, t_post):
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the utils module.
+
+:copyright: Copyright 2014-2018 by the Elephant team, see AUTHORS.txt.
+:license: Modified BSD, see LICENSE.txt for details.
+"""
+
+import unittest
+
+import numpy as np
+
+import elephant.utils as utils
+
+
+class RandomStateTestCase(unittest.TestCase):
+
+    def test_get_random_state(self):
+        self.assertIs(utils.get_random_state(), np.random.mtrand._rand)
+        random_state = np.random.RandomState(3)
+        self.assertIs(utils.get_random_state(random_state), random_state)
+        np.testing.assert_array_equal(
+            utils.get_random_state(3).uniform(size=5),
+            np.random.RandomState(3).uniform(size=5))
+        self.assertRaises(TypeError, utils.get_random_state, 'seed')
+
+    @unittest.skipUnless(hasattr(np.random, 'SeedSequence'),
+                         'requires numpy >= 1.17')
+    def test_spawn_random_states(self):
+        streams = utils.spawn_random_states(42, 8)
+        self.assertEqual(len(streams), 8)
+        draws = [stream.uniform(size=3) for stream in streams]
+        # the streams do not depend on their number
+        for stream, draw in zip(utils.spawn_random_states(42, 4), draws):
+            np.testing.assert_array_equal(stream.uniform(size=3), draw)
+        self.assertFalse(np.allclose(draws[0], draws[1]))
+        # generators are advanced by spawning
+        random_state = np.random.RandomState(1)
+        first = utils.spawn_random_states(random_state, 1)[0]
+        second = utils.spawn_random_states(random_state, 1)[0]
+        self.assertFalse(np.allclose(first.uniform(size=3),
+                                     second.uniform(size=3)))
+
+    def test_surrogate_random_states(self):
+        random_states = utils.surrogate_random_states(None, 3)
+        self.assertEqual(len(random_states), 3)
+        for random_state in random_states:
+            self.assertIs(random_state, np.random.mtrand._rand)
+
+
+def suite():
+    suite = unittest.makeSuite(RandomStateTestCase, 'test')
+    return suite
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
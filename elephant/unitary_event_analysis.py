@@ -25,6 +25,7 @@ import quantities as pq
 import neo
 import warnings
 import elephant.conversion as conv
+from elephant.utils import get_random_state, surrogate_random_states
 import scipy
 
 
@@ -303,7 +304,7 @@ def _n_exp_mat_analytic(mat, N, pattern_hash):
     return np.prod(pmat, axis=0) * float(np.shape(mat)[1])
 
 
-def _n_exp_mat_surrogate(mat, N, pattern_hash, n_surr=1):
+def _n_exp_mat_surrogate(mat, N, pattern_hash, n_surr=1, random_state=None):
     """
     Calculates the expected joint probability for each spike pattern with spike
     time randomization surrogate
@@ -311,15 +312,17 @@ def _n_exp_mat_surrogate(mat, N, pattern_hash, n_surr=1):
     if len(pattern_hash) > 1:
         raise ValueError('surrogate method works only for one pattern!')
     N_exp_array = np.zeros(n_surr)
+    random_states = surrogate_random_states(random_state, n_surr)
     for rz_idx, rz in enumerate(np.arange(n_surr)):
         # shuffling all elements of zero-one matrix
         mat_surr = np.array(mat)
-        [np.random.shuffle(i) for i in mat_surr]
+        [random_states[rz_idx].shuffle(i) for i in mat_surr]
         N_exp_array[rz_idx] = n_emp_mat(mat_surr, N, pattern_hash)[0][0]
     return N_exp_array
 
 
-def n_exp_mat(mat, N, pattern_hash, method='analytic', n_surr=1):
+def n_exp_mat(mat, N, pattern_hash, method='analytic', n_surr=1,
+              random_state=None):
     """
     Calculates the expected joint probability for each spike pattern
 
@@ -339,6 +342,10 @@ def n_exp_mat(mat, N, pattern_hash, method='analytic', n_surr=1):
     n_surr: integer
             number of surrogates for constructing the distribution of expected joint probability.
             Default is 1 and this number is needed only when method = 'surr'
+    random_state: None, int, np.random.RandomState or np.random.Generator
+            the source of randomness of the surrogates, see
+            `elephant.utils.surrogate_random_states()`.
+            Default is None
 
     kwargs:
     -------
@@ -389,7 +396,8 @@ def n_exp_mat(mat, N, pattern_hash, method='analytic', n_surr=1):
     if method == 'analytic':
         return _n_exp_mat_analytic(mat, N, pattern_hash)
     if method == 'surr':
-        return _n_exp_mat_surrogate(mat, N, pattern_hash, n_surr)
+        return _n_exp_mat_surrogate(mat, N, pattern_hash, n_surr,
+                                    random_state=random_state)
 
 
 def n_exp_mat_sum_trial(
@@ -429,6 +437,10 @@ def n_exp_mat_sum_trial(
     n_surr: integer
             number of surrogate to be used
             Default is 1
+    random_state: None, int, np.random.RandomState or np.random.Generator
+            the source of randomness of the surrogates, see
+            `elephant.utils.surrogate_random_states()`.
+            Default is None
 
     Returns:
     --------
@@ -469,10 +481,15 @@ def n_exp_mat_sum_trial(
             n_surr = kwargs['n_surr']
         else:
             n_surr = 1.
+        # the surrogates of all trials are drawn from one stream
+        random_state = kwargs.get('random_state')
+        if random_state is not None:
+            random_state = get_random_state(random_state)
         n_exp = np.zeros(n_surr)
         for mat_tr in mat:
             n_exp += n_exp_mat(mat_tr, N, pattern_hash,
-                               method='surr', n_surr=n_surr)
+                               method='surr', n_surr=n_surr,
+                               random_state=random_state)
     else:
         raise ValueError(
             "The method only works on the zero_one matrix at the moment")
@@ -518,6 +535,10 @@ def gen_pval_anal(
     n_surr: integer
             number of surrogate to be used
             Default is 1
+    random_state: None, int, np.random.RandomState or np.random.Generator
+            the source of randomness of the surrogates, see
+            `elephant.utils.surrogate_random_states()`.
+            Default is None
 
 
     Returns:
@@ -556,7 +577,8 @@ def gen_pval_anal(
         else:
             n_surr = 1.
         n_exp = n_exp_mat_sum_trial(
-            mat, N, pattern_hash, method=method, n_surr=n_surr)
+            mat, N, pattern_hash, method=method, n_surr=n_surr,
+            random_state=kwargs.get('random_state'))
 
         def pval(n_emp):
             hist = np.bincount(np.int64(n_exp))
@@ -654,7 +676,8 @@ def _UE(mat, N, pattern_hash, method='analytic_TrialByTrial', **kwargs):
         else:
             n_surr = 1
         dist_exp, n_exp = gen_pval_anal(
-            mat, N, pattern_hash, method, n_surr=n_surr)
+            mat, N, pattern_hash, method, n_surr=n_surr,
+            random_state=kwargs.get('random_state'))
         n_exp = np.mean(n_exp)
     elif method == 'analytic_TrialByTrial' or method == 'analytic_TrialAverage':
         dist_exp, n_exp = gen_pval_anal(mat, N, pattern_hash, method)
@@ -672,11 +695,14 @@ def jointJ_window_analysis(
 
     Parameters:
     ----------
-    data: list of neo.SpikeTrain objects
+    data: list of neo.SpikeTrain objects or TrialBinnedSpikeTrain
           list of spike trains in different trials
                                         0-axis --> Trials
                                         1-axis --> Neurons
                                         2-axis --> Spike times
+          If a conv.TrialBinnedSpikeTrain is given, its binning is reused;
+          its bin size must equal `binsize`, and `t_start` and `t_stop`
+          default to those of the binned data.
     binsize: Quantity scalar with dimension time
            size of bins for descritizing spike trains
     winsize: Quantity scalar with dimension time
@@ -711,6 +737,10 @@ def jointJ_window_analysis(
     n_surr: integer
             number of surrogate to be used
             Default is 100
+    random_state: None, int, np.random.RandomState or np.random.Generator
+            the source of randomness of the surrogates, see
+            `elephant.utils.surrogate_random_states()`.
+            Default is None
 
 
     Returns:
@@ -738,7 +768,15 @@ def jointJ_window_analysis(
                         different window --> 1-axis
 
     """
-    if not isinstance(data[0][0], neo.SpikeTrain):
+    if isinstance(data, conv.TrialBinnedSpikeTrain):
+        if data.binsize != binsize:
+            raise ValueError(
+                "binsize must be equal to the bin size of the binned data")
+        if t_start is None:
+            t_start = data.t_start.rescale('ms')
+        if t_stop is None:
+            t_stop = data.t_stop.rescale('ms')
+    elif not isinstance(data[0][0], neo.SpikeTrain):
         raise ValueError(
             "structure of the data is not correct: 0-axis should be trials, 1-axis units and 2-axis neo spike trains")
 
@@ -764,20 +802,22 @@ def jointJ_window_analysis(
             "ratio between winsize and binsize is not integer -- "
             "the actual number for window size is" + str(winstep_bintime * binsize))
 
-    num_tr, N = np.shape(data)[:2]
+    if binary is not True:
+        raise ValueError(
+            "The method only works on the zero_one matrix at the moment")
 
-    n_bins = int((t_stop - t_start) / binsize)
+    if isinstance(data, conv.TrialBinnedSpikeTrain):
+        binned_trials = data
+        if (binned_trials.t_start != t_start or
+                binned_trials.t_stop != t_stop):
+            binned_trials = binned_trials.time_slice(t_start, t_stop)
+    else:
+        # all trials are binned in one pass
+        binned_trials = conv.TrialBinnedSpikeTrain(
+            data, t_start=t_start, t_stop=t_stop, binsize=binsize)
+    num_tr, N = binned_trials.n_trials, binned_trials.n_units
 
-    mat_tr_unit_spt = np.zeros((len(data), N, n_bins))
-    for tr, sts in enumerate(data):
-        bs = conv.BinnedSpikeTrain(
-            sts, t_start=t_start, t_stop=t_stop, binsize=binsize)
-        if binary is True:
-            mat = bs.to_bool_array()
-        else:
-            raise ValueError(
-                "The method only works on the zero_one matrix at the moment")
-        mat_tr_unit_spt[tr] = mat
+    mat_tr_unit_spt = binned_trials.to_bool_array()
 
     num_win = len(t_winpos)
     Js_win, n_exp_win, n_emp_win = (np.zeros(num_win) for _ in range(3))
@@ -785,6 +825,10 @@ def jointJ_window_analysis(
     indices_win = {}
     for i in range(num_tr):
         indices_win['trial' + str(i)] = []
+    # the surrogates of all windows are drawn from one stream
+    random_state = kwargs.get('random_state')
+    if random_state is not None:
+        random_state = get_random_state(random_state)
 
     for i, win_pos in enumerate(t_winpos_bintime):
         mat_win = mat_tr_unit_spt[:, :, win_pos:win_pos + winsize_bintime]
@@ -794,7 +838,8 @@ def jointJ_window_analysis(
             else:
                 n_surr = 100
             Js_win[i], rate_avg[i], n_exp_win[i], n_emp_win[i], indices_lst = _UE(
-                mat_win, N, pattern_hash, method, n_surr=n_surr)
+                mat_win, N, pattern_hash, method, n_surr=n_surr,
+                random_state=random_state)
         else:
             Js_win[i], rate_avg[i], n_exp_win[i], n_emp_win[
                 i], indices_lst = _UE(mat_win, N, pattern_hash, method)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Utility functions shared by the modules of Elephant.
+
+Random number generation
+------------------------
+All stochastic routines take a `random_state` parameter, which is passed to
+`get_random_state()`. `spawn_random_states()` derives independent streams,
+e.g. one per surrogate or per worker, so that the result of a parallelized
+computation does not depend on the number of workers.
+
+:copyright: Copyright 2014-2018 by the Elephant team, see AUTHORS.txt.
+:license: Modified BSD, see LICENSE.txt for details.
+"""
+
+from __future__ import division
+import numbers
+
+import numpy as np
+
+
+def _is_generator(random_state):
+    return hasattr(np.random, 'Generator') and isinstance(
+        random_state, np.random.Generator)
+
+
+def _is_seed_sequence(random_state):
+    return hasattr(np.random, 'SeedSequence') and isinstance(
+        random_state, np.random.SeedSequence)
+
+
+def get_random_state(random_state=None):
+    """
+    Returns the random number generator to draw from for `random_state`.
+
+    Parameters
+    ----------
+    random_state : None, int, np.random.RandomState, np.random.Generator or
+                   np.random.SeedSequence
+        * None: the global state of `np.random`, so that `np.random.seed()`
+          keeps controlling the results.
+        * int: a new `np.random.RandomState` seeded with it.
+        * np.random.RandomState or np.random.Generator: returned as is.
+        * np.random.SeedSequence: a new `np.random.Generator` seeded with
+          it.
+        Default: None
+
+    Returns
+    -------
+    np.random.RandomState or np.random.Generator
+
+    Raises
+    ------
+    TypeError : If `random_state` is none of the above.
+
+    Notes
+    -----
+    Only methods common to `np.random.RandomState` and `np.random.Generator`
+    (e.g. `uniform`, `exponential`, `gamma`, `poisson`, `normal`, `choice`,
+    `permutation` and `shuffle`) are used on the returned generator.
+    """
+    if random_state is None:
+        return np.random.mtrand._rand
+    if isinstance(random_state, (numbers.Integral, np.integer)):
+        return np.random.RandomState(random_state)
+    if isinstance(random_state, np.random.RandomState) or _is_generator(
+            random_state):
+        return random_state
+    if _is_seed_sequence(random_state):
+        return np.random.default_rng(random_state)
+    raise TypeError(
+        'random_state must be None, an int, a np.random.RandomState, '
+        'Generator or SeedSequence, not %s' % type(random_state))
+
+
+def spawn_random_states(random_state, n):
+    """
+    Returns `n` statistically independent random number generators derived
+    from `random_state` by spawning a `np.random.SeedSequence`.
+
+    The generators depend only on `random_state` and on their index, so that
+    work split among any number of workers, each using the generators of its
+    share of the indices, gives the same results as a serial run.
+
+    Parameters
+    ----------
+    random_state : None, int, np.random.RandomState, np.random.Generator or
+                   np.random.SeedSequence
+        The seed of the generators. A `RandomState` or `Generator` is
+        advanced by drawing the entropy of the seed from it. None uses fresh
+        entropy from the operating system.
+    n : int
+        The number of generators.
+
+    Returns
+    -------
+    list of np.random.Generator
+
+    Raises
+    ------
+    ImportError : If numpy is older than 1.17.
+
+    Examples
+    --------
+        >>> from elephant.utils import spawn_random_states
+        >>> streams = spawn_random_states(1234, n=64)
+        >>> # worker k of 8 draws the surrogates k, k + 8, ...
+        >>> mine = streams[k::8]
+
+    """
+    if not hasattr(np.random, 'SeedSequence'):
+        raise ImportError('spawn_random_states requires numpy >= 1.17')
+    if _is_seed_sequence(random_state):
+        seed_sequence = random_state
+    elif random_state is None or isinstance(
+            random_state, (numbers.Integral, np.integer)):
+        seed_sequence = np.random.SeedSequence(random_state)
+    else:
+        entropy = get_random_state(random_state).uniform(size=4) * 2 ** 32
+        seed_sequence = np.random.SeedSequence(
+            [int(x) for x in entropy])
+    return [np.random.default_rng(child)
+            for child in seed_sequence.spawn(n)]
+
+
+def surrogate_random_states(random_state, n):
+    """
+    Returns the random number generators of a loop over `n` surrogates.
+
+    If `random_state` is None, all surrogates draw in turn from the global
+    state of `np.random`. Otherwise every surrogate gets its own stream from
+    `spawn_random_states()`, so that the surrogates are reproducible and
+    independent of how the loop is split among workers.
+
+    Parameters
+    ----------
+    random_state : None, int, np.random.RandomState, np.random.Generator or
+                   np.random.SeedSequence
+        The seed of the generators, see `spawn_random_states()`.
+    n : int
+        The number of surrogates.
+
+    Returns
+    -------
+    list of np.random.RandomState or np.random.Generator
+    """
+    if random_state is None:
+        return [get_random_state()] * n
+    return spawn_random_states(random_state, n)